@@ -2,10 +2,12 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from utils.rest import MODERATION, bans_route, get_rest
 
 class Ban(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.rest = get_rest(bot)
 
     @app_commands.command(name="ban", description="Bans a user from the server.")
     @app_commands.describe(
@@ -24,7 +26,7 @@ class Ban(commands.Cog):
             return await interaction.response.send_message("I cannot ban a member with an equal or higher role than me.", ephemeral=True)
 
         try:
-            await member.ban(reason=reason)
+            await self.rest.call(MODERATION, bans_route(member.guild.id), lambda: member.ban(reason=reason))
             await interaction.response.send_message(f"🔨 {member.mention} has been banned. Reason: {reason}")
         except discord.Forbidden:
             await interaction.response.send_message("I don't have permission to ban this user.", ephemeral=True)
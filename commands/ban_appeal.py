@@ -1,28 +1,68 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
 from datetime import datetime, timezone
+from utils.audit_log import get_tailer
+from utils.rest import INTERACTIVE, MODERATION, bans_route, get_rest
+from utils.users import get_users
+from utils.storage import get_store, import_json_file
+import logging
 
-APPEALS_FILE = "ban_appeals.json"
+logger = logging.getLogger(__name__)
+
+APPEALS_FILE = "ban_appeals.json"  # Pre-storage file, imported once
+
+def import_appeals(data: dict) -> dict:
+    """Converts {guild_id: {user_id: appeal}} from ban_appeals.json into one row per appeal"""
+    return {
+        f"{guild_id}:{user_id}": {**appeal, 'guild_id': guild_id}
+        for guild_id, appeals in data.items()
+        for user_id, appeal in appeals.items()
+    }
+
+# Storage schema versions for the ban_appeals table
+MIGRATIONS = (
+    import_json_file(APPEALS_FILE, import_appeals),
+)
 
 class BanAppeal(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.store = get_store(bot)
+        self.table = None
+        self.appeals = {}  # {guild_id: {user_id: appeal}}
+        self.audit_log = get_tailer(bot)
+        self.rest = get_rest(bot)
+        self.users = get_users(bot)
+
+    async def cog_load(self):
+        self.table = await self.store.open_table('ban_appeals', MIGRATIONS)
         self.appeals = self.load_appeals()
 
-    def load_appeals(self):
-        """Load ban appeals from JSON file"""
-        if os.path.exists(APPEALS_FILE):
-            with open(APPEALS_FILE, 'r') as f:
-                return json.load(f)
-        return {}
+        # One view instance covers every appeal message, pending ones included
+        self.bot.add_view(AppealView())
+        pending = sum(
+            1 for appeals in self.appeals.values()
+            for appeal in appeals.values() if appeal['status'] == 'pending'
+        )
+        logger.info(f"Registered appeal buttons for {pending} pending ban appeal(s)")
 
-    def save_appeals(self):
-        """Save ban appeals to JSON file"""
-        with open(APPEALS_FILE, 'w') as f:
-            json.dump(self.appeals, f, indent=4)
+    async def cog_unload(self):
+        # Commit queued changes before the cog goes away
+        await self.store.flush()
+
+    def load_appeals(self):
+        """Group stored ban appeals by guild"""
+        appeals = {}
+        for key, row in self.table.items():
+            appeal = dict(row)
+            guild_id = appeal.pop('guild_id')
+            appeals.setdefault(guild_id, {})[key.split(":", 1)[1]] = appeal
+        return appeals
+
+    def save_appeal(self, guild_id: str, user_id: str):
+        """Store one appeal; only this row is written"""
+        self.table.put(f"{guild_id}:{user_id}", {**self.appeals[guild_id][user_id], 'guild_id': guild_id})
 
     @app_commands.command(name="ban_appeal", description="Submit a ban appeal (use in DM)")
     @app_commands.describe(
@@ -51,9 +91,10 @@ class BanAppeal(commands.Cog):
         user_id = str(interaction.user.id)
         guild_id_str = str(guild_id_int)
 
-        # Check if user is actually banned
+        # Check if user is actually banned. The audit log cache can be an hour stale and miss an unban,
+        # so it only fills in the reason when the ban itself has none
         try:
-            ban_entry = await guild.fetch_ban(interaction.user)
+            ban_entry = await self.rest.call(INTERACTIVE, bans_route(guild.id), lambda: guild.fetch_ban(interaction.user))
         except discord.NotFound:
             return await interaction.response.send_message(
                 f"❌ You are not banned from **{guild.name}**."
@@ -62,6 +103,8 @@ class BanAppeal(commands.Cog):
             return await interaction.response.send_message(
                 "❌ I don't have permission to check ban status in that server."
             )
+        cached_ban = self.audit_log.cached(guild.id, interaction.user.id, 'ban')
+        ban_reason = ban_entry.reason or (cached_ban['reason'] if cached_ban else None)
 
         # Check for existing pending appeal
         if guild_id_str in self.appeals:
@@ -85,7 +128,7 @@ class BanAppeal(commands.Cog):
             self.appeals[guild_id_str] = {}
         
         self.appeals[guild_id_str][user_id] = appeal_data
-        self.save_appeals()
+        self.save_appeal(guild_id_str, user_id)
 
         # Create embed for moderators
         embed = discord.Embed(
@@ -95,7 +138,7 @@ class BanAppeal(commands.Cog):
         )
         embed.add_field(name="User", value=f"{interaction.user} ({user_id})", inline=True)
         embed.add_field(name="Server", value=guild.name, inline=True)
-        embed.add_field(name="Original Ban Reason", value=ban_entry.reason or "No reason provided", inline=False)
+        embed.add_field(name="Original Ban Reason", value=ban_reason or "No reason provided", inline=False)
         embed.add_field(name="Appeal Reason", value=reason, inline=False)
         embed.set_thumbnail(url=interaction.user.display_avatar.url)
 
@@ -114,7 +157,7 @@ class BanAppeal(commands.Cog):
                     break
 
         if appeals_channel:
-            view = AppealView(self, guild_id_str, user_id)
+            view = AppealView(guild_id_str, user_id)
             try:
                 await appeals_channel.send(embed=embed, view=view)
             except discord.Forbidden:
@@ -153,7 +196,8 @@ class BanAppeal(commands.Cog):
                 status_emoji = {
                     'pending': '⏳',
                     'approved': '✅',
-                    'denied': '❌'
+                    'denied': '❌',
+                    'closed': '🔓'
                 }.get(appeal['status'], '❓')
 
                 user_appeals.append(f"{status_emoji} **{guild_name}**: {appeal['status'].title()}")
@@ -168,33 +212,72 @@ class BanAppeal(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
-class AppealView(discord.ui.View):
-    def __init__(self, cog, guild_id: str, user_id: str):
-        super().__init__(timeout=None)  # Persistent view
-        self.cog = cog
-        self.guild_id = guild_id
-        self.user_id = user_id
+    def get_pending_appeal(self, guild_id: str, user_id: str):
+        """Return the appeal if it exists and has not been handled yet"""
+        appeal = self.appeals.get(guild_id, {}).get(user_id)
+        if appeal and appeal['status'] == 'pending':
+            return appeal
+        return None
+
+    async def resolve_moderator(self, interaction: discord.Interaction, guild_id: str):
+        """Return the appeal's guild and the clicking user as a member of it"""
+        guild = self.bot.get_guild(int(guild_id))
+        if not guild:
+            return None, None
+        # Buttons may be clicked in the guild or in the owner's DMs
+        if interaction.guild == guild:
+            return guild, interaction.user
+        member = guild.get_member(interaction.user.id)
+        if member is None:
+            # Not cached when MEMBER_CACHE_MODE=lean
+            try:
+                member = await guild.fetch_member(interaction.user.id)
+            except discord.HTTPException:
+                member = None
+        return guild, member
 
-    @discord.ui.button(label="Approve", style=discord.ButtonStyle.success, emoji="✅")
-    async def approve_appeal(self, interaction: discord.Interaction, button: discord.ui.Button):
+    async def approve_appeal(self, interaction: discord.Interaction, guild_id: str, user_id: str):
         """Approve the ban appeal"""
-        if not interaction.user.guild_permissions.ban_members:
+        guild, moderator = await self.resolve_moderator(interaction, guild_id)
+        if not guild:
+            return await interaction.response.send_message("❌ I am no longer in that server.", ephemeral=True)
+        if not moderator or not moderator.guild_permissions.ban_members:
             return await interaction.response.send_message("❌ You need ban permissions to handle appeals.", ephemeral=True)
 
+        appeal = self.get_pending_appeal(guild_id, user_id)
+        if not appeal:
+            return await interaction.response.send_message("❌ This appeal has already been handled.", ephemeral=True)
+
+        # The ban may have been lifted since the appeal came in; close it instead of approving it
+        try:
+            await self.rest.call(MODERATION, bans_route(guild.id), lambda: guild.fetch_ban(discord.Object(id=int(user_id))))
+        except discord.NotFound:
+            appeal['status'] = 'closed'
+            appeal['handled_by'] = str(interaction.user)
+            appeal['handled_at'] = datetime.now(timezone.utc).isoformat()
+            self.save_appeal(guild_id, user_id)
+            embed = discord.Embed(
+                title="🔓 Ban Appeal Closed",
+                description="The user is no longer banned, so there was nothing to approve.",
+                color=discord.Color.light_grey()
+            )
+            return await interaction.response.edit_message(embed=embed, view=None)
+        except discord.Forbidden:
+            return await interaction.response.send_message("❌ I don't have permission to check bans.", ephemeral=True)
+
         # Update appeal status
-        if self.guild_id in self.cog.appeals and self.user_id in self.cog.appeals[self.guild_id]:
-            self.cog.appeals[self.guild_id][self.user_id]['status'] = 'approved'
-            self.cog.appeals[self.guild_id][self.user_id]['handled_by'] = str(interaction.user)
-            self.cog.appeals[self.guild_id][self.user_id]['handled_at'] = datetime.now(timezone.utc).isoformat()
-            self.cog.save_appeals()
+        appeal['status'] = 'approved'
+        appeal['handled_by'] = str(interaction.user)
+        appeal['handled_at'] = datetime.now(timezone.utc).isoformat()
+        self.save_appeal(guild_id, user_id)
 
         # Try to unban user
-        guild = interaction.guild
-        user = await self.cog.bot.fetch_user(int(self.user_id))
-        
+        user = await self.users.fetch(int(user_id), MODERATION)
+        target = user or discord.Object(id=int(user_id))
+
         try:
-            await guild.unban(user, reason=f"Ban appeal approved by {interaction.user}")
-            
+            await self.rest.call(MODERATION, bans_route(guild.id), lambda: guild.unban(target, reason=f"Ban appeal approved by {interaction.user}"))
+
             # Notify user via DM
             try:
                 embed = discord.Embed(
@@ -203,7 +286,8 @@ class AppealView(discord.ui.View):
                                f"You can now rejoin the server.",
                     color=discord.Color.green()
                 )
-                await user.send(embed=embed)
+                if user:
+                    await user.send(embed=embed)
             except discord.Forbidden:
                 pass  # User has DMs disabled
 
@@ -222,16 +306,65 @@ class AppealView(discord.ui.View):
         except Exception as e:
             await interaction.response.send_message(f"❌ Error unbanning user: {e}", ephemeral=True)
 
-    @discord.ui.button(label="Deny", style=discord.ButtonStyle.danger, emoji="❌")
-    async def deny_appeal(self, interaction: discord.Interaction, button: discord.ui.Button):
+    async def deny_appeal(self, interaction: discord.Interaction, guild_id: str, user_id: str):
         """Deny the ban appeal"""
-        if not interaction.user.guild_permissions.ban_members:
+        guild, moderator = await self.resolve_moderator(interaction, guild_id)
+        if not guild:
+            return await interaction.response.send_message("❌ I am no longer in that server.", ephemeral=True)
+        if not moderator or not moderator.guild_permissions.ban_members:
             return await interaction.response.send_message("❌ You need ban permissions to handle appeals.", ephemeral=True)
 
+        if not self.get_pending_appeal(guild_id, user_id):
+            return await interaction.response.send_message("❌ This appeal has already been handled.", ephemeral=True)
+
         # Show modal for denial reason
-        modal = DenialReasonModal(self.cog, self.guild_id, self.user_id, interaction.user)
+        modal = DenialReasonModal(self, guild_id, user_id, interaction.user)
         await interaction.response.send_modal(modal)
 
+class AppealButton(discord.ui.DynamicItem[discord.ui.Button], template=r'ban_appeal:(?P<action>approve|deny):(?P<guild_id>[0-9]+):(?P<user_id>[0-9]+)'):
+    """Approve/Deny button whose custom_id encodes the guild and user of the appeal.
+
+    Registered once through AppealView, so a single pattern serves every
+    appeal message, including the ones sent before a restart.
+    """
+
+    def __init__(self, action: str, guild_id: str, user_id: str):
+        if action == 'approve':
+            button = discord.ui.Button(label="Approve", style=discord.ButtonStyle.success, emoji="✅")
+        else:
+            button = discord.ui.Button(label="Deny", style=discord.ButtonStyle.danger, emoji="❌")
+        button.custom_id = f"ban_appeal:{action}:{guild_id}:{user_id}"
+        super().__init__(button)
+        self.action = action
+        self.guild_id = guild_id
+        self.user_id = user_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['action'], match['guild_id'], match['user_id'])
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("BanAppeal")
+        if cog is None:
+            return await interaction.response.send_message("❌ Ban appeals are currently unavailable.", ephemeral=True)
+
+        if self.action == 'approve':
+            await cog.approve_appeal(interaction, self.guild_id, self.user_id)
+        else:
+            await cog.deny_appeal(interaction, self.guild_id, self.user_id)
+
+class AppealView(discord.ui.View):
+    """Persistent view holding the appeal buttons.
+
+    Without arguments it is the template registered with ``bot.add_view`` on
+    startup; with a guild and user it builds the buttons for a new appeal message.
+    """
+
+    def __init__(self, guild_id: str = "0", user_id: str = "0"):
+        super().__init__(timeout=None)  # Persistent view
+        self.add_item(AppealButton('approve', guild_id, user_id))
+        self.add_item(AppealButton('deny', guild_id, user_id))
+
 class DenialReasonModal(discord.ui.Modal, title="Denial Reason"):
     def __init__(self, cog, guild_id: str, user_id: str, moderator):
         super().__init__()
@@ -249,24 +382,28 @@ class DenialReasonModal(discord.ui.Modal, title="Denial Reason"):
     )
 
     async def on_submit(self, interaction: discord.Interaction):
+        guild_name = interaction.guild.name if interaction.guild else "the server"
+
         # Update appeal status
         if self.guild_id in self.cog.appeals and self.user_id in self.cog.appeals[self.guild_id]:
+            guild_name = self.cog.appeals[self.guild_id][self.user_id]['guild_name']
             self.cog.appeals[self.guild_id][self.user_id]['status'] = 'denied'
             self.cog.appeals[self.guild_id][self.user_id]['denial_reason'] = self.reason.value
             self.cog.appeals[self.guild_id][self.user_id]['handled_by'] = str(self.moderator)
             self.cog.appeals[self.guild_id][self.user_id]['handled_at'] = datetime.now(timezone.utc).isoformat()
-            self.cog.save_appeals()
+            self.cog.save_appeal(self.guild_id, self.user_id)
 
         # Notify user via DM
-        user = await self.cog.bot.fetch_user(int(self.user_id))
+        user = await self.cog.users.fetch(int(self.user_id))
         try:
             embed = discord.Embed(
                 title="❌ Ban Appeal Denied",
-                description=f"Your ban appeal for **{interaction.guild.name}** has been denied.\n\n"
+                description=f"Your ban appeal for **{guild_name}** has been denied.\n\n"
                            f"**Reason:** {self.reason.value}",
                 color=discord.Color.red()
             )
-            await user.send(embed=embed)
+            if user:
+                await user.send(embed=embed)
         except discord.Forbidden:
             pass  # User has DMs disabled
 
@@ -2,11 +2,89 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime, timezone
+from utils.ipc import get_cluster
+from utils.rest import INTERACTIVE, bans_route, get_rest
 import asyncio
+import contextlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCAN_TIMEOUT = 300      # Seconds each cluster gets to check all of its servers
+PROGRESS_INTERVAL = 5   # Seconds between progress updates while scanning
 
 class BanList(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.cluster = get_cluster(bot)
+        self.rest = get_rest(bot)
+        self.scans = {}  # {user_id: [servers checked so far, servers to check]} for scans running here
+        self.cluster.register('ban_scan', self.scan_bans)
+        self.cluster.register('ban_scan_progress', self.scan_progress)
+
+    async def scan_bans(self, user_id: int):
+        """Checks every server in this process for a ban. Gathered from all clusters over IPC."""
+        user = discord.Object(id=user_id)
+        bans = []
+        checked = 0
+        guilds = list(self.bot.guilds)
+        progress = self.scans[user_id] = [0, len(guilds)]
+
+        # Check each server for bans
+        for guild in guilds:
+            progress[0] += 1
+            try:
+                # Try to fetch the ban entry for this user
+                ban_entry = await self.rest.call(INTERACTIVE, bans_route(guild.id), lambda: guild.fetch_ban(user))
+                
+                # If we get here, the user is banned
+                bans.append({
+                    'guild_id': guild.id,
+                    'guild_name': guild.name,
+                    'member_count': guild.member_count or 0,
+                    'reason': ban_entry.reason or "No reason provided"
+                })
+                checked += 1
+                
+            except discord.NotFound:
+                # User is not banned in this server
+                checked += 1
+            except discord.Forbidden:
+                # Bot doesn't have permission to check bans in this server
+                continue
+            except Exception as e:
+                # Other errors (server unavailable, etc.)
+                logger.error(f"Error checking ban status in {guild.name}: {e}")
+                continue
+
+        if self.scans.get(user_id) is progress:
+            del self.scans[user_id]
+        return {'bans': bans, 'checked': checked, 'total': len(guilds)}
+
+    async def scan_progress(self, user_id: int):
+        """Servers this process has gone through so far in a running scan for this user."""
+        return self.scans.get(user_id, [0, 0])
+
+    async def report_progress(self, interaction: discord.Interaction, embed: discord.Embed):
+        """Updates the progress embed until cancelled, adding up every cluster's progress."""
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            try:
+                replies = await self.cluster.gather('ban_scan_progress', timeout=PROGRESS_INTERVAL, user_id=interaction.user.id)
+            except (asyncio.TimeoutError, ConnectionError):
+                continue
+            done = total = 0
+            for reply in replies:
+                if 'result' in reply:
+                    done += reply['result'][0]
+                    total += reply['result'][1]
+            if not total:
+                continue
+            embed.description = f"Scanning... {done}/{total} servers checked"
+            try:
+                await interaction.edit_original_response(embed=embed)
+            except discord.HTTPException:
+                pass
 
     @app_commands.command(name="ban_list", description="Lists servers where you are banned (DM only)")
     async def ban_list(self, interaction: discord.Interaction):
@@ -22,56 +100,56 @@ class BanList(commands.Cog):
         await interaction.response.defer()
 
         user = interaction.user
-        banned_servers = []
-        accessible_servers = 0
-        total_servers = len(self.bot.guilds)
 
         # Create initial embed showing progress
         progress_embed = discord.Embed(
             title="🔍 Checking Ban Status...",
-            description=f"Scanning {total_servers} servers...",
+            description="Scanning all servers...",
             color=discord.Color.blue()
         )
         await interaction.followup.send(embed=progress_embed)
 
-        # Check each server for bans
-        for i, guild in enumerate(self.bot.guilds, 1):
-            try:
-                # Try to fetch the ban entry for this user
-                ban_entry = await guild.fetch_ban(user)
-                
-                # If we get here, the user is banned
-                ban_info = {
-                    'guild': guild,
-                    'reason': ban_entry.reason or "No reason provided",
-                    'ban_entry': ban_entry
-                }
-                banned_servers.append(ban_info)
-                accessible_servers += 1
-                
-            except discord.NotFound:
-                # User is not banned in this server
-                accessible_servers += 1
-                continue
-            except discord.Forbidden:
-                # Bot doesn't have permission to check bans in this server
-                continue
-            except Exception as e:
-                # Other errors (server unavailable, etc.)
-                print(f"Error checking ban status in {guild.name}: {e}")
-                continue
+        # Every cluster scans its own servers
+        progress = asyncio.create_task(self.report_progress(interaction, progress_embed))
+        try:
+            replies = await self.cluster.gather('ban_scan', timeout=SCAN_TIMEOUT, user_id=user.id)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            replies = [{'cluster': "hub", 'error': type(e).__name__}]
+        finally:
+            progress.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await progress
 
-            # Update progress every 10 servers
-            if i % 10 == 0:
-                try:
-                    progress_embed.description = f"Scanning... {i}/{total_servers} servers checked"
-                    await interaction.edit_original_response(embed=progress_embed)
-                    await asyncio.sleep(0.1)  # Small delay to avoid rate limits
-                except:
-                    pass
+        banned_servers = []
+        failed_clusters = []
+        accessible_servers = 0
+        total_servers = 0
+        for reply in replies:
+            if 'result' not in reply:
+                logger.error(f"Ban scan failed on cluster {reply['cluster']}: {reply.get('error')}")
+                failed_clusters.append(str(reply['cluster']))
+                continue
+            banned_servers.extend(reply['result']['bans'])
+            accessible_servers += reply['result']['checked']
+            total_servers += reply['result']['total']
 
         # Create results embed
-        if not banned_servers:
+        if not banned_servers and failed_clusters:
+            # Servers on the failed clusters were never checked, so this is not a clean bill
+            embed = discord.Embed(
+                title="⚠️ Ban Status Incomplete",
+                description="No bans found in the servers that could be checked, but some servers could not be "
+                            "reached. Please try again in a few minutes.",
+                color=discord.Color.orange(),
+                timestamp=datetime.now(timezone.utc)
+            )
+            embed.add_field(
+                name="📊 Scan Summary",
+                value=f"**Servers Checked:** {accessible_servers}\n"
+                      f"**Bans Found:** 0",
+                inline=False
+            )
+        elif not banned_servers:
             embed = discord.Embed(
                 title="✅ Ban Status Report",
                 description="🎉 **Great news!** You are not banned from any servers where this bot has access.",
@@ -101,7 +179,6 @@ class BanList(commands.Cog):
             # Add banned servers to embed
             ban_list = []
             for i, ban_info in enumerate(banned_servers[:10], 1):  # Limit to 10 to avoid embed limits
-                guild = ban_info['guild']
                 reason = ban_info['reason']
                 
                 # Truncate long reasons
@@ -109,9 +186,9 @@ class BanList(commands.Cog):
                     reason = reason[:97] + "..."
                 
                 ban_list.append(
-                    f"**{i}. {guild.name}**\n"
+                    f"**{i}. {ban_info['guild_name']}**\n"
                     f"📝 *Reason:* {reason}\n"
-                    f"🆔 *Server ID:* `{guild.id}`"
+                    f"🆔 *Server ID:* `{ban_info['guild_id']}`"
                 )
             
             embed.add_field(
@@ -141,6 +218,14 @@ class BanList(commands.Cog):
                 inline=True
             )
 
+        if failed_clusters:
+            embed.add_field(
+                name="⚠️ Incomplete Scan",
+                value=f"Cluster{'s' if len(failed_clusters) != 1 else ''} {', '.join(failed_clusters)} did not answer, "
+                      f"so their servers are not included above.",
+                inline=False
+            )
+
         embed.set_footer(text=f"Requested by {user.display_name}", icon_url=user.display_avatar.url)
         
         await interaction.edit_original_response(embed=embed)
@@ -177,9 +262,9 @@ class BanList(commands.Cog):
                 )
             
             # Server size analysis
-            small_servers = sum(1 for ban_info in banned_servers if ban_info['guild'].member_count < 100)
-            medium_servers = sum(1 for ban_info in banned_servers if 100 <= ban_info['guild'].member_count < 1000)
-            large_servers = sum(1 for ban_info in banned_servers if ban_info['guild'].member_count >= 1000)
+            small_servers = sum(1 for ban_info in banned_servers if ban_info['member_count'] < 100)
+            medium_servers = sum(1 for ban_info in banned_servers if 100 <= ban_info['member_count'] < 1000)
+            large_servers = sum(1 for ban_info in banned_servers if ban_info['member_count'] >= 1000)
             
             detailed_embed.add_field(
                 name="📊 Server Size Analysis",
@@ -219,7 +304,7 @@ class BanList(commands.Cog):
         await interaction.response.defer()
 
         try:
-            ban_entry = await guild.fetch_ban(interaction.user)
+            ban_entry = await self.rest.call(INTERACTIVE, bans_route(guild.id), lambda: guild.fetch_ban(interaction.user))
             
             # User is banned
             embed = discord.Embed(
@@ -1,26 +1,250 @@
 import discord
 from discord.ext import commands
-from datetime import datetime, timezone
+from discord import app_commands
+from datetime import datetime, timedelta, timezone
 import asyncio
+import os
+import random
+from utils.checks import is_owner
+from utils.audit_log import get_tailer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- Notification Queue Settings ---
+NOTIFY_WORKERS = 4          # Concurrent DM senders
+NOTIFY_QUEUE_SIZE = 1000    # Pending notifications before new ones wait
+NOTIFY_PUT_TIMEOUT = 10     # Seconds an event waits for room before it is dropped
+NOTIFY_BATCH_SIZE = 50      # Events a worker takes off the queue at once
+NOTIFY_DRAIN_TIMEOUT = 15   # Seconds unloading waits for queued notifications to go out
+AUDIT_LOG_DELAY = 2         # Seconds to let Discord write the audit log entries
+
+# --- Unban Invite Settings ---
+# Each unbanned user gets their own single-use invite unless UNBAN_INVITE_SHARED is set,
+# which hands everyone one reusable bot invite per server and saves a call per unban
+UNBAN_INVITE_SHARED = os.getenv("UNBAN_INVITE_SHARED", "").lower() in ("1", "true", "yes")
+INVITE_MAX_AGE = 86400             # Lifetime of a single-use unban invite (24 hours)
+SHARED_INVITE_MAX_AGE = 604800     # Lifetime of the shared unban invite (7 days)
+INVITE_REVALIDATE = 21600          # Seconds before a cached shared invite is checked again
 
 class BanNotifications(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.audit_log = get_tailer(bot)
+        # Items are (kind, guild, user, received_at); pending holds their keys for deduplication
+        self.queue = asyncio.Queue(maxsize=NOTIFY_QUEUE_SIZE)
+        self.pending = set()
+        self.workers = []
+        # {guild_id: {'code', 'url', 'channel_id', 'expires_at', 'checked_at'}}
+        self.invites = {}
+        self.stats = {
+            'queued': 0,
+            'duplicates': 0,
+            'dropped': 0,
+            'sent': 0,
+            'failed': 0
+        }
+
+    async def cog_load(self):
+        self.workers = [
+            asyncio.create_task(self.notification_worker(), name=f"ban-notify-worker-{i}")
+            for i in range(NOTIFY_WORKERS)
+        ]
+
+    async def cog_unload(self):
+        # Send what is already queued before the workers stop, so reloads and shutdowns don't lose it
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=NOTIFY_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Stopping with {self.queue.qsize()} ban notifications still queued")
+        for worker in self.workers:
+            worker.cancel()
+
+    # --- Queue Management ---
+
+    async def enqueue(self, kind, guild, user):
+        """Queue a notification, collapsing duplicates and waiting while the queue is full"""
+        key = (kind, guild.id, user.id)
+        if key in self.pending:
+            self.stats['duplicates'] += 1
+            return
+
+        self.pending.add(key)
+        try:
+            item = (kind, guild, user, datetime.now(timezone.utc))
+            await asyncio.wait_for(self.queue.put(item), timeout=NOTIFY_PUT_TIMEOUT)
+            self.stats['queued'] += 1
+        except asyncio.TimeoutError:
+            self.pending.discard(key)
+            self.stats['dropped'] += 1
+            logger.error(f"❌ Dropped {kind} notification for {user} ({user.id}) - queue is full")
+
+    def take_batch(self, first):
+        """Collect the first item plus whatever else is already waiting, up to the batch size"""
+        batch = [first]
+        while len(batch) < NOTIFY_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def notification_worker(self):
+        """Drain the queue in batches so one audit log read serves many events"""
+        while True:
+            batch = self.take_batch(await self.queue.get())
+            try:
+                await self.process_batch(batch)
+            except Exception as e:
+                logger.error(f"❌ Error processing ban notifications: {e}")
+            finally:
+                for kind, guild, user, _ in batch:
+                    self.pending.discard((kind, guild.id, user.id))
+                    self.queue.task_done()
+
+    async def process_batch(self, batch):
+        # Small delay to ensure the audit log entries are created
+        await asyncio.sleep(AUDIT_LOG_DELAY)
+
+        for kind, guild, user, received_at in batch:
+            # The first lookup per guild reads the audit log, the rest hit the cache
+            entry = await self.audit_log.lookup(guild, user.id, kind, since=received_at)
+            reason = entry['reason'] if entry else None
+            moderator = entry['moderator'] if entry else None
+            if kind == 'ban':
+                await self.send_ban_notification(guild, user, reason or "No reason provided", moderator)
+            else:
+                await self.send_unban_notification(guild, user, moderator)
+
+    @app_commands.command(name="ban_notify_stats", description="Shows ban notification queue statistics (owner only).")
+    @is_owner()
+    async def ban_notify_stats(self, interaction: discord.Interaction):
+        attempted = self.stats['sent'] + self.stats['failed']
+        failure_rate = (self.stats['failed'] / attempted) * 100 if attempted else 0
+
+        embed = discord.Embed(title="📬 Ban Notification Queue", color=discord.Color.blue())
+        embed.add_field(
+            name="Queue",
+            value=f"**Depth:** {self.queue.qsize()}/{NOTIFY_QUEUE_SIZE}\n"
+                  f"**Workers:** {NOTIFY_WORKERS}\n"
+                  f"**Queued:** {self.stats['queued']}",
+            inline=True
+        )
+        embed.add_field(
+            name="Collapsed",
+            value=f"**Duplicates:** {self.stats['duplicates']}\n"
+                  f"**Dropped:** {self.stats['dropped']}",
+            inline=True
+        )
+        embed.add_field(
+            name="Delivery",
+            value=f"**Sent:** {self.stats['sent']}\n"
+                  f"**Failed:** {self.stats['failed']}\n"
+                  f"**Failure rate:** {failure_rate:.1f}%",
+            inline=True
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # --- Listeners ---
 
     @commands.Cog.listener()
     async def on_member_ban(self, guild, user):
         """Triggered when a member is banned from a server"""
-        
-        # Small delay to ensure ban entry is created
-        await asyncio.sleep(2)
-        
+        await self.enqueue('ban', guild, user)
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild, user):
+        """Triggered when a member is unbanned from a server"""
+        await self.enqueue('unban', guild, user)
+
+    # --- Unban Invites ---
+
+    async def get_invite_url(self, guild):
+        """Return an invite for an unbanned user: single-use, or the shared one when UNBAN_INVITE_SHARED is set"""
+        if guild.vanity_url_code:
+            return f"discord.gg/{guild.vanity_url_code}"
+        if not UNBAN_INVITE_SHARED:
+            return await self.create_single_use_invite(guild)
+
+        now = datetime.now(timezone.utc)
+        cached = self.invites.get(guild.id)
+        if cached and (cached['expires_at'] - now).total_seconds() > INVITE_REVALIDATE:
+            if (now - cached['checked_at']).total_seconds() < INVITE_REVALIDATE:
+                return cached['url']
+            # Lazily confirm the invite was not deleted while we were not looking
+            try:
+                await self.bot.fetch_invite(cached['code'], with_counts=False)
+                cached['checked_at'] = now
+                return cached['url']
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                return cached['url']
+
+        channel = self.get_invite_channel(guild, cached['channel_id'] if cached else None)
+        if not channel:
+            self.invites.pop(guild.id, None)
+            return None
+
         try:
-            # Fetch the ban entry to get the reason
-            ban_entry = await guild.fetch_ban(user)
-            ban_reason = ban_entry.reason or "No reason provided"
-        except:
-            ban_reason = "No reason provided"
-        
+            # unique=False hands back the bot's existing invite with the same settings
+            invite = await channel.create_invite(
+                max_age=SHARED_INVITE_MAX_AGE,
+                max_uses=0,
+                unique=False,
+                reason="Unban notification invite"
+            )
+        except discord.HTTPException:
+            self.invites.pop(guild.id, None)
+            return None
+
+        created_at = invite.created_at or now
+        self.invites[guild.id] = {
+            'code': invite.code,
+            'url': invite.url,
+            'channel_id': channel.id,
+            'expires_at': invite.expires_at or created_at + timedelta(seconds=SHARED_INVITE_MAX_AGE),
+            'checked_at': now
+        }
+        return invite.url
+
+    async def create_single_use_invite(self, guild):
+        """Create an invite only the unbanned user can use, valid for a day"""
+        channel = self.get_invite_channel(guild)
+        if not channel:
+            return None
+        try:
+            invite = await channel.create_invite(
+                max_age=INVITE_MAX_AGE,
+                max_uses=1,
+                unique=True,
+                reason="Unban notification invite"
+            )
+        except discord.HTTPException:
+            return None
+        return invite.url
+
+    def get_invite_channel(self, guild, channel_id=None):
+        """Prefer the channel used last time, otherwise the first one we can invite to"""
+        channel = guild.get_channel(channel_id) if channel_id else None
+        if channel and channel.permissions_for(guild.me).create_instant_invite:
+            return channel
+
+        for channel in guild.text_channels:
+            if channel.permissions_for(guild.me).create_instant_invite:
+                return channel
+        return None
+
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite):
+        if invite.guild and self.invites.get(invite.guild.id, {}).get('code') == invite.code:
+            del self.invites[invite.guild.id]
+
+    # --- Notifications ---
+
+    async def send_ban_notification(self, guild, user, ban_reason, moderator=None):
+        """Send the ban DM to a user"""
+
         # Create informative DM embed
         embed = discord.Embed(
             title="🚫 You have been banned",
@@ -42,6 +266,7 @@ class BanNotifications(commands.Cog):
         embed.add_field(
             name="📝 Ban Information",
             value=f"**Reason:** {ban_reason}\n"
+                  f"**Moderator:** {moderator or 'Unknown'}\n"
                   f"**Date:** <t:{int(datetime.now(timezone.utc).timestamp())}:F>",
             inline=True
         )
@@ -81,7 +306,6 @@ class BanNotifications(commands.Cog):
             "🔍 **Tip:** Use `/ban_check` to verify your ban status anytime"
         ]
         
-        import random
         selected_tip = random.choice(tips)
         
         embed.add_field(
@@ -99,16 +323,19 @@ class BanNotifications(commands.Cog):
         # Try to send DM to the banned user
         try:
             await user.send(embed=embed)
-            print(f"✅ Sent ban notification to {user} ({user.id}) for ban from {guild.name}")
+            self.stats['sent'] += 1
+            logger.info(f"✅ Sent ban notification to {user} ({user.id}) for ban from {guild.name}")
         except discord.Forbidden:
-            print(f"❌ Could not send ban notification to {user} ({user.id}) - DMs disabled")
+            self.stats['failed'] += 1
+            logger.error(f"❌ Could not send ban notification to {user} ({user.id}) - DMs disabled")
             
             # Try to log in a staff channel if DM fails
-            await self.try_log_failed_notification(guild, user, ban_reason)
+            await self.try_log_failed_notification(guild, user, ban_reason, moderator)
         except Exception as e:
-            print(f"❌ Error sending ban notification to {user} ({user.id}): {e}")
+            self.stats['failed'] += 1
+            logger.error(f"❌ Error sending ban notification to {user} ({user.id}): {e}")
 
-    async def try_log_failed_notification(self, guild, user, reason):
+    async def try_log_failed_notification(self, guild, user, reason, moderator=None):
         """Try to log failed DM notification in a staff channel"""
         
         # Look for common staff channel names
@@ -134,6 +361,7 @@ class BanNotifications(commands.Cog):
             )
             embed.add_field(name="User", value=f"{user} ({user.id})", inline=True)
             embed.add_field(name="Reason", value=reason, inline=True)
+            embed.add_field(name="Moderator", value=str(moderator or "Unknown"), inline=True)
             embed.add_field(
                 name="Note", 
                 value="The user was not notified of their ban via DM. "
@@ -142,16 +370,15 @@ class BanNotifications(commands.Cog):
             )
             
             await staff_channel.send(embed=embed)
-            print(f"📝 Logged failed ban notification in #{staff_channel.name}")
+            logger.info(f"📝 Logged failed ban notification in #{staff_channel.name}")
             
         except discord.Forbidden:
-            print(f"❌ No permission to log in #{staff_channel.name}")
+            logger.error(f"❌ No permission to log in #{staff_channel.name}")
         except Exception as e:
-            print(f"❌ Error logging failed notification: {e}")
+            logger.error(f"❌ Error logging failed notification: {e}")
 
-    @commands.Cog.listener()
-    async def on_member_unban(self, guild, user):
-        """Triggered when a member is unbanned from a server"""
+    async def send_unban_notification(self, guild, user, moderator=None):
+        """Send the unban DM to a user"""
         
         # Create unban notification embed
         embed = discord.Embed(
@@ -174,6 +401,7 @@ class BanNotifications(commands.Cog):
         embed.add_field(
             name="🎉 Unban Information",
             value=f"**Date:** <t:{int(datetime.now(timezone.utc).timestamp())}:F>\n"
+                  f"**Unbanned by:** {moderator or 'Unknown'}\n"
                   f"**Status:** You can now rejoin the server",
             inline=True
         )
@@ -183,29 +411,7 @@ class BanNotifications(commands.Cog):
             embed.set_thumbnail(url=guild.icon.url)
         
         # Rejoin information
-        if guild.vanity_url_code:
-            invite_text = f"discord.gg/{guild.vanity_url_code}"
-        else:
-            # Try to create an invite
-            try:
-                # Find a suitable channel for invite
-                invite_channel = None
-                for channel in guild.text_channels:
-                    if channel.permissions_for(guild.me).create_instant_invite:
-                        invite_channel = channel
-                        break
-                
-                if invite_channel:
-                    invite = await invite_channel.create_invite(
-                        max_age=86400,  # 24 hours
-                        max_uses=1,
-                        reason="Unban notification invite"
-                    )
-                    invite_text = invite.url
-                else:
-                    invite_text = "Contact server staff for an invite link"
-            except:
-                invite_text = "Contact server staff for an invite link"
+        invite_text = await self.get_invite_url(guild) or "Contact server staff for an invite link"
         
         embed.add_field(
             name="🔗 Ready to return?",
@@ -232,11 +438,14 @@ class BanNotifications(commands.Cog):
         # Try to send DM to the unbanned user
         try:
             await user.send(embed=embed)
-            print(f"✅ Sent unban notification to {user} ({user.id}) for unban from {guild.name}")
+            self.stats['sent'] += 1
+            logger.info(f"✅ Sent unban notification to {user} ({user.id}) for unban from {guild.name}")
         except discord.Forbidden:
-            print(f"❌ Could not send unban notification to {user} ({user.id}) - DMs disabled")
+            self.stats['failed'] += 1
+            logger.error(f"❌ Could not send unban notification to {user} ({user.id}) - DMs disabled")
         except Exception as e:
-            print(f"❌ Error sending unban notification to {user} ({user.id}): {e}")
+            self.stats['failed'] += 1
+            logger.error(f"❌ Error sending unban notification to {user} ({user.id}): {e}")
 
 async def setup(bot):
     await bot.add_cog(BanNotifications(bot))
\ No newline at end of file
@@ -0,0 +1,173 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import io
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal
+from commands.server_growth import DB_FILE
+from utils.database import get_database
+from utils.checks import is_owner
+
+FETCH_CHUNK = 50000  # Rows pulled from SQLite per fetchmany call
+TOP_MOVERS = 5
+EPOCH = date(1970, 1, 1)
+
+_np = None
+
+def numpy():
+    """NumPy is only needed for exports, so it is imported on first use."""
+    global _np
+    if _np is None:
+        import numpy
+        _np = numpy
+    return _np
+
+# --- Column Loading ---
+
+def load_columns(conn: sqlite3.Connection, start_date: str):
+    """Streams member_counts for every guild into NumPy columns, sorted by guild then day."""
+    np = numpy()
+    cursor = conn.execute(
+        "SELECT guild_id, julianday(record_date) - 2440587.5, member_count, joins, leaves "
+        "FROM member_counts WHERE record_date >= ? ORDER BY guild_id, record_date",
+        (start_date,)
+    )
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(FETCH_CHUNK)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.int64))
+
+    if not chunks:
+        table = np.empty((0, 5), dtype=np.int64)
+    else:
+        table = np.concatenate(chunks)
+
+    return {
+        'guild_id': table[:, 0],
+        'day': table[:, 1].astype(np.int32),  # Days since 1970-01-01
+        'member_count': table[:, 2],
+        'joins': table[:, 3].astype(np.int32),
+        'leaves': table[:, 4].astype(np.int32),
+    }
+
+def summarize(columns):
+    """Per-guild growth, growth rate and churn, computed without looping over rows."""
+    np = numpy()
+    guild_ids = columns['guild_id']
+    if len(guild_ids) == 0:
+        return None
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(guild_ids)) + 1))
+    ends = np.concatenate((starts[1:], [len(guild_ids)])) - 1
+
+    first = columns['member_count'][starts]
+    last = columns['member_count'][ends]
+    growth = last - first
+    baseline = np.maximum(first, 1)
+
+    return {
+        'guild_id': guild_ids[starts],
+        'first': first,
+        'last': last,
+        'growth': growth,
+        'growth_rate': growth / baseline,
+        'joins': np.add.reduceat(columns['joins'], starts),
+        'leaves': np.add.reduceat(columns['leaves'], starts),
+        'churn': np.add.reduceat(columns['leaves'], starts) / baseline,
+        'days': columns['day'][ends] - columns['day'][starts],
+    }
+
+# --- Export Formats ---
+
+def export_columns(columns):
+    """Packs the columns as Parquet, Arrow IPC or .npz, whichever is available."""
+    np = numpy()
+    buffer = io.BytesIO()
+    try:
+        import pyarrow as pa
+    except ImportError:
+        np.savez_compressed(buffer, **columns)
+        return buffer.getvalue(), "npz"
+
+    table = pa.table(columns)
+    try:
+        import pyarrow.parquet as pq
+        pq.write_table(table, buffer, compression='zstd')
+        return buffer.getvalue(), "parquet"
+    except ImportError:
+        with pa.ipc.new_file(buffer, table.schema) as writer:
+            writer.write_table(table)
+        return buffer.getvalue(), "arrow"
+
+def build_export(conn: sqlite3.Connection, start_date: str):
+    """Loads, summarizes and packs the export. Runs on a database reader thread."""
+    columns = load_columns(conn, start_date)
+    summary = summarize(columns)
+    data, extension = export_columns(columns)
+    return len(columns['guild_id']), summary, data, extension
+
+# --- Cog ---
+
+class GrowthAnalytics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = get_database(bot, DB_FILE)
+
+    def format_movers(self, summary, order):
+        lines = []
+        for i in order:
+            guild = self.bot.get_guild(int(summary['guild_id'][i]))
+            name = guild.name if guild else f"Unknown ({summary['guild_id'][i]})"
+            lines.append(
+                f"**{name}**: {summary['growth'][i]:+,} ({summary['growth_rate'][i] * 100:+.1f}%), "
+                f"churn {summary['churn'][i] * 100:.1f}%"
+            )
+        return "\n".join(lines) or "None"
+
+    @app_commands.command(name="growth_export", description="Exports member growth for all servers (owner only).")
+    @app_commands.describe(period="How far back to export.")
+    @is_owner()
+    async def growth_export(
+        self,
+        interaction: discord.Interaction,
+        period: Literal['30 days', '90 days', '1 year', 'All-time'] = '90 days'
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        days = {'30 days': 30, '90 days': 90, '1 year': 365}.get(period)
+        start_date = str(datetime.utcnow().date() - timedelta(days=days)) if days else str(EPOCH)
+
+        try:
+            row_count, summary, data, extension = await self.db.read(build_export, start_date)
+        except Exception as e:
+            await interaction.followup.send(f"❌ Failed to build the export: {e}", ephemeral=True)
+            return
+
+        if summary is None:
+            await interaction.followup.send("❌ No member counts recorded for that period.", ephemeral=True)
+            return
+
+        np = numpy()
+        order = np.argsort(summary['growth'])
+        embed = discord.Embed(
+            title="📈 Cross-Server Growth Export",
+            description=f"**Period:** {period}\n"
+                        f"**Servers:** {len(summary['guild_id']):,}\n"
+                        f"**Rows:** {row_count:,}\n"
+                        f"**Net growth:** {int(summary['growth'].sum()):+,}\n"
+                        f"**Median growth rate:** {np.median(summary['growth_rate']) * 100:+.2f}%",
+            color=discord.Color.blue(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(name="🚀 Top Gainers", value=self.format_movers(summary, order[::-1][:TOP_MOVERS]), inline=False)
+        embed.add_field(name="📉 Top Losers", value=self.format_movers(summary, order[:TOP_MOVERS]), inline=False)
+        embed.set_footer(text=f"Columns: guild_id, day, member_count, joins, leaves • Format: {extension}")
+
+        file = discord.File(io.BytesIO(data), filename=f"member_counts.{extension}")
+        await interaction.followup.send(embed=embed, file=file, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(GrowthAnalytics(bot))
@@ -2,10 +2,12 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from utils.rest import MODERATION, get_rest, members_route
 
 class Kick(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.rest = get_rest(bot)
 
     @app_commands.command(name="kick", description="Kicks a user from the server.")
     @app_commands.describe(
@@ -24,7 +26,7 @@ class Kick(commands.Cog):
             return await interaction.response.send_message("I cannot kick a member with an equal or higher role than me.", ephemeral=True)
 
         try:
-            await member.kick(reason=reason)
+            await self.rest.call(MODERATION, members_route(member.guild.id), lambda: member.kick(reason=reason))
             await interaction.response.send_message(f"👢 {member.mention} has been kicked. Reason: {reason}")
         except discord.Forbidden:
             await interaction.response.send_message("I don't have permission to kick this user.", ephemeral=True)
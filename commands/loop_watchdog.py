@@ -0,0 +1,45 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from datetime import datetime, timezone
+from utils.checks import is_owner
+from utils.watchdog import get_watchdog
+
+class LoopWatchdog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.watchdog = get_watchdog(bot)
+
+    @app_commands.command(name="loop_report", description="Shows what blocked the event loop (owner only).")
+    @app_commands.describe(reset="Clear the collected samples after showing them.")
+    @is_owner()
+    async def loop_report(self, interaction: discord.Interaction, reset: bool = False):
+        if self.watchdog.threshold <= 0:
+            return await interaction.response.send_message("❌ The loop watchdog is disabled (LOOP_WATCHDOG_MS=0).", ephemeral=True)
+
+        report = self.watchdog.report()
+        lines = []
+        for i, offender in enumerate(report['offenders'], 1):
+            location = f" `{offender['location']}`" if offender['location'] else ""
+            lines.append(
+                f"**{i}. {offender['cog']}.{offender['function']}**{location} • ~{offender['blocked'] * 1000:,.0f}ms\n"
+                f"↳ in `{offender['innermost']}`"
+            )
+
+        embed = discord.Embed(
+            title="🐢 Event Loop Stalls",
+            description="\n".join(lines) or "No stalls recorded. 🎉",
+            color=discord.Color.orange() if lines else discord.Color.green(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(name="Stalls", value=f"{report['stalls']:,}", inline=True)
+        embed.add_field(name="Longest", value=f"{report['longest'] * 1000:,.0f}ms", inline=True)
+        embed.add_field(name="Threshold", value=f"{self.watchdog.threshold * 1000:.0f}ms", inline=True)
+        embed.set_footer(text=f"Since {datetime.fromtimestamp(report['since'], timezone.utc):%Y-%m-%d %H:%M} UTC")
+
+        if reset:
+            self.watchdog.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(LoopWatchdog(bot))
@@ -2,15 +2,15 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import yt_dlp
 import asyncio
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 from collections import deque
+import importlib
 import os
-import traceback
 import time
 import concurrent.futures
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 # --- Helper Functions ---
@@ -26,6 +26,14 @@ async def run_blocking_io(func, *args, **kwargs):
     loop = asyncio.get_event_loop()
     return await loop.run_in_executor(_executor, func, *args, **kwargs)
 
+async def import_lazily(name):
+    """Imports a heavy module (yt_dlp, spotipy) on first use, off the event loop.
+
+    Always goes through import_module: a module found in sys.modules may still be
+    initialising on another worker thread, and the import lock waits for it.
+    """
+    return await run_blocking_io(importlib.import_module, name)
+
 # --- Music Cog ---
 
 class Music(commands.Cog):
@@ -33,7 +41,8 @@ class Music(commands.Cog):
         self.bot = bot
         self.song_queues = {}  # {guild_id: deque}
         self.current_songs = {}  # {guild_id: song_info}
-        self.spotify = self.setup_spotify()
+        self.spotify_credentials = self.setup_spotify()
+        self.spotify = None  # Created on the first Spotify link
         # Cache for search results: {query: {'data': song_info, 'timestamp': float}}
         self.search_cache = {}
         self.CACHE_TTL = 3600  # 1 hour in seconds
@@ -50,12 +59,20 @@ class Music(commands.Cog):
         client_id = os.getenv("SPOTIFY_CLIENT_ID")
         client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
         if client_id and client_secret:
-            return spotipy.Spotify(
-                auth_manager=SpotifyClientCredentials(client_id=client_id, client_secret=client_secret)
-            )
-        print("Warning: Spotify API credentials not found. Spotify links will not work.")
+            return client_id, client_secret
+        logger.warning("Spotify API credentials not found. Spotify links will not work.")
         return None
 
+    async def get_spotify(self):
+        if self.spotify is None and self.spotify_credentials:
+            spotipy = await import_lazily('spotipy')
+            oauth2 = await import_lazily('spotipy.oauth2')
+            client_id, client_secret = self.spotify_credentials
+            self.spotify = spotipy.Spotify(
+                auth_manager=oauth2.SpotifyClientCredentials(client_id=client_id, client_secret=client_secret)
+            )
+        return self.spotify
+
     # --- Queue Management ---
 
     def get_queue(self, guild_id):
@@ -71,45 +88,45 @@ class Music(commands.Cog):
             self.current_songs.pop(guild_id, None)
             # Update last activity timestamp
             self.last_activity[guild_id] = time.time()
-            print(f"Queue empty for guild {guild_id}, waiting for more songs...")
+            logger.info(f"Queue empty for guild {guild_id}, waiting for more songs...")
             return
 
         # Check if voice client is still valid
         if not interaction.guild.voice_client or not interaction.guild.voice_client.is_connected():
-            print(f"Voice client disconnected for guild {guild_id}")
+            logger.info(f"Voice client disconnected for guild {guild_id}")
             self.current_songs.pop(guild_id, None)
             queue.clear()
             return
 
         song_info = queue.popleft()
         self.current_songs[guild_id] = song_info
-        print(f"Attempting to play: {song_info['title']} - URL: {song_info['url'][:50]}...")
+        logger.info(f"Attempting to play: {song_info['title']} - URL: {song_info['url'][:50]}...")
 
         ffmpeg_options = {
             'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
             'options': '-vn'
         }
         try:
-            print(f"Creating FFmpeg audio source with options: {ffmpeg_options}")
+            logger.debug(f"Creating FFmpeg audio source with options: {ffmpeg_options}")
             source = discord.FFmpegOpusAudio(song_info['url'], **ffmpeg_options)
-            print(f"✅ Audio source created successfully for {song_info['title']}")
+            logger.info(f"✅ Audio source created successfully for {song_info['title']}")
         except Exception as e:
-            print(f"❌ Error creating audio source for {song_info['title']}: {e}")
-            print(f"URL that failed: {song_info['url']}")
+            logger.error(f"❌ Error creating audio source for {song_info['title']}: {e}")
+            logger.error(f"URL that failed: {song_info['url']}")
             # Try next song if current one fails
             await self.play_next_song(interaction)
             return
         
         def after_playing(error):
             if error:
-                print(f'Player error: {error}')
+                logger.error(f'Player error: {error}')
                 # Try to play next song even on error
                 try:
                     coro = self.play_next_song(interaction)
                     future = asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
                     future.result(timeout=30)
                 except Exception as e:
-                    print(f"Error in after_playing callback with error: {e}")
+                    logger.error(f"Error in after_playing callback with error: {e}")
                 return
             
             # Normal completion - play next song
@@ -118,11 +135,11 @@ class Music(commands.Cog):
                 future = asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
                 future.result(timeout=30)
             except Exception as e:
-                print(f"Error in after_playing callback: {e}")
+                logger.error(f"Error in after_playing callback: {e}")
         
-        print(f"Starting playback for {song_info['title']}...")
+        logger.info(f"Starting playback for {song_info['title']}...")
         interaction.guild.voice_client.play(source, after=after_playing)
-        print(f"Playback started for {song_info['title']}")
+        logger.info(f"Playback started for {song_info['title']}")
 
     # --- Music Search and Extraction ---
 
@@ -134,7 +151,7 @@ class Music(commands.Cog):
         if query in self.search_cache:
             cached_item = self.search_cache[query]
             if (time.time() - cached_item['timestamp']) < self.CACHE_TTL:
-                print(f"Cache hit for query: {query}")
+                logger.debug(f"Cache hit for query: {query}")
                 return cached_item['data']
 
         YDL_OPTS = {
@@ -172,13 +189,14 @@ class Music(commands.Cog):
         # Add cookie file only if it exists
         if os.path.exists('cookies.txt'):
             YDL_OPTS['cookiefile'] = 'cookies.txt'
+        yt_dlp = await import_lazily('yt_dlp')
         try:
-            print(f"Cache miss. Searching online for: {query}")
+            logger.info(f"Cache miss. Searching online for: {query}")
             with yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
                 info = await run_blocking_io(ydl.extract_info, query)
                 
                 if not info:
-                    print(f"No information found for query: {query}")
+                    logger.info(f"No information found for query: {query}")
                     return None
                     
                 if 'entries' in info and info['entries']:
@@ -187,7 +205,7 @@ class Music(commands.Cog):
                     video_info = info
                 
                 if not video_info or not video_info.get('url'):
-                    print(f"No valid URL found for query: {query}")
+                    logger.info(f"No valid URL found for query: {query}")
                     return None
                 
                 song_data = {
@@ -196,36 +214,36 @@ class Music(commands.Cog):
                     'duration': video_info.get('duration', 0),
                     'uploader': video_info.get('uploader', 'Unknown')
                 }
-                print(f"Successfully extracted: {song_data['title']} - URL: {song_data['url'][:50]}...")
+                logger.info(f"Successfully extracted: {song_data['title']} - URL: {song_data['url'][:50]}...")
                 
                 # Store in cache
                 self.search_cache[query] = {'data': song_data, 'timestamp': time.time()}
                 
                 return song_data
         except yt_dlp.DownloadError as e:
-            print(f"YouTube-dlp download error: {e}")
+            logger.error(f"YouTube-dlp download error: {e}")
             return None
         except Exception as e:
-            print(f"Unexpected error with yt-dlp: {e}")
-            traceback.print_exc()
+            logger.exception(f"Unexpected error with yt-dlp: {e}")
             return None
 
     async def get_spotify_tracks(self, url):
-        if not self.spotify:
-            return []
-
         try:
+            spotify = await self.get_spotify()
+            if not spotify:
+                return []
+
             if 'playlist' in url:
-                results = await run_blocking_io(self.spotify.playlist_tracks, url)
+                results = await run_blocking_io(spotify.playlist_tracks, url)
                 return [f"{item['track']['artists'][0]['name']} - {item['track']['name']}" for item in results['items']]
             elif 'album' in url:
-                results = await run_blocking_io(self.spotify.album_tracks, url)
+                results = await run_blocking_io(spotify.album_tracks, url)
                 return [f"{track['artists'][0]['name']} - {track['name']}" for track in results['items']]
             elif 'track' in url:
-                track = await run_blocking_io(self.spotify.track, url)
+                track = await run_blocking_io(spotify.track, url)
                 return [f"{track['artists'][0]['name']} - {track['name']}"]
         except Exception as e:
-            print(f"Error with Spotify API: {e}")
+            logger.error(f"Error with Spotify API: {e}")
         return []
 
     # --- Commands ---
@@ -254,7 +272,7 @@ class Music(commands.Cog):
         queue = self.get_queue(interaction.guild.id)
         
         if is_spotify_url(query):
-            if not self.spotify:
+            if not self.spotify_credentials:
                 return await interaction.followup.send("Spotify integration is not configured.")
             
             tracks = await self.get_spotify_tracks(query)
@@ -1,10 +1,12 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from utils.rest import MODERATION, get_rest, members_route
 
 class Nickname(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.rest = get_rest(bot)
 
     @app_commands.command(name="nickname", description="Changes a user's nickname.")
     @app_commands.describe(
@@ -24,7 +26,7 @@ class Nickname(commands.Cog):
             return await interaction.response.send_message("I cannot change the nickname of a member with an equal or higher role than me.", ephemeral=True)
 
         try:
-            await member.edit(nick=nickname)
+            await self.rest.call(MODERATION, members_route(member.guild.id), lambda: member.edit(nick=nickname))
             await interaction.response.send_message(f"🎭 {member.mention}'s nickname has been changed to **{nickname}**.")
         except discord.Forbidden:
             await interaction.response.send_message("I don't have permission to change this user's nickname.", ephemeral=True)
@@ -1,22 +1,53 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from typing import Optional
 import asyncio
 from datetime import datetime, timedelta, timezone
+from utils.rest import BACKGROUND, INTERACTIVE, get_rest
+from utils.scheduler import get_scheduler
+from utils.users import get_users
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Poll(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         # {message_id: poll_data}
         self.active_polls = {}
-        self.poll_check.start()
-
-    def cog_unload(self):
-        self.poll_check.cancel()
+        self.scheduler = get_scheduler(bot)
+        self.rest = get_rest(bot)
+        self.users = get_users(bot)
+
+    async def cog_load(self):
+        await self.scheduler.start()
+        self.scheduler.register('poll_end', self.poll_due)
+        # Polls live in their scheduler job, so they survive restarts
+        for job in self.scheduler.jobs_of('poll_end'):
+            poll_data = dict(job['data'], end_time=datetime.fromisoformat(job['data']['end_time']))
+            self.active_polls[int(job['ref'])] = poll_data
+
+    def schedule_poll(self, message_id, poll_data):
+        data = dict(poll_data, end_time=poll_data['end_time'].isoformat())
+        self.scheduler.schedule('poll_end', message_id, poll_data['end_time'], data, guild_id=poll_data['guild_id'])
+
+    def forget_poll(self, message_id):
+        self.active_polls.pop(message_id, None)
+        self.scheduler.cancel('poll_end', message_id)
 
     # NEW: Helper function to update the poll embed with live vote counts
     async def update_poll_embed(self, message_id):
+        if message_id not in self.active_polls:
+            return
+        poll_data = self.active_polls[message_id]
+        # Looked up before taking a REST slot, so a refresh never waits on a second slot
+        creator = await self.users.fetch(poll_data['creator_id'], BACKGROUND, self.bot.get_guild(poll_data['guild_id']))
+        # A burst of votes queues one refresh per poll, which reads the latest counts when it runs
+        await self.rest.call(BACKGROUND, f"channel:{poll_data['channel_id']}", lambda: self.refresh_poll_embed(message_id, creator),
+                             coalesce=f"poll:{message_id}")
+
+    async def refresh_poll_embed(self, message_id, creator):
         if message_id not in self.active_polls:
             return
 
@@ -25,8 +56,7 @@ class Poll(commands.Cog):
             channel = self.bot.get_channel(poll_data['channel_id'])
             if not channel:
                 # Maybe the channel was deleted, let's clean up
-                if message_id in self.active_polls:
-                    del self.active_polls[message_id]
+                self.forget_poll(message_id)
                 return
                 
             message = await channel.fetch_message(message_id)
@@ -50,18 +80,19 @@ class Poll(commands.Cog):
             # Update the total votes field
             embed.add_field(name="Total Votes", value=str(total_votes), inline=True)
             
-            creator = await self.bot.fetch_user(poll_data['creator_id'])
-            embed.set_footer(text=f"Poll ends • Created by {creator.display_name}", 
-                            icon_url=creator.display_avatar.url)
+            if creator:
+                embed.set_footer(text=f"Poll ends • Created by {creator.display_name}", 
+                                icon_url=creator.display_avatar.url)
+            else:
+                embed.set_footer(text="Poll ends")
 
             await message.edit(embed=embed)
 
         except discord.NotFound:
             # Message was deleted, remove from active polls
-            if message_id in self.active_polls:
-                del self.active_polls[message_id]
+            self.forget_poll(message_id)
         except Exception as e:
-            print(f"Error updating poll embed for {message_id}: {e}")
+            logger.error(f"Error updating poll embed for {message_id}: {e}")
 
     # NEW: Listener for reaction additions
     @commands.Cog.listener()
@@ -83,33 +114,23 @@ class Poll(commands.Cog):
         if payload.message_id in self.active_polls:
             await self.update_poll_embed(payload.message_id)
 
-    @tasks.loop(minutes=1)
-    async def poll_check(self):
-        current_time = datetime.now(timezone.utc)
-        expired_polls = []
-
-        for message_id, poll_data in list(self.active_polls.items()):
-            if current_time >= poll_data['end_time']:
-                expired_polls.append(message_id)
-
-        for message_id in expired_polls:
-            await self.finalize_poll(message_id)
-
-    @poll_check.before_loop
-    async def before_poll_check(self):
-        await self.bot.wait_until_ready()
+    async def poll_due(self, job: dict):
+        """Scheduler handler: close a poll when its time is up"""
+        await self.finalize_poll(int(job['ref']))
 
     async def finalize_poll(self, message_id):
         if message_id not in self.active_polls:
             return
 
         poll_data = self.active_polls.pop(message_id, None)
+        self.scheduler.cancel('poll_end', message_id)
         if not poll_data:
             return
         
         try:
             channel = self.bot.get_channel(poll_data['channel_id'])
-            message = await channel.fetch_message(message_id)
+            route = f"channel:{channel.id}"
+            message = await self.rest.call(INTERACTIVE, route, lambda: channel.fetch_message(message_id))
             
             results = {}
             total_votes = 0
@@ -141,13 +162,16 @@ class Poll(commands.Cog):
 
             embed.add_field(name="Total Votes", value=str(total_votes), inline=True)
             embed.add_field(name="Duration", value=poll_data['duration_text'], inline=True)
-            creator = await self.bot.fetch_user(poll_data['creator_id'])
-            embed.set_footer(text=f"Poll ended • Originally created by {creator.display_name}", icon_url=creator.display_avatar.url)
+            creator = await self.users.fetch(poll_data['creator_id'], guild=channel.guild)
+            if creator:
+                embed.set_footer(text=f"Poll ended • Originally created by {creator.display_name}", icon_url=creator.display_avatar.url)
+            else:
+                embed.set_footer(text="Poll ended")
 
-            await message.edit(embed=embed, view=None)
+            await self.rest.call(INTERACTIVE, route, lambda: message.edit(embed=embed, view=None))
             
         except Exception as e:
-            print(f"Error finalizing poll {message_id}: {e}")
+            logger.error(f"Error finalizing poll {message_id}: {e}")
 
     @app_commands.command(name="poll", description="Create a poll with multiple options")
     @app_commands.describe(
@@ -226,10 +250,12 @@ class Poll(commands.Cog):
             'question': question,
             'options': option_emojis,
             'channel_id': interaction.channel.id,
+            'guild_id': interaction.guild.id,
             'creator_id': interaction.user.id,
             'end_time': end_time,
             'duration_text': duration_text
         }
+        self.schedule_poll(message.id, self.active_polls[message.id])
 
     @app_commands.command(name="poll_end", description="Manually end a poll early")
     @app_commands.describe(message_id="The message ID of the poll to end")
@@ -0,0 +1,63 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import asyncio
+import io
+from utils.checks import is_owner
+from utils.profiler import SAMPLE_INTERVAL, SamplingProfiler, active_profiler, profile_targets
+
+MAX_WINDOW = 600  # Seconds; the interaction token expires after 15 minutes
+
+class Profile(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def target_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=target, value=target)
+            for target in profile_targets(self.bot) if current.lower() in target.lower()
+        ][:25]
+
+    @app_commands.command(name="profile", description="Samples a command or listener for a while and sends collapsed stacks (owner only).")
+    @app_commands.describe(
+        target="command:<name> or listener:<event>",
+        seconds="How long to profile for."
+    )
+    @app_commands.autocomplete(target=target_autocomplete)
+    @is_owner()
+    async def profile(self, interaction: discord.Interaction, target: str, seconds: app_commands.Range[int, 5, MAX_WINDOW] = 60):
+        if target not in profile_targets(self.bot):
+            return await interaction.response.send_message(f"❌ Unknown target `{target}`.", ephemeral=True)
+        if active_profiler():
+            return await interaction.response.send_message(
+                f"❌ Already profiling `{active_profiler().target}`.", ephemeral=True
+            )
+
+        profiler = SamplingProfiler(self.bot, target)
+        try:
+            profiler.start()
+        except (RuntimeError, ValueError) as e:
+            return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+
+        await interaction.response.send_message(f"⏱️ Profiling `{target}` for {seconds}s...", ephemeral=True)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+
+        if not profiler.samples:
+            return await interaction.followup.send(
+                f"No samples: `{target}` ran {profiler.invocations} time(s) in {seconds}s.", ephemeral=True
+            )
+
+        filename = f"profile-{target.replace(':', '-').replace(' ', '_')}.collapsed"
+        file = discord.File(io.BytesIO(profiler.collapsed().encode()), filename=filename)
+        await interaction.followup.send(
+            f"✅ `{target}`: {profiler.invocations} invocation(s), {profiler.samples:,} samples "
+            f"at {1 / SAMPLE_INTERVAL:.0f} Hz over {profiler.duration:.0f}s.\n"
+            f"Open with speedscope.app or `flamegraph.pl {filename} > profile.svg`.",
+            file=file, ephemeral=True
+        )
+
+async def setup(bot):
+    await bot.add_cog(Profile(bot))
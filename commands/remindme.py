@@ -1,50 +1,85 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
-import json
-import os
+import uuid
 from datetime import datetime, timedelta, timezone
 import re
 from typing import Optional
+from utils.users import get_users
+from utils.scheduler import get_scheduler
+from utils.storage import get_store, import_json_file
+import logging
 
-REMINDERS_FILE = "reminders.json"
+logger = logging.getLogger(__name__)
+
+REMINDERS_FILE = "reminders.json"  # Pre-storage file, imported once
+
+def import_reminders(data: dict) -> dict:
+    """Converts {user_id: [reminder, ...]} from reminders.json into rows keyed by reminder ID"""
+    return {
+        uuid.uuid4().hex: {**reminder, 'user_id': user_id}
+        for user_id, user_reminders in data.items()
+        for reminder in user_reminders
+    }
+
+# Storage schema versions for the reminders table
+MIGRATIONS = (
+    import_json_file(REMINDERS_FILE, import_reminders),
+)
 
 class RemindMe(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.store = get_store(bot)
+        self.scheduler = get_scheduler(bot)
+        self.users = get_users(bot)
+        self.table = None
+        self.reminders = {}  # {user_id: [reminder, ...]}, oldest first
+
+    async def cog_load(self):
+        self.table = await self.store.open_table('reminders', MIGRATIONS)
         self.reminders = self.load_reminders()
-        self.check_reminders.start()
+        await self.scheduler.start()
+        self.scheduler.register('reminder', self.reminder_due)
+        # Reminders stored before the scheduler existed get their job here; existing jobs are left as they are
+        for user_id, user_reminders in self.reminders.items():
+            for reminder in user_reminders:
+                self.schedule_reminder(user_id, reminder)
 
-    def cog_unload(self):
-        self.check_reminders.cancel()
+    async def cog_unload(self):
+        # Commit queued changes before the cog goes away
+        await self.store.flush()
 
     def load_reminders(self):
-        """Load reminders from JSON file"""
-        if os.path.exists(REMINDERS_FILE):
-            with open(REMINDERS_FILE, 'r') as f:
-                data = json.load(f)
-                # Convert ISO strings back to datetime objects
-                for user_id, user_reminders in data.items():
-                    for reminder in user_reminders:
-                        reminder['remind_time'] = datetime.fromisoformat(reminder['remind_time'])
-                        reminder['created_at'] = datetime.fromisoformat(reminder['created_at'])
-                return data
-        return {}
-
-    def save_reminders(self):
-        """Save reminders to JSON file"""
+        """Group stored reminders by user"""
+        reminders = {}
+        for reminder_id, row in self.table.items():
+            reminder = dict(row, id=reminder_id)
+            # Convert ISO strings back to datetime objects
+            reminder['remind_time'] = datetime.fromisoformat(reminder['remind_time'])
+            reminder['created_at'] = datetime.fromisoformat(reminder['created_at'])
+            reminders.setdefault(reminder.pop('user_id'), []).append(reminder)
+        for user_reminders in reminders.values():
+            user_reminders.sort(key=lambda reminder: reminder['created_at'])
+        return reminders
+
+    def save_reminder(self, user_id: str, reminder: dict):
+        """Store one reminder; only this row is written"""
+        row = {key: value for key, value in reminder.items() if key != 'id'}
+        row['user_id'] = user_id
         # Convert datetime objects to ISO strings for JSON serialization
-        serializable_data = {}
-        for user_id, user_reminders in self.reminders.items():
-            serializable_data[user_id] = []
-            for reminder in user_reminders:
-                reminder_copy = reminder.copy()
-                reminder_copy['remind_time'] = reminder['remind_time'].isoformat()
-                reminder_copy['created_at'] = reminder['created_at'].isoformat()
-                serializable_data[user_id].append(reminder_copy)
-        
-        with open(REMINDERS_FILE, 'w') as f:
-            json.dump(serializable_data, f, indent=4)
+        row['remind_time'] = reminder['remind_time'].isoformat()
+        row['created_at'] = reminder['created_at'].isoformat()
+        self.table.put(reminder['id'], row)
+        self.schedule_reminder(user_id, reminder)
+
+    def schedule_reminder(self, user_id: str, reminder: dict):
+        self.scheduler.schedule('reminder', reminder['id'], reminder['remind_time'],
+                                {'user_id': user_id}, guild_id=reminder.get('guild_id'))
+
+    def delete_reminder(self, reminder: dict):
+        self.table.delete(reminder['id'])
+        self.scheduler.cancel('reminder', reminder['id'])
 
     def parse_time(self, time_string: str) -> Optional[timedelta]:
         """Parse time string into timedelta"""
@@ -81,37 +116,29 @@ class RemindMe(commands.Cog):
         
         return None
 
-    @tasks.loop(minutes=1)
-    async def check_reminders(self):
-        """Check for due reminders and send them"""
-        current_time = datetime.now(timezone.utc)
-        due_reminders = []
-
-        for user_id, user_reminders in self.reminders.items():
-            for i, reminder in enumerate(user_reminders):
-                if current_time >= reminder['remind_time']:
-                    due_reminders.append((user_id, i, reminder))
-
-        # Send reminders and remove them
-        for user_id, reminder_index, reminder in reversed(due_reminders):
-            await self.send_reminder(user_id, reminder)
-            del self.reminders[user_id][reminder_index]
-            
-            # Remove user entry if no more reminders
-            if not self.reminders[user_id]:
-                del self.reminders[user_id]
+    async def reminder_due(self, job: dict):
+        """Scheduler handler: send a due reminder and remove it"""
+        user_id = job['data']['user_id']
+        user_reminders = self.reminders.get(user_id, [])
+        reminder = next((r for r in user_reminders if r['id'] == job['ref']), None)
+        if reminder is None:
+            return  # Deleted in the meantime
 
-        if due_reminders:
-            self.save_reminders()
+        await self.send_reminder(user_id, reminder)
+        user_reminders.remove(reminder)
+        self.delete_reminder(reminder)
 
-    @check_reminders.before_loop
-    async def before_check_reminders(self):
-        await self.bot.wait_until_ready()
+        # Remove user entry if no more reminders
+        if not user_reminders:
+            del self.reminders[user_id]
 
     async def send_reminder(self, user_id: str, reminder: dict):
         """Send a reminder to the user"""
         try:
-            user = await self.bot.fetch_user(int(user_id))
+            user = await self.users.fetch(int(user_id))
+            if user is None:
+                logger.warning(f"Dropping reminder for unknown user {user_id}")
+                return
             
             embed = discord.Embed(
                 title="⏰ Reminder",
@@ -157,7 +184,7 @@ class RemindMe(commands.Cog):
                 except:
                     pass  # Channel no longer accessible
         except Exception as e:
-            print(f"Error sending reminder to {user_id}: {e}")
+            logger.error(f"Error sending reminder to {user_id}: {e}")
 
     @app_commands.command(name="remindme", description="Set a personal reminder")
     @app_commands.describe(
@@ -204,10 +231,12 @@ class RemindMe(commands.Cog):
 
         # Create reminder
         reminder_data = {
+            'id': uuid.uuid4().hex,
             'message': message[:1000],  # Limit message length
             'remind_time': remind_time,
             'created_at': current_time,
             'guild_name': interaction.guild.name if interaction.guild else None,
+            'guild_id': interaction.guild.id if interaction.guild else None,
             'channel_id': interaction.channel.id if interaction.guild else None
         }
 
@@ -216,7 +245,7 @@ class RemindMe(commands.Cog):
             self.reminders[user_id] = []
         
         self.reminders[user_id].append(reminder_data)
-        self.save_reminders()
+        self.save_reminder(user_id, reminder_data)
 
         # Format time for display
         time_parts = []
@@ -330,11 +359,10 @@ class RemindMe(commands.Cog):
 
             # Remove the reminder
             deleted_reminder = user_reminders.pop(reminder_number - 1)
+            self.delete_reminder(deleted_reminder)
             
             if not user_reminders:
                 del self.reminders[user_id]
-            
-            self.save_reminders()
 
             await interaction.response.send_message(
                 f"✅ Deleted reminder: **{deleted_reminder['message'][:100]}**",
@@ -346,8 +374,9 @@ class RemindMe(commands.Cog):
                 return await interaction.response.send_message("📭 You have no active reminders.", ephemeral=True)
 
             count = len(user_reminders)
+            for reminder in user_reminders:
+                self.delete_reminder(reminder)
             del self.reminders[user_id]
-            self.save_reminders()
 
             await interaction.response.send_message(
                 f"✅ Cleared all {count} reminder{'s' if count != 1 else ''}.",
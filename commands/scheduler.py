@@ -0,0 +1,41 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from datetime import datetime, timezone
+from utils.checks import is_owner
+from utils.scheduler import CONCURRENCY, get_scheduler
+
+class Scheduler(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.scheduler = get_scheduler(bot)
+
+    @app_commands.command(name="schedule", description="Shows pending timed jobs (owner only).")
+    @is_owner()
+    async def schedule(self, interaction: discord.Interaction):
+        summary = self.scheduler.summary()
+        lines = []
+        for job in summary['upcoming']:
+            retry = f" • retry {job['attempts']}" if job['attempts'] else ""
+            lines.append(f"`{job['kind']}:{job['ref'][:24]}` <t:{int(job['due'].timestamp())}:R>{retry}")
+
+        embed = discord.Embed(
+            title="⏱️ Scheduled Jobs",
+            description="\n".join(lines) or "Nothing scheduled.",
+            color=discord.Color.blue(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        kinds = "\n".join(f"{kind}: {count:,}" for kind, count in sorted(summary['kinds'].items()))
+        embed.add_field(name="Pending", value=kinds or "0", inline=True)
+        embed.add_field(name="Running", value=f"{summary['running']}/{CONCURRENCY}", inline=True)
+        embed.add_field(
+            name="Runs",
+            value=f"{summary['runs']:,} ok • {summary['failures']:,} failed\nMost late: {summary['max_late']:,.1f}s",
+            inline=True
+        )
+        if summary['waiting']:
+            embed.set_footer(text=f"{summary['waiting']} due job(s) waiting for their cog to load")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Scheduler(bot))
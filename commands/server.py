@@ -2,10 +2,78 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import datetime
+from utils.member_cache import ensure_members
+
+# Status each member is counted under; invisible members show up as offline
+STATUS_KEYS = {
+    discord.Status.online: 'online',
+    discord.Status.idle: 'idle',
+    discord.Status.dnd: 'dnd',
+    discord.Status.offline: 'offline',
+    discord.Status.invisible: 'offline',
+}
 
 class Server(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # {guild_id: {'humans', 'bots', 'online', 'idle', 'dnd', 'offline'}}
+        self.member_counts = {}
+
+    # --- Member Counters ---
+
+    def _count_member(self, counts, member, delta):
+        if member.bot:
+            counts['bots'] += delta
+        else:
+            counts['humans'] += delta
+            counts[STATUS_KEYS.get(member.status, 'offline')] += delta
+
+    def get_member_counts(self, guild):
+        """Returns the guild's counters, building them once from the member cache"""
+        counts = self.member_counts.get(guild.id)
+        if counts is None:
+            counts = {'humans': 0, 'bots': 0, 'online': 0, 'idle': 0, 'dnd': 0, 'offline': 0}
+            for member in guild.members:
+                self._count_member(counts, member, 1)
+            self.member_counts[guild.id] = counts
+        return counts
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # The member cache was rebuilt, so rebuild counters from it on demand
+        self.member_counts.clear()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.member_counts.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        counts = self.member_counts.get(member.guild.id)
+        if counts is not None:
+            self._count_member(counts, member, 1)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # on_member_remove only fires for cached members, which lean mode may not have
+        counts = self.member_counts.get(payload.guild_id)
+        if counts is None:
+            return
+        if isinstance(payload.user, discord.Member):
+            self._count_member(counts, payload.user, -1)
+        else:
+            # Never counted, so rebuild from the cache next time
+            del self.member_counts[payload.guild_id]
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        counts = self.member_counts.get(after.guild.id)
+        if counts is None or after.bot or before.status == after.status:
+            return
+        counts[STATUS_KEYS.get(before.status, 'offline')] -= 1
+        counts[STATUS_KEYS.get(after.status, 'offline')] += 1
+
+    # --- Commands ---
 
     @app_commands.command(name="server", description="Displays detailed information about the server.")
     async def server_info(self, interaction: discord.Interaction):
@@ -17,32 +85,17 @@ class Server(commands.Cog):
             return
 
         # --- Member Status Count (excluding bots) ---
-        # IMPORTANT: This requires the SERVER MEMBERS privileged intent to be enabled
-        # on the Discord Developer Portal for bots in 100+ servers.
-        online_count = 0
-        idle_count = 0
-        dnd_count = 0
-        offline_count = 0
-        
-        human_members = 0
-        bot_members = 0
-
-        # Use guild.chunk() to ensure member list is fully populated
-        await guild.chunk()
-
-        for member in guild.members:
-            if member.bot:
-                bot_members += 1
-            else:
-                human_members += 1
-                if member.status == discord.Status.online:
-                    online_count += 1
-                elif member.status == discord.Status.idle:
-                    idle_count += 1
-                elif member.status == discord.Status.dnd:
-                    dnd_count += 1
-                elif member.status == discord.Status.offline:
-                    offline_count += 1
+        # IMPORTANT: This requires the SERVER MEMBERS and PRESENCE privileged intents.
+        # Counters are kept up to date from member and presence events, so the guild is
+        # only chunked once, and only when MEMBER_CACHE_MODE=lean skipped it at startup.
+        await ensure_members(guild)
+        counts = self.get_member_counts(guild)
+        human_members = counts['humans']
+        bot_members = counts['bots']
+        online_count = counts['online']
+        idle_count = counts['idle']
+        dnd_count = counts['dnd']
+        offline_count = counts['offline']
         
         # --- Create Embed ---
         embed = discord.Embed(
@@ -71,12 +124,17 @@ class Server(commands.Cog):
 
         # --- Member Status (FIXED LAYOUT) ---
         # This field now contains all statuses in a clean, single block.
+        if self.bot.intents.presences:
+            status_value = (f"🟢 **Online:** {online_count}\n"
+                            f"🌙 **Idle:** {idle_count}\n"
+                            f"⛔ **Do Not Disturb:** {dnd_count}\n"
+                            f"⚫ **Offline:** {offline_count}")
+        else:
+            # MEMBER_CACHE_MODE=lean turns presences off, so every member would read as offline
+            status_value = "Unavailable: presence tracking is turned off for this bot."
         embed.add_field(
             name="Member Status (Humans)",
-            value=f"🟢 **Online:** {online_count}\n"
-                  f"🌙 **Idle:** {idle_count}\n"
-                  f"⛔ **Do Not Disturb:** {dnd_count}\n"
-                  f"⚫ **Offline:** {offline_count}",
+            value=status_value,
             inline=True
         )
         
@@ -1,117 +1,417 @@
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 import sqlite3
+from utils.database import get_database
+from utils.scheduler import get_scheduler
 import os
-from datetime import datetime, timedelta
+import io
+import asyncio
+import concurrent.futures
+import glob
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Literal
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+import logging
+
+logger = logging.getLogger(__name__)
 
 # --- Database Setup ---
 DB_FILE = "data/server_stats.db"
-os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
 
-def init_db():
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS member_counts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER NOT NULL,
-                record_date DATE NOT NULL,
-                member_count INTEGER NOT NULL,
-                UNIQUE(guild_id, record_date)
-            )
-        """)
-        conn.commit()
+def init_db(conn: sqlite3.Connection):
+    """Creates and migrates the growth tables. Runs on the database writer thread."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS member_counts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            record_date DATE NOT NULL,
+            member_count INTEGER NOT NULL,
+            UNIQUE(guild_id, record_date)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS member_counts_hourly (
+            guild_id INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            member_count INTEGER NOT NULL,
+            joins INTEGER NOT NULL DEFAULT 0,
+            leaves INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, bucket)
+        )
+    """)
+    # Older databases only stored the daily member count
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(member_counts)")]
+    for column in ('joins', 'leaves'):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE member_counts ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
 
-# --- Cog ---
-class ServerGrowth(commands.Cog):
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
-        init_db()
-        self.record_member_count.start()
-
-    def cog_unload(self):
-        self.record_member_count.cancel()
-
-    @tasks.loop(hours=24)
-    async def record_member_count(self):
-        """Runs daily to record the member count for each server."""
-        print("Running daily member count task...")
-        today = datetime.utcnow().date()
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            for guild in self.bot.guilds:
-                try:
-                    cursor.execute(
-                        "INSERT INTO member_counts (guild_id, record_date, member_count) VALUES (?, ?, ?)",
-                        (guild.id, today, guild.member_count)
-                    )
-                except sqlite3.IntegrityError:
-                    # Data for today already exists, update it just in case
-                    cursor.execute(
-                        "UPDATE member_counts SET member_count = ? WHERE guild_id = ? AND record_date = ?",
-                        (guild.member_count, guild.id, today)
-                    )
-            conn.commit()
-        print("Daily member count task finished.")
-
-    @record_member_count.before_loop
-    async def before_record_member_count(self):
-        await self.bot.wait_until_ready()
-
-    def _generate_chart(self, guild_id: int, timeframe: str) -> str:
-        """Generates a growth chart and returns the file path."""
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            end_date = datetime.utcnow().date()
-            if timeframe == 'Weekly':
-                start_date = end_date - timedelta(days=7)
-                title = "Crescimento Semanal de Membros"
-            elif timeframe == 'Monthly':
-                start_date = end_date - timedelta(days=30)
-                title = "Crescimento Mensal de Membros"
-            else: # All-time
-                start_date = end_date - timedelta(days=365*5) # Effectively all
-                title = "Crescimento Histórico de Membros"
+# --- Time Series Ingest ---
 
-            cursor.execute(
-                "SELECT record_date, member_count FROM member_counts WHERE guild_id = ? AND record_date >= ? ORDER BY record_date ASC",
-                (guild_id, start_date)
-            )
-            data = cursor.fetchall()
+FLUSH_MINUTES = 5          # How often join/leave counters are written out
+HOURLY_RETENTION_DAYS = 90 # Hourly rows older than this are deleted
 
-        if len(data) < 2:
-            return None # Not enough data to plot
+UPSERT_HOURLY = """
+    INSERT INTO member_counts_hourly (guild_id, bucket, member_count, joins, leaves)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(guild_id, bucket) DO UPDATE SET
+        member_count = excluded.member_count,
+        joins = joins + excluded.joins,
+        leaves = leaves + excluded.leaves
+"""
+
+UPSERT_DAILY = """
+    INSERT INTO member_counts (guild_id, record_date, member_count, joins, leaves)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(guild_id, record_date) DO UPDATE SET
+        member_count = excluded.member_count,
+        joins = joins + excluded.joins,
+        leaves = leaves + excluded.leaves
+"""
+
+def write_member_counts(conn: sqlite3.Connection, hourly_rows, daily_rows, retention_cutoff: str):
+    """Writes one flush worth of rows. Runs as a single transaction on the writer thread."""
+    cursor = conn.cursor()
+    cursor.executemany(UPSERT_HOURLY, hourly_rows)
+    cursor.executemany(UPSERT_DAILY, daily_rows)
+    cursor.execute("DELETE FROM member_counts_hourly WHERE bucket < ?", (retention_cutoff,))
+
+# --- Chart Rendering ---
+
+RENDER_WORKERS = 2  # Charts rendered at the same time, each in its own process
+_render_pool = None
+
+def get_render_pool():
+    """Create the render process pool on first use."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = concurrent.futures.ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+    return _render_pool
+
+MAX_CHART_POINTS = 120  # Points plotted per chart, whatever the timeframe
+MARKER_POINTS = 60      # Above this many points the line is drawn without markers
 
-        dates = [datetime.strptime(d, '%Y-%m-%d') for d, c in data]
-        counts = [c for d, c in data]
+def lttb(xs, ys, threshold: int):
+    """Largest-triangle-three-buckets downsampling. Returns the indices to keep.
 
-        # --- Chart Styling ---
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        ax.plot(dates, counts, marker='o', linestyle='-', color='#7289DA')
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previous pick and the
+    average of the next bucket, which preserves the visual shape of the line.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+def render_growth_chart(dates, counts, lows, highs, title):
+    """Renders the growth chart to PNG bytes. Runs inside the render pool.
+
+    Uses the object-oriented Figure API so no global pyplot state is involved.
+    Long series are downsampled with LTTB, and the min/max of the points each
+    plotted point stands for is drawn as a band around the line.
+    """
+    import matplotlib.dates as mdates
+    import matplotlib.style
+    from matplotlib.figure import Figure
+
+    keep = lttb([d.timestamp() for d in dates], counts, MAX_CHART_POINTS)
+    if len(keep) < len(dates):
+        band_lows, band_highs = [], []
+        previous = -1
+        for index in keep:
+            band_lows.append(min(lows[previous + 1:index + 1]))
+            band_highs.append(max(highs[previous + 1:index + 1]))
+            previous = index
+        dates = [dates[i] for i in keep]
+        counts = [counts[i] for i in keep]
+        lows, highs = band_lows, band_highs
+
+    # --- Chart Styling ---
+    with matplotlib.style.context('dark_background'):
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+
+        if lows != highs:
+            ax.fill_between(dates, lows, highs, color='#7289DA', alpha=0.25, linewidth=0)
+        marker = 'o' if len(dates) <= MARKER_POINTS else None
+        ax.plot(dates, counts, marker=marker, linestyle='-', color='#7289DA')
 
         # Formatting
         ax.set_title(title, fontsize=16, color='white')
         ax.set_ylabel("Total de Membros", color='white')
         ax.grid(True, which='both', linestyle='--', linewidth=0.5, color='gray')
         fig.autofmt_xdate()
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b %d' if (dates[-1] - dates[0]).days < 365 else '%b %Y'))
         ax.tick_params(axis='x', colors='white')
         ax.tick_params(axis='y', colors='white')
-        plt.tight_layout()
+        fig.tight_layout()
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', transparent=True)
+
+    return buffer.getvalue()
+
+# --- Chart Cache ---
+
+CHART_CACHE_SIZE = 64  # Rendered charts kept in memory
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR")  # Optional on-disk tier, disabled when unset
+
+class ChartCache:
+    """LRU of rendered chart PNGs keyed by (guild_id, timeframe, last record_date).
+
+    The key changes whenever a new member count is recorded, so entries
+    never go stale; invalidate() just frees the old ones early.
+    """
+
+    def __init__(self, max_size: int = CHART_CACHE_SIZE, disk_dir: str = CHART_CACHE_DIR):
+        self.max_size = max_size
+        self.disk_dir = disk_dir
+        self.charts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _disk_path(self, key) -> str:
+        guild_id, timeframe, version = key
+        return os.path.join(self.disk_dir, f"{guild_id}_{timeframe}_{version}.png")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, chart: bytes):
+        with open(self._disk_path(key), 'wb') as f:
+            f.write(chart)
+
+    def _remember(self, key, chart: bytes):
+        self.charts[key] = chart
+        self.charts.move_to_end(key)
+        while len(self.charts) > self.max_size:
+            self.charts.popitem(last=False)
+
+    async def get(self, key):
+        chart = self.charts.get(key)
+        if chart is None and self.disk_dir:
+            chart = await asyncio.to_thread(self._read_disk, key)
+            if chart is not None:
+                self._remember(key, chart)
+
+        if chart is None:
+            self.misses += 1
+            return None
+
+        self.charts.move_to_end(key)
+        self.hits += 1
+        return chart
+
+    async def put(self, key, chart: bytes):
+        self._remember(key, chart)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, chart)
+
+    def _remove_disk(self, guild_ids):
+        for guild_id in guild_ids:
+            for path in glob.glob(os.path.join(self.disk_dir, f"{guild_id}_*.png")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    async def invalidate(self, guild_ids):
+        """Drop every cached chart for these guilds"""
+        guild_ids = set(guild_ids)
+        for key in [k for k in self.charts if k[0] in guild_ids]:
+            del self.charts[key]
+        if self.disk_dir and guild_ids:
+            await asyncio.to_thread(self._remove_disk, guild_ids)
+
+# --- Cog ---
+class ServerGrowth(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.db = get_database(bot, DB_FILE)
+        self.chart_cache = ChartCache()
+        # {guild_id: last record_date}, the data version used in chart cache keys
+        self.data_versions = {}
+        # {guild_id: [joins, leaves]} since the last flush
+        self.pending_counts = {}
+        # {guild_id: hour bucket last written}, so every guild gets one row per hour
+        self.flushed_buckets = {}
+        self.scheduler = get_scheduler(bot)
+
+    async def cog_load(self):
+        await self.db.transaction(init_db)
+        await self.scheduler.start()
+        self.scheduler.register('growth_flush', self.record_member_count)
+        # Counters only live in this process, so the flush job is not persisted
+        self.scheduler.schedule('growth_flush', 'counts', datetime.now(timezone.utc), persist=False)
+
+    async def cog_unload(self):
+        global _render_pool
+        self.scheduler.cancel('growth_flush', 'counts')
+        await self.flush_member_counts()
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.pending_counts.setdefault(member.guild.id, [0, 0])[0] += 1
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # Raw, so leaves are counted even when the member wasn't cached
+        self.pending_counts.setdefault(payload.guild_id, [0, 0])[1] += 1
+
+    async def record_member_count(self, job: dict):
+        """Scheduler handler: writes join/leave counters and member counts every FLUSH_MINUTES."""
+        self.scheduler.schedule('growth_flush', 'counts', datetime.now(timezone.utc) + timedelta(minutes=FLUSH_MINUTES), persist=False)
+        await self.flush_member_counts()
+
+    async def flush_member_counts(self):
+        """Upserts hourly and daily rows for every guild that changed or has no row this hour."""
+        now = datetime.utcnow()
+        bucket = now.strftime('%Y-%m-%d %H:00')
+        today = str(now.date())
+
+        pending, self.pending_counts = self.pending_counts, {}
+        hourly_rows = []
+        daily_rows = []
+        for guild in self.bot.guilds:
+            joins, leaves = pending.pop(guild.id, (0, 0))
+            if not (joins or leaves) and self.flushed_buckets.get(guild.id) == bucket:
+                continue
+            hourly_rows.append((guild.id, bucket, guild.member_count, joins, leaves))
+            daily_rows.append((guild.id, today, guild.member_count, joins, leaves))
+
+        if not hourly_rows:
+            return
+
+        retention_cutoff = (now - timedelta(days=HOURLY_RETENTION_DAYS)).strftime('%Y-%m-%d %H:00')
+        try:
+            await self.db.transaction(write_member_counts, hourly_rows, daily_rows, retention_cutoff)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing member counts: {e}")
+            # Keep the counters for the next flush
+            for guild_id, joins, leaves in ((r[0], r[3], r[4]) for r in hourly_rows):
+                counts = self.pending_counts.setdefault(guild_id, [0, 0])
+                counts[0] += joins
+                counts[1] += leaves
+            return
+
+        for guild_id, *_ in hourly_rows:
+            self.flushed_buckets[guild_id] = bucket
+            self.data_versions[guild_id] = bucket
+        await self.chart_cache.invalidate(guild_id for guild_id, *_ in hourly_rows)
+
+    def _fetch_growth_data(self, conn: sqlite3.Connection, guild_id: int, timeframe: str):
+        """Reads the member counts for a timeframe. Runs on a database reader thread."""
+        cursor = conn.cursor()
+        end_date = datetime.utcnow().date()
+        if timeframe == 'Weekly':
+            start_date = end_date - timedelta(days=7)
+            title = "Crescimento Semanal de Membros"
+            # Weekly charts use the hourly series when there is one
+            cursor.execute(
+                "SELECT bucket, member_count, member_count, member_count FROM member_counts_hourly "
+                "WHERE guild_id = ? AND bucket >= ? ORDER BY bucket ASC",
+                (guild_id, str(start_date))
+            )
+            data = cursor.fetchall()
+            if len(data) >= 2:
+                return data, title
+        elif timeframe == 'Monthly':
+            start_date = end_date - timedelta(days=30)
+            title = "Crescimento Mensal de Membros"
+        else: # All-time
+            start_date = end_date - timedelta(days=365*5) # Effectively all
+            title = "Crescimento Histórico de Membros"
+            # Bucket by week in SQL so years of history stay a few hundred rows. Grouping on the
+            # Monday that starts each week keeps the week spanning New Year in one bucket
+            cursor.execute(
+                "SELECT MIN(record_date), CAST(ROUND(AVG(member_count)) AS INTEGER), MIN(member_count), MAX(member_count) "
+                "FROM member_counts WHERE guild_id = ? AND record_date >= ? "
+                "GROUP BY date(record_date, 'weekday 0', '-6 days') ORDER BY MIN(record_date) ASC",
+                (guild_id, str(start_date))
+            )
+            return cursor.fetchall(), title
+
+        cursor.execute(
+            "SELECT record_date, member_count, member_count, member_count FROM member_counts "
+            "WHERE guild_id = ? AND record_date >= ? ORDER BY record_date ASC",
+            (guild_id, str(start_date))
+        )
+        data = cursor.fetchall()
+
+        return data, title
+
+    def _fetch_data_version(self, conn: sqlite3.Connection, guild_id: int):
+        """Reads the latest hourly bucket (or record_date) for a guild. Runs on a database reader thread."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(bucket) FROM member_counts_hourly WHERE guild_id = ?", (guild_id,))
+        version = cursor.fetchone()[0]
+        if version is None:
+            cursor.execute("SELECT MAX(record_date) FROM member_counts WHERE guild_id = ?", (guild_id,))
+            version = cursor.fetchone()[0]
+        return version
+
+    async def _get_chart(self, guild_id: int, timeframe: str) -> bytes:
+        """Returns the growth chart from the cache, rendering it on a miss."""
+        if guild_id not in self.data_versions:
+            self.data_versions[guild_id] = await self.db.read(self._fetch_data_version, guild_id)
+
+        key = (guild_id, timeframe, self.data_versions[guild_id])
+        chart = await self.chart_cache.get(key)
+        if chart is None:
+            chart = await self._generate_chart(guild_id, timeframe)
+            if chart:
+                await self.chart_cache.put(key, chart)
+        return chart
+
+    async def _generate_chart(self, guild_id: int, timeframe: str) -> bytes:
+        """Generates a growth chart off the event loop and returns it as PNG bytes."""
+        data, title = await self.db.read(self._fetch_growth_data, guild_id, timeframe)
+
+        if len(data) < 2:
+            return None # Not enough data to plot
+
+        dates = [datetime.fromisoformat(row[0]) for row in data]
+        counts = [row[1] for row in data]
+        lows = [row[2] for row in data]
+        highs = [row[3] for row in data]
 
-        # Save chart
-        chart_path = f"data/growth_chart_{guild_id}.png"
-        plt.savefig(chart_path, transparent=True)
-        plt.close()
-        
-        return chart_path
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_render_pool(), render_growth_chart, dates, counts, lows, highs, title)
 
     @app_commands.command(name="server_growth", description="Shows a chart of the server's member growth.")
     @app_commands.describe(timeframe="The time period to show the growth for.")
@@ -123,13 +423,13 @@ class ServerGrowth(commands.Cog):
         """Displays a chart of member growth over a specified period."""
         await interaction.response.defer()
 
-        chart_path = self._generate_chart(interaction.guild.id, timeframe)
+        chart = await self._get_chart(interaction.guild.id, timeframe)
 
-        if not chart_path:
+        if not chart:
             await interaction.followup.send("❌ Não há dados suficientes para gerar um gráfico. O bot precisa de pelo menos 2 dias de registros.")
             return
 
-        file = discord.File(chart_path, filename="growth_chart.png")
+        file = discord.File(io.BytesIO(chart), filename="growth_chart.png")
         embed = discord.Embed(
             title=f"📊 Análise de Crescimento do Servidor",
             description=f"Exibindo dados para o período: **{timeframe}**.",
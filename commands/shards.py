@@ -0,0 +1,86 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import asyncio
+import math
+from utils.checks import is_owner
+from utils.sharding import owned_shards
+from utils.ipc import get_cluster
+
+class Shards(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.cluster = get_cluster(bot)
+        self.cluster.register('shard_stats', self.cluster_shard_stats)
+        self.cluster.register('guild_count', self.cluster_guild_count)
+
+    async def cluster_guild_count(self):
+        """Guilds and shards in this process, for cluster-wide totals."""
+        return {'guilds': len(self.bot.guilds), 'shards': sorted(owned_shards(self.bot))}
+
+    async def cluster_shard_stats(self):
+        """JSON-friendly shard_stats() for the IPC gather. Latency is None before the first heartbeat."""
+        return [
+            [shard_id, None if math.isinf(latency) else latency, guild_count, connected]
+            for shard_id, (latency, guild_count, connected) in self.shard_stats().items()
+        ]
+
+    def shard_stats(self):
+        """Returns {shard_id: (latency, guild_count, connected)} for the shards in this process"""
+        guild_counts = {}
+        for guild in self.bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+
+        stats = {}
+        if isinstance(self.bot, commands.AutoShardedBot):
+            for shard_id, shard in self.bot.shards.items():
+                stats[shard_id] = (shard.latency, guild_counts.get(shard_id, 0), not shard.is_closed())
+        else:
+            for shard_id in owned_shards(self.bot):
+                stats[shard_id] = (self.bot.latency, len(self.bot.guilds), not self.bot.is_closed())
+        return stats
+
+    @app_commands.command(name="shards", description="Shows latency and guild counts per shard (owner only).")
+    @is_owner()
+    async def shards(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
+        # Collect every worker process's shards when running under launcher.py
+        shard_replies, count_replies = await asyncio.gather(
+            self.cluster.gather('shard_stats'), self.cluster.gather('guild_count'))
+        stats = {}
+        missing = set()
+        for reply in shard_replies:
+            if 'result' not in reply:
+                missing.add(str(reply['cluster']))
+                continue
+            for shard_id, latency, guild_count, connected in reply['result']:
+                stats[shard_id] = (reply['cluster'], latency, guild_count, connected)
+        total_guilds = 0
+        for reply in count_replies:
+            if 'result' not in reply:
+                missing.add(str(reply['cluster']))
+                continue
+            total_guilds += reply['result']['guilds']
+
+        lines = []
+        for shard_id, (cluster_id, latency, guild_count, connected) in sorted(stats.items()):
+            status = "🟢" if connected else "🔴"
+            latency_text = f"{latency * 1000:.0f}ms" if latency is not None else "n/a"
+            cluster_text = f" • cluster {cluster_id}" if self.cluster.connected else ""
+            lines.append(f"{status} **Shard {shard_id}**: {latency_text} • {guild_count:,} servers{cluster_text}")
+
+        embed = discord.Embed(
+            title="🧩 Shard Health",
+            description="\n".join(lines[:50]),
+            color=discord.Color.blue()
+        )
+        footer = f"{len(stats)} of {self.bot.shard_count or 1} shards • {total_guilds:,} servers"
+        if missing:
+            # The totals only cover the clusters that answered
+            footer += f" (partial) • no answer from cluster {', '.join(sorted(missing))}"
+        embed.set_footer(text=footer)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Shards(bot))
@@ -1,10 +1,17 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from utils.ipc import get_cluster
 
 class Sync(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.cluster = get_cluster(bot)
+        self.cluster.register('command_names', self.command_names)
+
+    async def command_names(self):
+        """Names of the slash commands this process would sync."""
+        return sorted(command.name for command in self.bot.tree.get_commands())
 
     @app_commands.command(name="sync", description="Synchronizes commands globally.")
     @commands.is_owner()
@@ -17,7 +24,17 @@ class Sync(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         try:
             synced = await self.bot.tree.sync()
-            await interaction.followup.send(f"Synced {len(synced)} commands globally.", ephemeral=True)
+            message = f"Synced {len(synced)} commands globally."
+
+            # Global commands are shared by every worker process, so they must agree
+            local = await self.command_names()
+            mismatched = [
+                str(reply['cluster']) for reply in await self.cluster.gather('command_names')
+                if reply.get('result') != local
+            ]
+            if mismatched:
+                message += f"\n⚠️ Cluster {', '.join(mismatched)} has a different command set; restart it to pick up changes."
+            await interaction.followup.send(message, ephemeral=True)
         except Exception as e:
             await interaction.followup.send(f"Failed to sync commands globally: {e}", ephemeral=True)
 
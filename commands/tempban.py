@@ -1,11 +1,29 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
-import json
-import os
 from datetime import datetime, timedelta, timezone
+from utils.rest import MODERATION, bans_route, get_rest
+from utils.scheduler import get_scheduler
+from utils.users import get_users
+from utils.storage import get_store, import_json_file
+import logging
 
-TEMP_BANS_FILE = "tempbans.json"
+logger = logging.getLogger(__name__)
+
+TEMP_BANS_FILE = "tempbans.json"  # Pre-storage file, imported once
+
+def import_temp_bans(data: dict) -> dict:
+    """Converts {guild_id: {user_id: unban_timestamp}} from tempbans.json into one row per ban"""
+    return {
+        f"{guild_id}:{user_id}": {'guild_id': guild_id, 'user_id': user_id, 'unban_at': unban_timestamp}
+        for guild_id, users in data.items()
+        for user_id, unban_timestamp in users.items()
+    }
+
+# Storage schema versions for the tempbans table
+MIGRATIONS = (
+    import_json_file(TEMP_BANS_FILE, import_temp_bans),
+)
 
 def parse_duration(duration: str) -> timedelta:
     """Parses a duration string (e.g., 10m, 2h, 1d) into a timedelta object."""
@@ -23,21 +41,46 @@ def parse_duration(duration: str) -> timedelta:
 class TempBan(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.store = get_store(bot)
+        self.scheduler = get_scheduler(bot)
+        self.rest = get_rest(bot)
+        self.users = get_users(bot)
+        self.table = None
+        self.temp_bans = {}  # {guild_id: {user_id: unban_timestamp}}
+
+    async def cog_load(self):
+        self.table = await self.store.open_table('tempbans', MIGRATIONS)
         self.temp_bans = self.load_temp_bans()
-        self.check_expired_bans.start()
+        await self.scheduler.start()
+        self.scheduler.register('tempban', self.ban_expired)
+        # Bans stored before the scheduler existed get their job here; existing jobs are left as they are
+        for guild_id, users in self.temp_bans.items():
+            for user_id in users:
+                self.schedule_unban(guild_id, user_id)
 
-    def cog_unload(self):
-        self.check_expired_bans.cancel()
+    async def cog_unload(self):
+        # Commit queued changes before the cog goes away
+        await self.store.flush()
 
     def load_temp_bans(self):
-        if os.path.exists(TEMP_BANS_FILE):
-            with open(TEMP_BANS_FILE, 'r') as f:
-                return json.load(f)
-        return {}
-
-    def save_temp_bans(self):
-        with open(TEMP_BANS_FILE, 'w') as f:
-            json.dump(self.temp_bans, f, indent=4)
+        temp_bans = {}
+        for _, row in self.table.items():
+            temp_bans.setdefault(row['guild_id'], {})[row['user_id']] = row['unban_at']
+        return temp_bans
+
+    def save_temp_ban(self, guild_id: str, user_id: str):
+        """Store one ban, or remove it once it is no longer tracked"""
+        unban_timestamp = self.temp_bans.get(guild_id, {}).get(user_id)
+        if unban_timestamp is None:
+            self.table.delete(f"{guild_id}:{user_id}")
+            self.scheduler.cancel('tempban', f"{guild_id}:{user_id}")
+        else:
+            self.table.put(f"{guild_id}:{user_id}", {'guild_id': guild_id, 'user_id': user_id, 'unban_at': unban_timestamp})
+            self.schedule_unban(guild_id, user_id)
+
+    def schedule_unban(self, guild_id: str, user_id: str):
+        unban_time = datetime.fromtimestamp(self.temp_bans[guild_id][user_id], timezone.utc)
+        self.scheduler.schedule('tempban', f"{guild_id}:{user_id}", unban_time, guild_id=guild_id)
 
     @app_commands.command(name="tempban", description="Bans a user temporarily.")
     @app_commands.describe(
@@ -68,55 +111,44 @@ class TempBan(commands.Cog):
             self.temp_bans[guild_id] = {}
         
         self.temp_bans[guild_id][user_id] = unban_timestamp
-        self.save_temp_bans()
+        self.save_temp_ban(guild_id, user_id)
 
         try:
-            await member.ban(reason=f"{reason} (Temporary ban until {unban_time.strftime('%Y-%m-%d %H:%M:%S')} UTC)")
+            ban_reason = f"{reason} (Temporary ban until {unban_time.strftime('%Y-%m-%d %H:%M:%S')} UTC)"
+            await self.rest.call(MODERATION, bans_route(guild_id), lambda: member.ban(reason=ban_reason))
             await interaction.response.send_message(f"🔨 {member.mention} has been temporarily banned for {duration}. Reason: {reason}")
         except discord.Forbidden:
             await interaction.response.send_message("I don't have permission to ban this user.", ephemeral=True)
             # If ban fails, remove from tracking
             del self.temp_bans[guild_id][user_id]
-            self.save_temp_bans()
+            self.save_temp_ban(guild_id, user_id)
         except Exception as e:
             await interaction.response.send_message(f"An error occurred: {e}", ephemeral=True)
             # If ban fails, remove from tracking
             del self.temp_bans[guild_id][user_id]
-            self.save_temp_bans()
+            self.save_temp_ban(guild_id, user_id)
 
-    @tasks.loop(minutes=1)
-    async def check_expired_bans(self):
-        now = int(datetime.now(timezone.utc).timestamp())
-        bans_to_remove = []
+    async def ban_expired(self, job: dict):
+        """Scheduler handler: lift a temporary ban once it expires"""
+        guild_id, user_id = job['ref'].split(":")
+        if user_id not in self.temp_bans.get(guild_id, {}):
+            return  # No longer tracked
 
-        for guild_id, users in self.temp_bans.items():
-            for user_id, unban_timestamp in users.items():
-                if now >= unban_timestamp:
-                    try:
-                        guild = self.bot.get_guild(int(guild_id))
-                        if guild:
-                            user = await self.bot.fetch_user(int(user_id))
-                            await guild.unban(user, reason="Temporary ban expired.")
-                            print(f"Unbanned {user} from {guild.name}.")
-                    except discord.NotFound:
-                        # User or guild not found, probably left or deleted
-                        pass
-                    except discord.Forbidden:
-                        print(f"Failed to unban user {user_id} from guild {guild_id} due to permissions.")
-                    except Exception as e:
-                        print(f"An error occurred while unbanning: {e}")
-                    
-                    bans_to_remove.append((guild_id, user_id))
-
-        if bans_to_remove:
-            for guild_id, user_id in bans_to_remove:
-                if guild_id in self.temp_bans and user_id in self.temp_bans[guild_id]:
-                    del self.temp_bans[guild_id][user_id]
-            self.save_temp_bans()
-
-    @check_expired_bans.before_loop
-    async def before_check_expired_bans(self):
-        await self.bot.wait_until_ready()
+        try:
+            guild = self.bot.get_guild(int(guild_id))
+            if guild:
+                user = await self.users.fetch(int(user_id), MODERATION) or discord.Object(id=int(user_id))
+                await self.rest.call(MODERATION, bans_route(guild_id), lambda: guild.unban(user, reason="Temporary ban expired."))
+                logger.info(f"Unbanned {user} from {guild.name}.")
+        except discord.NotFound:
+            # User or guild not found, probably left or deleted
+            pass
+        except discord.Forbidden:
+            logger.error(f"Failed to unban user {user_id} from guild {guild_id} due to permissions.")
+        # Anything else (5xx, timeouts) propagates so the scheduler retries; the ban stays tracked until then
+
+        del self.temp_bans[guild_id][user_id]
+        self.save_temp_ban(guild_id, user_id)
 
 async def setup(bot):
     await bot.add_cog(TempBan(bot))
\ No newline at end of file
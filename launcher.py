@@ -0,0 +1,90 @@
+"""Runs the bot as several worker processes, each owning a range of shards.
+
+    CLUSTER_PROCESSES=4 SHARD_COUNT=16 python launcher.py
+
+Workers are ordinary `python main.py` processes started with SHARD_COUNT,
+SHARD_IDS, CLUSTER_ID and CLUSTER_SOCKET set. They talk to each other
+through the hub in this process over a Unix socket (see utils/ipc.py).
+"""
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+from dotenv import load_dotenv
+from utils.ipc import ClusterHub
+
+load_dotenv()
+
+CLUSTER_PROCESSES = int(os.getenv("CLUSTER_PROCESSES", "2"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT") or CLUSTER_PROCESSES)
+CLUSTER_SOCKET = os.getenv("CLUSTER_SOCKET") or os.path.join(tempfile.gettempdir(), "musashi-cluster.sock")
+RESTART_DELAY = 5  # Seconds before a crashed worker is started again
+
+def shard_ranges(shard_count: int, processes: int) -> list:
+    """Splits shard IDs into contiguous, near-equal ranges, one per process."""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+def worker_env(cluster_id: int, shard_ids: list, shard_count: int) -> dict:
+    env = dict(os.environ)
+    # Each worker rotates its own log file; rotating one shared file from several processes loses lines
+    log_root, log_ext = os.path.splitext(os.getenv("LOG_FILE", "bot.log"))
+    # Consecutive metrics ports, one per worker
+    metrics_port = int(os.getenv("METRICS_PORT", "0"))
+    env.update(
+        LOG_FILE=f"{log_root}.cluster{cluster_id}{log_ext}",
+        METRICS_PORT=str(metrics_port + cluster_id if metrics_port else 0),
+        SHARD_COUNT=str(shard_count),
+        SHARD_IDS=",".join(map(str, shard_ids)),
+        CLUSTER_ID=str(cluster_id),
+        CLUSTER_SOCKET=CLUSTER_SOCKET,
+    )
+    return env
+
+async def supervise(cluster_id: int, shard_ids: list, stopping: asyncio.Event):
+    """Keeps one worker running, restarting it if it exits unexpectedly."""
+    while not stopping.is_set():
+        print(f"[launcher] Starting cluster {cluster_id} with shards {shard_ids[0]}-{shard_ids[-1]}")
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "main.py", env=worker_env(cluster_id, shard_ids, SHARD_COUNT)
+        )
+        stop_wait = asyncio.create_task(stopping.wait())
+        exit_wait = asyncio.create_task(process.wait())
+        await asyncio.wait({stop_wait, exit_wait}, return_when=asyncio.FIRST_COMPLETED)
+
+        if stopping.is_set():
+            if process.returncode is None:
+                process.send_signal(signal.SIGINT)
+                await process.wait()
+            exit_wait.cancel()
+            return
+
+        stop_wait.cancel()
+        print(f"[launcher] Cluster {cluster_id} exited with code {process.returncode}, restarting in {RESTART_DELAY}s")
+        await asyncio.sleep(RESTART_DELAY)
+
+async def run_cluster():
+    ranges = shard_ranges(SHARD_COUNT, CLUSTER_PROCESSES)
+    hub = ClusterHub(CLUSTER_SOCKET, expected=range(len(ranges)))
+    await hub.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    print(f"[launcher] {SHARD_COUNT} shards across {len(ranges)} processes, IPC at {CLUSTER_SOCKET}")
+    try:
+        await asyncio.gather(*(supervise(i, shard_ids, stopping) for i, shard_ids in enumerate(ranges)))
+    finally:
+        await hub.close()
+
+if __name__ == "__main__":
+    asyncio.run(run_cluster())
@@ -0,0 +1,633 @@
+"""Load-tests the whole bot offline, against a fake Discord gateway and REST API.
+
+    python loadtest.py --rate 200 --duration 30 --guilds 20 --members 500
+
+boots the real bot (main.py, every cog) against a local aiohttp server that
+speaks enough of the gateway and REST API for the cogs, then streams events
+at the given rate: reactions, messages, member joins and leaves, bans and
+slash commands. At the end it reports, per cog, the CPU time spent on the
+event loop, REST calls made and (with --trace-memory) memory allocated, plus
+event loop lag and the REST routes hit.
+
+    python loadtest.py --save stream.jsonl      # keep the synthetic stream
+    python loadtest.py --replay stream.jsonl    # replay a saved or recorded one
+
+A stream file has one gateway dispatch per line: {"t": "EVENT_NAME", "d": {...}}.
+Replay it with the same --guilds and --members it was saved with.
+The bot runs in a scratch directory, so its databases and log never touch
+the real ones. python loadtest.py --selftest runs a short smoke test.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from aiohttp import web, WSMsgType
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+OWN_FILE = os.path.abspath(__file__)
+
+BOT_ID = 100000000000000001
+OWNER_ID = 100000000000000002
+GUILD_BASE = 200000000000000000
+MEMBER_BASE = 300000000000000000
+DISCORD_EPOCH = 1420070400000
+
+DEFAULT_MIX = "reaction=5,message=5,member_join=2,member_remove=1,ban=1,command=2"
+# Slash commands sent by the synthetic stream: (name, options)
+COMMANDS = (
+    ("avatar", []),
+    ("server", []),
+    ("help", []),
+    ("poll_list", []),
+    ("reminders", [{"name": "action", "type": 3, "value": "list"}]),
+    ("poll", [
+        {"name": "question", "type": 3, "value": "Load test?"},
+        {"name": "option1", "type": 3, "value": "Yes"},
+        {"name": "option2", "type": 3, "value": "No"},
+    ]),
+)
+
+_counter = itertools.count()
+
+def snowflake() -> int:
+    return ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (next(_counter) & 0x3FFFFF)
+
+def timestamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+
+# --- Payloads ---
+
+def user_payload(user_id: int) -> dict:
+    return {
+        'id': str(user_id), 'username': f"user{user_id % 100000}", 'global_name': None,
+        'discriminator': "0", 'avatar': None, 'bot': user_id == BOT_ID, 'public_flags': 0,
+    }
+
+def member_payload(user_id: int, roles: list = ()) -> dict:
+    return {
+        'user': user_payload(user_id), 'roles': [str(role) for role in roles], 'joined_at': timestamp(),
+        'deaf': False, 'mute': False, 'flags': 0, 'pending': False, 'nick': None, 'avatar': None,
+        'communication_disabled_until': None,
+    }
+
+def message_payload(message_id: int, channel_id: int, guild_id: int = None, author_id: int = BOT_ID, data: dict = None) -> dict:
+    data = data or {}
+    payload = {
+        'id': str(message_id), 'channel_id': str(channel_id), 'author': user_payload(author_id),
+        'content': data.get('content', ""), 'timestamp': timestamp(), 'edited_timestamp': None,
+        'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [],
+        'attachments': [], 'embeds': data.get('embeds', []), 'pinned': False, 'type': 0,
+        'components': [], 'reactions': [],
+    }
+    if guild_id is not None:
+        payload['guild_id'] = str(guild_id)
+    return payload
+
+class FakeGuild:
+    # IDs only depend on the guild's index, so a saved stream replays against the same guilds and members
+    def __init__(self, index: int, members: int):
+        self.id = GUILD_BASE + (index << 22)
+        self.channel_id = self.id + 1
+        self.bot_role_id = self.id + 2
+        self.member_ids = [MEMBER_BASE + index * 10**6 + n for n in range(members)]
+        self.messages = []  # Message IDs the bot sent here, targets for reactions
+
+    def payload(self) -> dict:
+        roles = [
+            {'id': str(self.id), 'name': "@everyone", 'permissions': "104324673", 'position': 0, 'color': 0,
+             'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0},
+            {'id': str(self.bot_role_id), 'name': "Musashi", 'permissions': "8", 'position': 1, 'color': 0,
+             'hoist': False, 'managed': True, 'mentionable': False, 'flags': 0},
+        ]
+        members = [member_payload(BOT_ID, [self.bot_role_id])] + [member_payload(user_id) for user_id in self.member_ids]
+        return {
+            'id': str(self.id), 'name': f"Load Test {self.id % 1000}", 'icon': None, 'owner_id': str(OWNER_ID),
+            'roles': roles, 'emojis': [], 'stickers': [], 'features': [], 'channels': [
+                {'id': str(self.channel_id), 'type': 0, 'name': "general", 'position': 0,
+                 'permission_overwrites': [], 'guild_id': str(self.id), 'nsfw': False, 'topic': None},
+            ],
+            'members': members, 'member_count': len(members), 'presences': [], 'voice_states': [],
+            'threads': [], 'stage_instances': [], 'guild_scheduled_events': [], 'soundboard_sounds': [],
+            'large': len(members) > 250, 'unavailable': False, 'joined_at': timestamp(),
+            'verification_level': 0, 'default_message_notifications': 0, 'explicit_content_filter': 0,
+            'mfa_level': 0, 'nsfw_level': 0, 'premium_tier': 0, 'preferred_locale': "en-US",
+            'system_channel_id': None, 'system_channel_flags': 0, 'afk_timeout': 300, 'afk_channel_id': None,
+        }
+
+# --- Fake Discord ---
+
+def route_template(method: str, path: str) -> str:
+    """GET /channels/123/messages/456 -> GET /channels/{id}/messages/{id}"""
+    path = re.sub(r"/(interactions|webhooks)/(\d+)/[^/]+", r"/\1/{id}/{token}", path)
+    return f"{method} {re.sub(r'/[0-9]{5,}', '/{id}', path)}"
+
+class FakeDiscord:
+    """Gateway and REST stand-in, run on its own thread and event loop so it doesn't skew the bot's numbers."""
+
+    def __init__(self, guilds: int, members: int, latency: float):
+        self.guilds = [FakeGuild(index, members) for index in range(guilds)]
+        self.latency = latency
+        self.rest_calls = Counter()  # {route template: count}
+        self.connections = []        # [(websocket, shard_id, shard_count)]
+        self.sequence = itertools.count(1)
+        self.interactions = {}       # {interaction token: FakeGuild}, to place its response messages
+        self.loop = None
+        self.port = None
+        self.started = threading.Event()
+        self.runner = None
+
+    # --- Thread ---
+
+    def start(self):
+        threading.Thread(target=self.thread_main, name="fake-discord", daemon=True).start()
+        self.started.wait()
+
+    def thread_main(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.serve())
+        self.started.set()
+        self.loop.run_forever()
+
+    def run(self, coro):
+        """Runs a coroutine on the server's loop, awaitable from the bot's loop."""
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def stop(self):
+        self.run(self.runner.cleanup()).add_done_callback(lambda _: self.loop.call_soon_threadsafe(self.loop.stop))
+
+    async def serve(self):
+        app = web.Application()
+        app.router.add_get("/gateway", self.gateway)
+        app.router.add_route("*", "/api/v10/{path:.*}", self.rest)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+
+    # --- Gateway ---
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        await ws.send_str(json.dumps({'op': 10, 'd': {'heartbeat_interval': 41250}}))
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            payload = json.loads(msg.data)
+            op, data = payload['op'], payload.get('d')
+            if op == 1:  # Heartbeat
+                await ws.send_str(json.dumps({'op': 11}))
+            elif op == 2:  # Identify
+                await self.identify(ws, data)
+            elif op == 8:  # Request guild members
+                await self.members_chunk(ws, data)
+        return ws
+
+    def guilds_for(self, shard_id: int, shard_count: int) -> list:
+        return [guild for guild in self.guilds if (guild.id >> 22) % shard_count == shard_id]
+
+    async def identify(self, ws, data):
+        shard_id, shard_count = data.get('shard', [0, 1])
+        guilds = self.guilds_for(shard_id, shard_count)
+        await self.send(ws, 'READY', {
+            'v': 10, 'user': user_payload(BOT_ID), 'session_id': f"loadtest{shard_id}",
+            'resume_gateway_url': f"ws://127.0.0.1:{self.port}/gateway", 'shard': [shard_id, shard_count],
+            'guilds': [{'id': str(guild.id), 'unavailable': True} for guild in guilds],
+            'application': {'id': str(BOT_ID), 'flags': 0}, 'private_channels': [], 'relationships': [],
+        })
+        for guild in guilds:
+            await self.send(ws, 'GUILD_CREATE', guild.payload())
+        self.connections.append((ws, shard_id, shard_count))
+
+    async def members_chunk(self, ws, data):
+        guild = next((g for g in self.guilds if str(g.id) == str(data['guild_id'])), None)
+        if guild is None:
+            return
+        members = guild.payload()['members']
+        await self.send(ws, 'GUILD_MEMBERS_CHUNK', {
+            'guild_id': str(guild.id), 'members': members, 'chunk_index': 0, 'chunk_count': 1,
+            'not_found': [], 'nonce': data.get('nonce'),
+        })
+
+    async def send(self, ws, event: str, data: dict):
+        await ws.send_str(json.dumps({'op': 0, 't': event, 's': next(self.sequence), 'd': data}))
+
+    async def dispatch(self, event: str, data: dict):
+        """Sends an event on the connection of the shard that owns its guild."""
+        guild_id = data.get('guild_id')
+        if event == "INTERACTION_CREATE":
+            self.interactions[data['token']] = next((g for g in self.guilds if str(g.id) == guild_id), None)
+        for ws, shard_id, shard_count in self.connections:
+            if guild_id is None or (int(guild_id) >> 22) % shard_count == shard_id:
+                if not ws.closed:
+                    await self.send(ws, event, data)
+                return
+
+    # --- REST ---
+
+    async def rest(self, request):
+        path = "/" + request.match_info['path']
+        self.rest_calls[route_template(request.method, path)] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        body = await request.json() if request.can_read_body and request.content_type == "application/json" else {}
+        status, data = self.respond(request.method, path, body)
+        if data is None:
+            return web.Response(status=status)
+        # discord.py only parses an exact application/json content type, without a charset
+        return web.Response(body=json.dumps(data).encode(), status=status, headers={'Content-Type': "application/json"})
+
+    def respond(self, method: str, path: str, body: dict):
+        ids = [int(part) for part in re.findall(r"/([0-9]{5,})", path)]
+        if path == "/users/@me":
+            return 200, user_payload(BOT_ID)
+        if path == "/oauth2/applications/@me":
+            return 200, {
+                'id': str(BOT_ID), 'name': "Musashi", 'icon': None, 'description': "", 'rpc_origins': [],
+                'bot_public': True, 'bot_require_code_grant': False, 'owner': user_payload(OWNER_ID),
+                'team': None, 'verify_key': "0" * 64, 'flags': 0, 'summary': "",
+            }
+        if path == "/gateway/bot":
+            return 200, {'url': f"ws://127.0.0.1:{self.port}/gateway", 'shards': 1,
+                         'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 1}}
+        if path == "/users/@me/channels":
+            recipient = int(body.get('recipient_id', OWNER_ID))
+            return 200, {'id': str(snowflake()), 'type': 1, 'recipients': [user_payload(recipient)], 'last_message_id': None}
+        if re.fullmatch(r"/users/\d+", path):
+            return 200, user_payload(ids[0])
+        if re.fullmatch(r"/interactions/\d+/[^/]+/callback", path):
+            return 200, {'interaction': {'id': str(ids[0]), 'type': 2},
+                         'resource': {'type': body.get('type', 4)}}
+        if path.startswith("/webhooks/"):
+            # Followups and original responses; these are the messages reactions go to (e.g. polls)
+            if method == "DELETE":
+                return 204, None
+            guild = self.interactions.get(path.split("/")[3])
+            message_id = snowflake()
+            if guild is None:
+                return 200, message_payload(message_id, snowflake(), data=body)
+            if len(guild.messages) < 50:
+                guild.messages.append(message_id)
+            return 200, message_payload(message_id, guild.channel_id, guild.id, data=body)
+        if re.fullmatch(r"/channels/\d+/messages", path) and method == "POST":
+            return 200, message_payload(snowflake(), ids[0], data=body)
+        if re.fullmatch(r"/channels/\d+/messages/\d+", path):
+            return (200, message_payload(ids[1], ids[0], data=body)) if method != "DELETE" else (204, None)
+        if "/reactions/" in path or re.fullmatch(r"/guilds/\d+/bans/\d+", path) and method in ("PUT", "DELETE"):
+            return 204, None
+        if re.fullmatch(r"/guilds/\d+/bans/\d+", path):
+            return 404, {'message': "Unknown Ban", 'code': 10026}
+        if re.fullmatch(r"/guilds/\d+/audit-logs", path):
+            return 200, {'audit_log_entries': [], 'users': [], 'integrations': [], 'webhooks': [],
+                         'guild_scheduled_events': [], 'threads': [], 'application_commands': [], 'auto_moderation_rules': []}
+        if re.fullmatch(r"/guilds/\d+/members/\d+", path):
+            return (200, dict(member_payload(ids[1]), guild_id=str(ids[0]))) if method != "DELETE" else (204, None)
+        return 404, {'message': "404: Not Found", 'code': 0}
+
+# --- Event Streams ---
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+def synthetic_events(server: FakeDiscord, mix: dict):
+    """Endless stream of (event, data), generated as it is sent so reactions can target real bot messages."""
+    kinds, weights = list(mix), list(mix.values())
+    while True:
+        guild = random.choice(server.guilds)
+        kind = random.choices(kinds, weights)[0]
+        user_id = random.choice(guild.member_ids) if guild.member_ids else OWNER_ID
+
+        if kind == "reaction":
+            message_id = random.choice(guild.messages) if guild.messages else snowflake()
+            event = random.choice(("MESSAGE_REACTION_ADD", "MESSAGE_REACTION_REMOVE"))
+            data = {'user_id': str(user_id), 'channel_id': str(guild.channel_id), 'message_id': str(message_id),
+                    'guild_id': str(guild.id), 'emoji': {'id': None, 'name': "1️⃣"}, 'burst': False, 'type': 0}
+            if event == "MESSAGE_REACTION_ADD":
+                data['member'] = member_payload(user_id)
+            yield event, data
+        elif kind == "message":
+            data = message_payload(snowflake(), guild.channel_id, guild.id, user_id, {'content': "hello from the load test"})
+            data['member'] = {key: value for key, value in member_payload(user_id).items() if key != 'user'}
+            yield "MESSAGE_CREATE", data
+        elif kind == "member_join":
+            new_id = snowflake()
+            guild.member_ids.append(new_id)
+            yield "GUILD_MEMBER_ADD", dict(member_payload(new_id), guild_id=str(guild.id))
+        elif kind == "member_remove" and len(guild.member_ids) > 1:
+            guild.member_ids.remove(user_id)
+            yield "GUILD_MEMBER_REMOVE", {'guild_id': str(guild.id), 'user': user_payload(user_id)}
+        elif kind == "ban" and len(guild.member_ids) > 1:
+            guild.member_ids.remove(user_id)
+            yield "GUILD_BAN_ADD", {'guild_id': str(guild.id), 'user': user_payload(user_id)}
+        elif kind == "command":
+            name, options = random.choice(COMMANDS)
+            yield "INTERACTION_CREATE", {
+                'id': str(snowflake()), 'application_id': str(BOT_ID), 'type': 2, 'token': f"token{snowflake()}",
+                'version': 1, 'guild_id': str(guild.id), 'channel_id': str(guild.channel_id),
+                'channel': {'id': str(guild.channel_id), 'type': 0, 'guild_id': str(guild.id), 'name': "general",
+                            'position': 0, 'permission_overwrites': []},
+                'member': dict(member_payload(user_id), permissions="104324673"),
+                'data': {'id': str(snowflake()), 'name': name, 'type': 1, 'options': options},
+                'app_permissions': "8", 'locale': "en-US", 'guild_locale': "en-US", 'entitlements': [],
+                'authorizing_integration_owners': {'0': str(guild.id)}, 'context': 0,
+                'attachment_size_limit': 26214400,
+            }
+
+def file_events(path: str):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record['t'], record['d']
+
+async def replay(server: FakeDiscord, events, rate: float, duration: float, save=None) -> Counter:
+    """Sends events at `rate` per second for `duration` seconds (or until the stream ends). Returns counts by event."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    sent = Counter()
+    for event, data in events:
+        due = started + sent.total() / rate
+        if due - started >= duration:
+            break
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await server.dispatch(event, data)
+        if save:
+            save.write(json.dumps({'t': event, 'd': data}) + "\n")
+        sent[event] += 1
+    return sent
+
+# --- Measurements ---
+
+def cog_of(frame) -> str:
+    """The cog a stack belongs to: its innermost commands/ frame, else the innermost bot module."""
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if os.path.isabs(filename) and filename.startswith(PROJECT_ROOT) and filename != OWN_FILE:
+            module = os.path.splitext(os.path.relpath(filename, PROJECT_ROOT))[0].replace(os.sep, ".")
+            if module.startswith("commands."):
+                return module.split(".", 1)[1]
+            if module != "main":  # main() is at the bottom of the gateway reader's stack
+                fallback = fallback or module
+        frame = frame.f_back
+    return fallback or "(discord.py / library)"
+
+class CpuSampler:
+    """Samples the bot loop's stack from a thread; busy samples are charged to the cog on the stack."""
+
+    INTERVAL = 0.002
+
+    def __init__(self):
+        self.samples = Counter()
+        self.idle = 0
+        self.thread_id = threading.get_ident()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.sample, name="loadtest-cpu", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+    def sample(self):
+        while not self.stopping.wait(self.INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            if frame.f_code.co_filename.endswith("selectors.py"):
+                self.idle += 1  # Waiting for I/O
+            else:
+                self.samples[cog_of(frame)] += 1
+            del frame
+
+class LagProbe:
+    INTERVAL = 0.05
+
+    def __init__(self):
+        self.lags = []
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            expected = time.perf_counter() + self.INTERVAL
+            await asyncio.sleep(self.INTERVAL)
+            self.lags.append(max(0.0, time.perf_counter() - expected))
+
+    def percentile(self, p: float) -> float:
+        if not self.lags:
+            return 0.0
+        ordered = sorted(self.lags)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def count_rest_by_cog(counts: Counter):
+    """Attributes every REST request the bot makes, including interaction responses, to the cog that made it."""
+    import discord.http
+    import discord.webhook.async_
+
+    def counted(original):
+        async def request(*args, **kwargs):
+            counts[cog_of(sys._getframe(1))] += 1
+            return await original(*args, **kwargs)
+        return request
+
+    discord.http.HTTPClient.request = counted(discord.http.HTTPClient.request)
+    discord.webhook.async_.AsyncWebhookAdapter.request = counted(discord.webhook.async_.AsyncWebhookAdapter.request)
+
+def memory_by_cog(start, end) -> Counter:
+    sizes = Counter()
+    for stat in end.compare_to(start, 'traceback'):
+        cog = None
+        for frame in reversed(stat.traceback):
+            if frame.filename.startswith(os.path.join(PROJECT_ROOT, "commands") + os.sep):
+                cog = os.path.splitext(os.path.basename(frame.filename))[0]
+                break
+        sizes[cog or "(other)"] += stat.size_diff
+    return sizes
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# --- Run ---
+
+def prepare_workdir() -> str:
+    """Scratch directory the bot runs in: cogs are linked in, data/ and the log are its own."""
+    workdir = tempfile.mkdtemp(prefix="musashi-loadtest-")
+    os.symlink(os.path.join(PROJECT_ROOT, "commands"), os.path.join(workdir, "commands"))
+    return workdir
+
+async def run(args) -> dict:
+    server = FakeDiscord(args.guilds, args.members, args.latency / 1000)
+    server.start()
+
+    workdir = prepare_workdir()
+    os.chdir(workdir)
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    os.environ.update({'DISCORD_TOKEN': "loadtest.token", 'LOG_FILE': os.path.join(workdir, "bot.log")})
+    os.environ.setdefault('LOG_LEVEL', "WARNING")
+    for name in ('CLUSTER_SOCKET', 'METRICS_PORT'):
+        os.environ.pop(name, None)
+
+    import discord
+    import yarl
+    discord.http.Route.BASE = f"http://127.0.0.1:{server.port}/api/v10"
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"ws://127.0.0.1:{server.port}/gateway")
+    rest_by_cog = Counter()
+    count_rest_by_cog(rest_by_cog)
+
+    started = time.perf_counter()
+    import main as bot_main
+    from utils.metrics import events as events_received
+    bot_task = asyncio.create_task(bot_main.main())
+    while not bot_main.bot.is_ready():
+        if bot_task.done():
+            bot_task.result()  # Raises why the bot stopped
+            raise RuntimeError("The bot stopped before it was ready")
+        await asyncio.sleep(0.05)
+    startup = time.perf_counter() - started
+    rest_at_ready = Counter(server.rest_calls)
+    rest_by_cog.clear()
+
+    events = file_events(args.replay) if args.replay else synthetic_events(server, parse_mix(args.mix))
+    save = open(args.save, "w") if args.save else None
+    if args.trace_memory:
+        tracemalloc.start(25)
+        memory_start = tracemalloc.take_snapshot()
+    rss_start = rss_mb()
+    cpu, lag = CpuSampler(), LagProbe()
+    cpu.start()
+    lag.start()
+    cpu_start = time.process_time()
+    events_at_start = Counter({event: count for (event,), count in events_received.values.items()})
+
+    replay_started = time.perf_counter()
+    sent = await server.run(replay(server, events, args.rate, args.duration, save))
+    sending = time.perf_counter() - replay_started
+    await asyncio.sleep(args.settle)  # Let queued work finish
+    elapsed = time.perf_counter() - replay_started
+
+    cpu.stop()
+    lag.task.cancel()
+    report = {
+        'startup': startup,
+        'sent': sent.total(),
+        'sent_by_event': dict(sent.most_common()),
+        'sending': sending,
+        'elapsed': elapsed,
+        'workdir': workdir,
+        'cpu_total': time.process_time() - cpu_start,
+        'cpu_by_cog': {cog: count * CpuSampler.INTERVAL for cog, count in cpu.samples.most_common()},
+        'loop_busy': sum(cpu.samples.values()) / max(1, sum(cpu.samples.values()) + cpu.idle),
+        'lag_p50': lag.percentile(0.5), 'lag_p99': lag.percentile(0.99), 'lag_max': max(lag.lags, default=0.0),
+        'rss_start': rss_start, 'rss_end': rss_mb(),
+        'rest_by_cog': dict(rest_by_cog.most_common()),
+        'rest_by_route': dict((server.rest_calls - rest_at_ready).most_common()),
+        'events_received': dict((Counter({event: count for (event,), count in events_received.values.items()})
+                                - events_at_start).most_common()),
+    }
+    if args.trace_memory:
+        report['memory_by_cog'] = dict(memory_by_cog(memory_start, tracemalloc.take_snapshot()).most_common())
+        tracemalloc.stop()
+    if save:
+        save.close()
+
+    await bot_main.bot.close()
+    await bot_task
+    server.stop()
+    os.chdir(PROJECT_ROOT)
+    return report
+
+def say(text: str = ""):
+    # print() is routed into the bot's log once main.py is imported, so write to the real stdout
+    print(text, file=sys.__stdout__, flush=True)
+
+def print_report(report: dict):
+    say(f"\nStartup to ready: {report['startup']:.2f}s")
+    say(f"Events sent: {report['sent']:,} in {report['sending']:.1f}s ({report['sent'] / report['sending']:.0f}/s), "
+        f"measured over {report['elapsed']:.1f}s")
+    say(f"Gateway events received by the bot: {sum(report['events_received'].values()):,}")
+    for event, count in report['sent_by_event'].items():
+        say(f"  {event:<28} {count:7,} sent -> {report['events_received'].get(event, 0):7,} received")
+    say(f"Process CPU: {report['cpu_total']:.2f}s, event loop busy {report['loop_busy']:.0%}")
+    say(f"Event loop lag: p50 {report['lag_p50'] * 1000:.1f}ms, p99 {report['lag_p99'] * 1000:.1f}ms, max {report['lag_max'] * 1000:.1f}ms")
+    say(f"RSS: {report['rss_start']:.0f}MB -> {report['rss_end']:.0f}MB")
+
+    say("\nEvent loop CPU by cog:")
+    for cog, seconds in report['cpu_by_cog'].items():
+        say(f"  {cog:<36} {seconds * 1000:9.0f}ms")
+    say("\nREST calls by cog:")
+    for cog, count in report['rest_by_cog'].items():
+        say(f"  {cog:<36} {count:9,}")
+    say("\nREST calls by route:")
+    for route, count in report['rest_by_route'].items():
+        say(f"  {route:<60} {count:7,}")
+    if 'memory_by_cog' in report:
+        say("\nMemory allocated during the run, by cog:")
+        for cog, size in report['memory_by_cog'].items():
+            say(f"  {cog:<36} {size / 1024:9.0f}KB")
+    say(f"\nBot log and databases: {report['workdir']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the bot against a fake Discord.")
+    parser.add_argument("--rate", type=float, default=100, help="Events per second (default 100)")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds to send events for (default 20)")
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--members", type=int, default=200, help="Members per guild")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Event weights (default {DEFAULT_MIX})")
+    parser.add_argument("--latency", type=float, default=20, help="Simulated REST latency in ms (default 20)")
+    parser.add_argument("--settle", type=float, default=2, help="Seconds to wait for queued work after the stream")
+    parser.add_argument("--replay", help="Replay a JSON-lines stream instead of synthetic events")
+    parser.add_argument("--save", help="Write the events sent to a JSON-lines file")
+    parser.add_argument("--trace-memory", action="store_true", help="Attribute allocations to cogs (slows the bot down)")
+    parser.add_argument("--selftest", action="store_true", help="Short smoke test")
+    return parser.parse_args(argv)
+
+def selftest() -> int:
+    args = parse_args(["--rate", "50", "--duration", "3", "--guilds", "3", "--members", "20", "--settle", "1"])
+    report = asyncio.run(run(args))
+    print_report(report)
+    checks = {
+        "bot reached ready": report['startup'] > 0,
+        "events were sent": report['sent'] >= 100,
+        "cogs made REST calls": bool(report['rest_by_cog']),
+        "CPU was attributed": bool(report['cpu_by_cog']),
+        "every event sent was received": all(
+            report['events_received'].get(event, 0) >= count
+            for event, count in report['sent_by_event'].items()),
+    }
+    for name, passed in checks.items():
+        say(f"{'ok  ' if passed else 'FAIL'} {name}")
+    say("Self test passed." if all(checks.values()) else "Self test FAILED.")
+    return 0 if all(checks.values()) else 1
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.selftest:
+        sys.exit(selftest())
+    print_report(asyncio.run(run(arguments)))
@@ -1,15 +1,30 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import os
 import asyncio
+import importlib
+import signal
 import sys
+import time
 import traceback
 import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Logging goes through a queue to a background thread, so writes never block the event loop.
+# LOG_LEVEL / LOG_LEVELS / LOG_FILE / LOG_MAX_BYTES / LOG_BACKUPS tune it; print() output is captured too.
+from utils.logging_setup import setup_logging
+setup_logging()
+logger = logging.getLogger('discord_bot')
+
+from utils.member_cache import build_cache_policy, memory_report, reset_chunked_guilds
+from utils.sharding import shard_config
+from utils.ipc import get_cluster
+from utils.watchdog import get_watchdog
+from utils.metrics import METRICS_PORT, InstrumentedTree, MetricsServer, install as install_metrics
+
 # Load Opus for voice support
 try:
     discord.opus.load_opus('opus')
@@ -20,24 +35,13 @@ except:
         try:
             discord.opus.load_opus('libopus-0.dll')
         except:
-            print("Warning: Could not load Opus library. Voice features may not work.")
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-logger = logging.getLogger('discord_bot')
+            logger.warning("Could not load Opus library. Voice features may not work.")
 
 # --- Bot Configuration ---
 
 TOKEN = os.getenv("DISCORD_TOKEN")
 if not TOKEN:
-    print("Error: DISCORD_TOKEN environment variable not set. The bot cannot start.", file=sys.stderr)
+    logger.error("DISCORD_TOKEN environment variable not set. The bot cannot start.")
     sys.exit(1)
 
 intents = discord.Intents.default()
@@ -46,7 +50,20 @@ intents.members = True
 intents.presences = True
 intents.voice_states = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# MEMBER_CACHE_MODE=lean turns presences off and skips caching every member up front
+# SHARDED / SHARD_COUNT / SHARD_IDS switch to one gateway connection per shard
+try:
+    SHARDING = shard_config()
+except ValueError as e:
+    logger.error(f"Invalid sharding settings: {e} The bot cannot start.")
+    sys.exit(1)
+if SHARDING:
+    bot = commands.AutoShardedBot(command_prefix="!", intents=intents, tree_cls=InstrumentedTree, enable_debug_events=True, **SHARDING, **build_cache_policy(intents))
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents, tree_cls=InstrumentedTree, enable_debug_events=True, **build_cache_policy(intents))
+
+# Command latency, event counts and loop lag, served on /metrics when METRICS_PORT is set
+install_metrics(bot)
 
 # --- Owner Check ---
 
@@ -57,10 +74,34 @@ async def is_owner(interaction: discord.Interaction) -> bool:
 
 @bot.event
 async def on_ready():
+    # The member cache is rebuilt on a fresh connection
+    reset_chunked_guilds()
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    if SHARDING:
+        logger.info(f"Running shards {sorted(bot.shards)} of {bot.shard_count}")
+    logger.info(f"Memory after startup ({memory_report(bot)})")
+    if not report_memory.is_running():
+        report_memory.start()
     logger.info("Bot is ready and operational.")
     logger.info("------")
 
+@bot.event
+async def on_shard_ready(shard_id):
+    logger.info(f"Shard {shard_id} is ready.")
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    logger.warning(f"Shard {shard_id} disconnected.")
+
+@tasks.loop(minutes=30)
+async def report_memory():
+    logger.info(f"Steady-state memory ({memory_report(bot)})")
+
+@report_memory.before_loop
+async def before_report_memory():
+    # Skip the first iteration, which would run right after the startup report
+    await asyncio.sleep(30 * 60)
+
 @bot.event
 async def on_error(event, *args, **kwargs):
     logger.error(f"An error occurred in event {event}:")
@@ -80,24 +121,93 @@ async def on_command_error(ctx, error):
 
 # --- Cog Loading ---
 
+# Comma-separated cog names, e.g. COGS_DISABLED=music,server_growth
+COGS_ENABLED = {name.strip() for name in os.getenv("COGS_ENABLED", "").split(",") if name.strip()}
+COGS_DISABLED = {name.strip() for name in os.getenv("COGS_DISABLED", "").split(",") if name.strip()}
+
+def selected_cogs():
+    names = sorted(filename[:-3] for filename in os.listdir('./commands') if filename.endswith('.py'))
+    if COGS_ENABLED:
+        names = [name for name in names if name in COGS_ENABLED]
+    return [name for name in names if name not in COGS_DISABLED]
+
+def import_cog(cog_name: str, timings: dict):
+    start = time.perf_counter()
+    try:
+        importlib.import_module(cog_name)
+    except Exception:
+        pass  # Reported by load_extension, which imports it again
+    timings[cog_name]['import'] = time.perf_counter() - start
+
+async def load_cog(cog_name: str, timings: dict):
+    start = time.perf_counter()
+    try:
+        await bot.load_extension(cog_name)
+        timings[cog_name]['setup'] = time.perf_counter() - start
+        logger.info(f"- Loaded cog: {cog_name}")
+    except Exception as e:
+        logger.error(f"Failed to load cog {cog_name}: {e}")
+        logger.error(traceback.format_exc())
+
 async def load_cogs():
     logger.info("Loading command cogs...")
-    for filename in os.listdir('./commands'):
-        if filename.endswith('.py'):
-            cog_name = f'commands.{filename[:-3]}'
-            try:
-                await bot.load_extension(cog_name)
-                logger.info(f"- Loaded cog: {cog_name}")
-            except Exception as e:
-                logger.error(f"Failed to load cog {cog_name}: {e}")
-                logger.error(traceback.format_exc())
+    cogs = [f'commands.{name}' for name in selected_cogs()]
+    timings = {cog_name: {'import': 0.0, 'setup': None} for cog_name in cogs}
+
+    # Imports run one at a time under the import lock anyway, so they are timed one by one
+    # here, before the gather, where no other cog's import can be counted against them.
+    # load_extension then executes the cog file again, but its dependencies are already loaded.
+    start = time.perf_counter()
+    for cog_name in cogs:
+        import_cog(cog_name, timings)
+    import_total = time.perf_counter() - start
+
+    # Cog setup (cog_load, database schema, persistent views) is independent per cog
+    start = time.perf_counter()
+    await asyncio.gather(*(load_cog(cog_name, timings) for cog_name in cogs))
+    setup_total = time.perf_counter() - start
+
+    logger.info("Cog startup timings (import / setup):")
+    for cog_name, timing in sorted(timings.items(), key=lambda item: -(item[1]['import'] + (item[1]['setup'] or 0))):
+        setup = f"{timing['setup'] * 1000:7.1f}ms" if timing['setup'] is not None else "  failed"
+        logger.info(f"  {cog_name:<32} {timing['import'] * 1000:7.1f}ms / {setup}")
+    logger.info(f"Loaded {len(bot.extensions)}/{len(cogs)} cogs: imports {import_total:.2f}s, setup {setup_total:.2f}s")
 
 # --- Main Execution ---
 
 async def main():
-    async with bot:
-        await load_cogs()
-        await bot.start(TOKEN)
+    # Under launcher.py, join the other worker processes before the cogs need them
+    cluster = get_cluster(bot)
+    metrics_server = MetricsServer() if METRICS_PORT else None
+    # Samples the loop's stack whenever it is blocked longer than LOOP_WATCHDOG_MS (see /loop_report)
+    watchdog = get_watchdog(bot)
+    watchdog.start()
+    # docker stop / systemd send SIGTERM: close the bot so cogs unload and storage is flushed
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+    except NotImplementedError:
+        pass  # Windows
+    try:
+        if metrics_server:
+            await metrics_server.start()
+        await cluster.connect()
+        async with bot:
+            await load_cogs()
+            await bot.start(TOKEN)
+    finally:
+        watchdog.stop()
+        await cluster.close()
+        if metrics_server:
+            await metrics_server.close()
+        scheduler = getattr(bot, 'scheduler', None)
+        if scheduler:
+            await scheduler.close()
+        # Cogs are unloaded by now, so their final writes have been queued
+        store = getattr(bot, 'store', None)
+        if store:
+            await store.close()
+        for db in getattr(bot, 'databases', {}).values():
+            db.close()
 
 if __name__ == "__main__":
     try:
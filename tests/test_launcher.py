@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import sys
+import launcher
+from launcher import shard_ranges, worker_env
+from utils.ipc import ClusterClient, ClusterHub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLUSTERS = 2
+SHARDS = 4
+
+async def stand_in_worker():
+    """Answers like a cluster would, without Discord. Cluster 0 gathers and prints the replies."""
+    client = ClusterClient(os.environ["CLUSTER_SOCKET"], int(os.environ["CLUSTER_ID"]))
+    shard_ids = [int(s) for s in os.environ["SHARD_IDS"].split(",")]
+
+    async def guild_count():
+        return {'guilds': 100 * (client.cluster_id + 1), 'shards': shard_ids}
+
+    async def ban_scan(user_id: int):
+        # Pretend every cluster finds the user banned in one of its guilds
+        return [{'guild_id': client.cluster_id, 'reason': f"banned on cluster {client.cluster_id}"}]
+
+    client.register('guild_count', guild_count)
+    client.register('ban_scan', ban_scan)
+    await client.connect()
+
+    if client.cluster_id == 0:
+        # Wait for the other workers, then scatter/gather and report
+        for _ in range(50):
+            replies = await client.gather('guild_count')
+            if len(replies) == CLUSTERS:
+                break
+            await asyncio.sleep(0.1)
+        bans = await client.gather('ban_scan', user_id=1234)
+        print(json.dumps({'guild_count': replies, 'ban_scan': bans}), flush=True)
+    else:
+        await asyncio.sleep(10)
+    await client.close()
+
+def test_shard_ranges_cover_every_shard_once():
+    assert shard_ranges(16, 3) == [list(range(0, 6)), list(range(6, 11)), list(range(11, 16))]
+    assert shard_ranges(2, 4) == [[0], [1]]
+
+def test_gather_reaches_every_cluster(tmp_path, monkeypatch):
+    socket_path = str(tmp_path / "cluster.sock")
+    monkeypatch.setattr(launcher, "CLUSTER_SOCKET", socket_path)
+
+    async def scenario():
+        hub = ClusterHub(socket_path)
+        await hub.start()
+        processes = [
+            await asyncio.create_subprocess_exec(
+                sys.executable, __file__,
+                env=dict(worker_env(i, shard_ids, SHARDS), PYTHONPATH=ROOT),
+                stdout=asyncio.subprocess.PIPE if i == 0 else None
+            )
+            for i, shard_ids in enumerate(shard_ranges(SHARDS, CLUSTERS))
+        ]
+        try:
+            return json.loads(await asyncio.wait_for(processes[0].stdout.readline(), timeout=20))
+        finally:
+            for process in processes:
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+            await hub.close()
+
+    report = asyncio.run(scenario())
+    counts = report['guild_count']
+    assert len(counts) == CLUSTERS
+    assert sorted(s for reply in counts for s in reply['result']['shards']) == list(range(SHARDS))
+    assert sum(reply['result']['guilds'] for reply in counts) == 300
+    assert len([ban for reply in report['ban_scan'] for ban in reply['result']]) == CLUSTERS
+
+def test_missing_clusters_are_reported(tmp_path):
+    socket_path = str(tmp_path / "cluster.sock")
+
+    async def scenario():
+        hub = ClusterHub(socket_path, expected=range(2))
+        await hub.start()
+        client = ClusterClient(socket_path, 0)
+        client.register('guild_count', lambda: asyncio.sleep(0, {'guilds': 5}))
+        await client.connect()
+        try:
+            return await client.gather('guild_count')
+        finally:
+            await client.close()
+            await hub.close()
+
+    assert asyncio.run(scenario()) == [{'cluster': 0, 'result': {'guilds': 5}}, {'cluster': 1, 'error': "not connected"}]
+
+def test_unreachable_hub_flags_local_answer_as_partial(tmp_path):
+    async def scenario():
+        client = ClusterClient(str(tmp_path / "missing.sock"), 3)
+        client.register('guild_count', lambda: asyncio.sleep(0, {'guilds': 5}))
+        return await client.gather('guild_count')
+
+    replies = asyncio.run(scenario())
+    assert replies[0] == {'cluster': 3, 'result': {'guilds': 5}}
+    assert 'error' in replies[1]
+
+if __name__ == "__main__":
+    asyncio.run(stand_in_worker())
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import aiohttp
+import discord
+from discord.ext import commands
+from utils import metrics
+from utils.metrics import MetricsServer, command_errors, command_latency, finish_command, followup_latency
+
+async def scrape() -> str:
+    server = MetricsServer(port=0)
+    await server.start()
+    try:
+        await asyncio.sleep(metrics.LOOP_LAG_INTERVAL * 2.5)
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://{server.host}:{server.port}/metrics") as response:
+                return await response.text()
+    finally:
+        await server.close()
+
+def test_endpoint_serves_recorded_metrics():
+    async def scenario():
+        bot = commands.Bot(command_prefix="!", intents=discord.Intents.none(), enable_debug_events=True)
+        await bot._async_setup_hook()
+        metrics.install(bot)
+        bot.dispatch('socket_event_type', "RESUMED")  # What the gateway does for every payload it receives
+        await asyncio.sleep(0)
+        command_latency.observe("ping", value=0.042)
+        command_latency.observe("ping", value=3.0)
+        command_errors.inc("ping", "Forbidden")
+        followup_latency.observe("server_growth", value=1.2)
+        return await scrape()
+
+    body = asyncio.run(scenario())
+    assert 'bot_command_duration_seconds_bucket{command="ping",le="0.05"} 1' in body
+    assert 'bot_command_duration_seconds_count{command="ping"} 2' in body
+    assert 'bot_command_errors_total{command="ping",error="Forbidden"} 1' in body
+    assert 'bot_events_total{event="RESUMED"} 1' in body
+    assert 'bot_event_loop_lag_seconds_count' in body
+    # Latency is nan until the first heartbeat, so no sample is exported yet
+    assert 'bot_gateway_latency_seconds{' not in body
+
+def test_deferred_commands_record_followup_latency():
+    def interaction(name, response_type):
+        return SimpleNamespace(command=SimpleNamespace(qualified_name=name), response=SimpleNamespace(type=response_type),
+                               extras={'metrics_started': time.perf_counter()})
+
+    finish_command(interaction("slow_report", discord.InteractionResponseType.deferred_channel_message))
+    finish_command(interaction("quick_reply", discord.InteractionResponseType.channel_message))
+    assert ("slow_report",) in followup_latency.values
+    assert ("quick_reply",) not in followup_latency.values
+    assert ("quick_reply",) in command_latency.values
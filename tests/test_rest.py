@@ -0,0 +1,43 @@
+import asyncio
+import logging
+from utils.rest import BACKGROUND, MODERATION, RateLimitCounter, RestScheduler, rate_limits
+
+def fake_call(order, name, delay=0.05):
+    async def run():
+        await asyncio.sleep(delay)
+        order.append(name)
+        return name
+    return run
+
+def test_moderation_overtakes_edits_and_edits_coalesce():
+    async def scenario():
+        rest = RestScheduler(concurrency=2)
+        order = []
+        edits = [rest.call(BACKGROUND, f"channel:{i}", fake_call(order, f"edit{i}"), coalesce=f"message:{i}")
+                 for i in range(6)]
+        # Ten more refreshes of message 0 arrive while the first is in flight: one more call, newest version
+        repeats = [rest.call(BACKGROUND, "channel:0", fake_call(order, f"edit0v{n}"), coalesce="message:0")
+                   for n in range(10)]
+        tasks = [asyncio.ensure_future(c) for c in edits + repeats]
+        await asyncio.sleep(0.01)
+        ban = asyncio.ensure_future(rest.call(MODERATION, "bans:1", fake_call(order, "ban")))
+        results = await asyncio.gather(*tasks, ban)
+        return rest, order, results
+
+    rest, order, results = asyncio.run(scenario())
+    assert order.index("ban") <= 3
+    assert [name for name in order if name.startswith("edit0v")] == ["edit0v9"]
+    assert set(results[6:16]) == {"edit0v9"}
+    assert rest.active == 0 and not rest.route_active and not rest.waiting
+
+def test_global_429_counted_once_as_global():
+    counter = RateLimitCounter()
+    before = dict(rate_limits.values)
+    route_message = "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds."
+    # A route 429 followed by a global one, as discord.http logs them
+    for message, args in ((route_message, ("GET", "/a", 1.5)),
+                          (route_message, ("GET", "/b", 2.0)),
+                          ("Global rate limit has been hit. Retrying in %.2f seconds.", (2.0,))):
+        counter.filter(logging.LogRecord("discord.http", logging.WARNING, __file__, 0, message, args, None))
+    counted = {scope: rate_limits.values.get((scope,), 0) - before.get((scope,), 0) for scope in ("route", "global")}
+    assert counted == {"route": 1, "global": 1}
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+import types
+from utils import storage
+from utils.storage import Store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+async def write_until_stopped(path: str):
+    """Writer process: acknowledges every put() on stdout until SIGTERM, then stops cleanly."""
+    store = Store(types.SimpleNamespace(), path)
+    table = await store.open_table('acked')
+    stopping = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+
+    i = 0
+    while not stopping.is_set():
+        table.put(f"row{i}", {'value': i})
+        print(f"ack {i}", flush=True)
+        i += 1
+        # A burst of moderation actions: many writes per commit window
+        await asyncio.sleep(0.001)
+
+    await store.close()
+    store.db.close()
+
+def test_clean_stop_keeps_every_acknowledged_write(tmp_path):
+    path = str(tmp_path / "state.db")
+    process = subprocess.Popen([sys.executable, __file__, path], stdout=subprocess.PIPE, text=True,
+                               env=dict(os.environ, PYTHONPATH=ROOT))
+
+    acked = set()
+    started = time.perf_counter()
+    while time.perf_counter() - started < 1.5:
+        line = process.stdout.readline().split()
+        if line and line[0] == "ack":
+            acked.add(f"row{line[1]}")
+    process.terminate()
+    for line in process.stdout:
+        line = line.split()
+        if line and line[0] == "ack":
+            acked.add(f"row{line[1]}")
+    assert process.wait(timeout=10) == 0
+
+    conn = sqlite3.connect(path)
+    stored = {key for key, in conn.execute("SELECT key FROM storage_rows WHERE table_name = 'acked'")}
+    conn.close()
+    assert acked
+    assert acked <= stored
+
+def test_failed_commit_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "COMMIT_WINDOW", 0.01)
+
+    async def scenario():
+        store = Store(types.SimpleNamespace(), str(tmp_path / "state.db"))
+        table = await store.open_table('flaky')
+        failures = [2]
+        transaction = store.db.transaction
+
+        async def flaky_transaction(func, *args):
+            if func is storage.write_rows and failures[0]:
+                failures[0] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return await transaction(func, *args)
+
+        store.db.transaction = flaky_transaction
+        table.put("key", {'value': 1})
+        # Nothing else is queued, so only the retry can commit it
+        await asyncio.sleep(1)
+        pending, commits = dict(store.pending), store.commits
+        await store.close()
+        store.db.close()
+        return pending, commits
+
+    pending, commits = asyncio.run(scenario())
+    assert pending == {}
+    assert commits == 1
+
+if __name__ == "__main__":
+    asyncio.run(write_until_stopped(sys.argv[1]))
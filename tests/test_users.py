@@ -0,0 +1,58 @@
+import asyncio
+import types
+import discord
+from utils.rest import BACKGROUND, MODERATION
+from utils.users import UserLookup
+
+def test_lookups_share_fetches_and_remember_unknown_users():
+    fetches = []
+
+    async def fetch_user(user_id):
+        fetches.append(user_id)
+        await asyncio.sleep(0.05)
+        if user_id == 404:
+            raise discord.NotFound(types.SimpleNamespace(status=404, reason="Not Found"), "Unknown User")
+        return types.SimpleNamespace(id=user_id, name=f"user{user_id}")
+
+    bot = types.SimpleNamespace(
+        get_user=lambda user_id: types.SimpleNamespace(id=1, name="cached") if user_id == 1 else None,
+        fetch_user=fetch_user,
+    )
+
+    async def scenario():
+        users = UserLookup(bot)
+        await users.fetch(1)
+        burst = await asyncio.gather(*(users.fetch(2) for _ in range(20)))
+        await users.fetch(2)
+        missing = [await users.fetch(404) for _ in range(3)]
+        return burst, missing
+
+    burst, missing = asyncio.run(scenario())
+    assert 1 not in fetches  # Gateway cache used first
+    assert fetches.count(2) == 1 and len({id(user) for user in burst}) == 1
+    assert fetches.count(404) == 1 and missing == [None] * 3
+
+def test_urgent_lookup_does_not_wait_on_background_fetch():
+    fetches = []
+
+    async def fetch_user(user_id):
+        fetches.append(user_id)
+        await asyncio.sleep(0.05)
+        return types.SimpleNamespace(id=user_id, name=f"user{user_id}")
+
+    bot = types.SimpleNamespace(get_user=lambda user_id: None, fetch_user=fetch_user)
+
+    async def scenario():
+        users = UserLookup(bot)
+        background = asyncio.ensure_future(users.fetch(7, BACKGROUND))
+        await asyncio.sleep(0)
+        moderation = asyncio.ensure_future(users.fetch(7, MODERATION))
+        await asyncio.sleep(0)
+        # A second background lookup joins the most urgent fetch in flight
+        joined = asyncio.ensure_future(users.fetch(7, BACKGROUND))
+        await asyncio.gather(background, moderation, joined)
+        return users
+
+    users = asyncio.run(scenario())
+    assert fetches == [7, 7]
+    assert not users.in_flight
@@ -0,0 +1,149 @@
+import discord
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- Tailer Settings ---
+AUDIT_LOG_WINDOW = 5          # Minimum seconds between audit log reads per guild
+AUDIT_LOG_FIRST_PAGE = 100    # Entries read per action the first time a guild is tailed
+AUDIT_LOG_MAX_ENTRIES = 1000  # Upper bound on entries read per action in one refresh
+AUDIT_LOG_TTL = 3600          # Seconds cached entries are kept
+EVENT_SLACK = 60              # Seconds an audit entry may predate the gateway event
+
+TRACKED_ACTIONS = {
+    'ban': discord.AuditLogAction.ban,
+    'unban': discord.AuditLogAction.unban,
+}
+
+class AuditLogTailer:
+    """Per-guild cache of ban/unban audit log entries, keyed by target ID.
+
+    Lookups that miss trigger at most one audit log read per guild per
+    window, shared by everyone waiting, so a raid of N bans costs a handful
+    of REST calls instead of N fetch_ban calls.
+    """
+
+    def __init__(self):
+        # {guild_id: {target_id: entry}}
+        self.entries = {}
+        # {(guild_id, action): last seen audit log entry ID}
+        self.last_seen = {}
+        # {guild_id: time the last refresh started}
+        self.refreshed_at = {}
+        self.locks = {}
+        self.forbidden = set()
+        self.stats = {'hits': 0, 'misses': 0, 'pages': 0}
+
+    def cached(self, guild_id, target_id, action=None, since=None):
+        """Return the latest cached entry for a target without touching the API"""
+        entry = self.entries.get(guild_id, {}).get(target_id)
+        if not entry:
+            return None
+        if action and entry['action'] != action:
+            return None
+        if since and entry['created_at'] < since - timedelta(seconds=EVENT_SLACK):
+            return None
+        return entry
+
+    async def lookup(self, guild, target_id, action=None, since=None):
+        """Return the entry for a target, refreshing the guild's cache on a miss.
+
+        A cached entry older than the event only counts as a hit if a refresh
+        has run since the event; otherwise a newer entry may be waiting.
+        """
+        entry = self.cached(guild.id, target_id, action, since)
+        if entry and (since is None or entry['created_at'] >= since
+                      or self.refreshed_at.get(guild.id, 0) > since.timestamp()):
+            self.stats['hits'] += 1
+            return entry
+
+        self.stats['misses'] += 1
+        await self.refresh(guild, since)
+        return self.cached(guild.id, target_id, action, since)
+
+    async def refresh(self, guild, since=None):
+        """Page new ban/unban entries for a guild, coalescing concurrent callers.
+
+        A refresh that started after ``since`` (default: now) already covers
+        the caller, so it returns without another read.
+        """
+        requested_at = since.timestamp() if since else time.time()
+        lock = self.locks.setdefault(guild.id, asyncio.Lock())
+
+        # Wait out the window before queueing on the lock, so lookups that are
+        # already covered never wait behind the sleep
+        if self.refreshed_at.get(guild.id, 0) <= requested_at:
+            wait = self.refreshed_at.get(guild.id, 0) + AUDIT_LOG_WINDOW - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        async with lock:
+            # A refresh started after the event we are looking for, which covers us
+            if self.refreshed_at.get(guild.id, 0) > requested_at:
+                return
+
+            self.refreshed_at[guild.id] = time.time()
+            if guild.id in self.forbidden and not guild.me.guild_permissions.view_audit_log:
+                return
+            self.forbidden.discard(guild.id)
+
+            try:
+                for action in TRACKED_ACTIONS:
+                    await self.read_action(guild, action)
+            except discord.Forbidden:
+                self.forbidden.add(guild.id)
+            except discord.HTTPException as e:
+                logger.error(f"❌ Error reading audit log in {guild.name}: {e}")
+
+            self.prune(guild.id)
+
+    async def read_action(self, guild, action):
+        key = (guild.id, action)
+        last_seen = self.last_seen.get(key)
+        if last_seen:
+            # Oldest to newest, only entries we have not seen yet
+            history = guild.audit_logs(
+                action=TRACKED_ACTIONS[action],
+                after=discord.Object(id=last_seen),
+                limit=AUDIT_LOG_MAX_ENTRIES
+            )
+        else:
+            history = guild.audit_logs(action=TRACKED_ACTIONS[action], limit=AUDIT_LOG_FIRST_PAGE)
+
+        guild_entries = self.entries.setdefault(guild.id, {})
+        count = 0
+        async for entry in history:
+            count += 1
+            if entry.target is None:
+                continue
+            last_seen = max(last_seen or 0, entry.id)
+            current = guild_entries.get(entry.target.id)
+            if current and current['id'] > entry.id:
+                continue
+            guild_entries[entry.target.id] = {
+                'id': entry.id,
+                'action': action,
+                'reason': entry.reason,
+                'moderator': entry.user,
+                'created_at': entry.created_at
+            }
+
+        self.stats['pages'] += max(1, -(-count // 100))
+        if last_seen:
+            self.last_seen[key] = last_seen
+
+    def prune(self, guild_id):
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=AUDIT_LOG_TTL)
+        guild_entries = self.entries.get(guild_id, {})
+        for target_id in [t for t, e in guild_entries.items() if e['created_at'] < cutoff]:
+            del guild_entries[target_id]
+
+def get_tailer(bot) -> AuditLogTailer:
+    """Return the bot-wide audit log tailer, creating it on first use."""
+    tailer = getattr(bot, 'audit_log_tailer', None)
+    if tailer is None:
+        tailer = bot.audit_log_tailer = AuditLogTailer()
+    return tailer
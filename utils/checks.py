@@ -0,0 +1,8 @@
+import discord
+from discord import app_commands
+
+def is_owner():
+    """App command check that only lets the bot owner run the command."""
+    async def predicate(interaction: discord.Interaction) -> bool:
+        return await interaction.client.is_owner(interaction.user)
+    return app_commands.check(predicate)
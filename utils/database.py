@@ -0,0 +1,114 @@
+import sqlite3
+import asyncio
+import os
+import threading
+import concurrent.futures
+
+# --- Connection Settings ---
+READER_THREADS = 2         # Concurrent read queries per database
+STATEMENT_CACHE = 256      # Prepared statements kept per connection
+BUSY_TIMEOUT_MS = 5000
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+)
+
+class Database:
+    """Async front end for one SQLite file.
+
+    All writes go through a single writer thread and connection; reads use a
+    small pool of reader threads, each with its own read-only connection. In
+    WAL mode readers never wait on the writer, and nothing runs on the event
+    loop. Statements are prepared once per connection and reused from
+    sqlite3's statement cache, so pass the same SQL strings each time.
+    """
+
+    def __init__(self, path: str, readers: int = READER_THREADS, synchronous: str = "NORMAL"):
+        self.path = path
+        # NORMAL can lose the last commits on power loss; FULL syncs the WAL on every commit
+        self.synchronous = synchronous
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._readers = concurrent.futures.ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-reader")
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            if read_only:
+                conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _run_write(self, func, *args):
+        conn = self._connect(read_only=False)
+        try:
+            result = func(conn, *args)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _run_read(self, func, *args):
+        return func(self._connect(read_only=True), *args)
+
+    async def transaction(self, func, *args):
+        """Runs func(conn, *args) on the writer thread and commits it as one transaction."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._run_write, func, *args)
+
+    async def read(self, func, *args):
+        """Runs func(conn, *args) on a reader thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._run_read, func, *args)
+
+    async def execute(self, sql: str, params=()):
+        return await self.transaction(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def executemany(self, sql: str, rows):
+        return await self.transaction(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    async def fetchall(self, sql: str, params=()):
+        return await self.read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params=()):
+        return await self.read(lambda conn: conn.execute(sql, params).fetchone())
+
+    def close(self):
+        """Waits for queued work, then closes every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+def get_database(bot, path: str, **options) -> Database:
+    """Return the bot-wide Database for a file, opening it on first use with the given options."""
+    databases = getattr(bot, 'databases', None)
+    if databases is None:
+        databases = bot.databases = {}
+
+    db = databases.get(path)
+    if db is None or db._closed:
+        db = databases[path] = Database(path, **options)
+    return db
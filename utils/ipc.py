@@ -0,0 +1,232 @@
+import asyncio
+import itertools
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Set by launcher.py for every worker process
+CLUSTER_SOCKET = os.getenv("CLUSTER_SOCKET")
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))
+GATHER_TIMEOUT = 15  # Seconds to wait for every cluster to answer, unless gather() is given longer
+LINE_LIMIT = 16 * 1024 * 1024  # Largest single message, in bytes
+
+# --- Wire Format ---
+# Newline-delimited JSON over a Unix socket:
+#   worker -> hub   {"op": "hello", "cluster": 0}
+#   worker -> hub   {"op": "request", "id": 1, "command": "ban_scan", "args": {...}, "timeout": 300}
+#   hub -> worker   {"op": "call", "id": 7, "command": "ban_scan", "args": {...}}
+#   worker -> hub   {"op": "reply", "id": 7, "result": ...} or {"op": "reply", "id": 7, "error": "..."}
+#   hub -> worker   {"op": "result", "id": 1, "replies": [{"cluster": 0, "result": ...}, ...]}
+
+async def send_message(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+async def read_messages(reader: asyncio.StreamReader):
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        yield json.loads(line)
+
+def spawn(tasks: set, coro):
+    """Starts a task and keeps a reference to it until it finishes."""
+    task = asyncio.create_task(coro)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+    return task
+
+class ClusterHub:
+    """Runs in launcher.py. Fans each worker request out to every worker and gathers the replies.
+
+    Clusters in ``expected`` that are not connected get an error reply, so a
+    gather never passes off the clusters that answered as the whole bot.
+    """
+
+    def __init__(self, path: str, expected=()):
+        self.path = path
+        self.expected = set(expected)
+        self.server = None
+        # {cluster_id: writer}
+        self.clusters = {}
+        # {call_id: (future, cluster_id)}
+        self.calls = {}
+        self.call_ids = itertools.count(1)
+        self.tasks = set()
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.server = await asyncio.start_unix_server(self.handle_worker, path=self.path, limit=LINE_LIMIT)
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def handle_worker(self, reader, writer):
+        cluster_id = None
+        try:
+            async for message in read_messages(reader):
+                op = message.get('op')
+                if op == 'hello':
+                    cluster_id = message['cluster']
+                    self.clusters[cluster_id] = writer
+                elif op == 'request':
+                    spawn(self.tasks, self.scatter(writer, message))
+                elif op == 'reply':
+                    future, _ = self.calls.pop(message['id'], (None, None))
+                    if future and not future.done():
+                        future.set_result(message)
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            if cluster_id is not None and self.clusters.get(cluster_id) is writer:
+                del self.clusters[cluster_id]
+            # Calls still waiting on this worker will never be answered
+            for call_id, (future, owner) in list(self.calls.items()):
+                if owner == cluster_id and not future.done():
+                    future.set_result({'error': "cluster disconnected"})
+            writer.close()
+
+    async def call(self, cluster_id, writer, command, args, timeout):
+        call_id = next(self.call_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.calls[call_id] = (future, cluster_id)
+        try:
+            await send_message(writer, {'op': 'call', 'id': call_id, 'command': command, 'args': args})
+            reply = await asyncio.wait_for(future, timeout=timeout)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            reply = {'error': f"{type(e).__name__}"}
+        finally:
+            self.calls.pop(call_id, None)
+
+        reply = {key: value for key, value in reply.items() if key in ('result', 'error')}
+        reply['cluster'] = cluster_id
+        return reply
+
+    async def scatter(self, requester, message):
+        timeout = message.get('timeout', GATHER_TIMEOUT)
+        calls = [
+            self.call(cluster_id, writer, message['command'], message.get('args', {}), timeout)
+            for cluster_id, writer in sorted(self.clusters.items())
+        ]
+        replies = await asyncio.gather(*calls)
+        replies += [{'cluster': cluster_id, 'error': "not connected"}
+                    for cluster_id in sorted(self.expected - set(self.clusters))]
+        try:
+            await send_message(requester, {'op': 'result', 'id': message['id'], 'replies': replies})
+        except ConnectionError:
+            pass
+
+class ClusterClient:
+    """Worker side of the IPC channel.
+
+    Cogs register named handlers and call gather() to run a command on every
+    cluster. Without launcher.py (no CLUSTER_SOCKET) gather() just runs the
+    local handler, so the same cog code works in a single process. Under
+    launcher.py, a gather while the hub is unreachable returns the local
+    reply plus an error reply for the hub, so callers can tell it is partial.
+    """
+
+    def __init__(self, path: str = CLUSTER_SOCKET, cluster_id: int = CLUSTER_ID):
+        self.path = path
+        self.cluster_id = cluster_id
+        self.handlers = {}
+        self.writer = None
+        self.requests = {}
+        self.request_ids = itertools.count(1)
+        self.reader_task = None
+        self.tasks = set()
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None and not self.writer.is_closing()
+
+    def register(self, command: str, handler):
+        """Registers an async handler(**args) whose JSON-serializable result is gathered."""
+        self.handlers[command] = handler
+
+    async def connect(self):
+        if not self.path:
+            return
+        reader, self.writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+        await send_message(self.writer, {'op': 'hello', 'cluster': self.cluster_id})
+        self.reader_task = asyncio.create_task(self.read_loop(reader))
+
+    async def close(self):
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    async def read_loop(self, reader):
+        try:
+            async for message in read_messages(reader):
+                if message['op'] == 'call':
+                    spawn(self.tasks, self.answer(message))
+                elif message['op'] == 'result':
+                    future = self.requests.pop(message['id'], None)
+                    if future and not future.done():
+                        future.set_result(message['replies'])
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            for future in self.requests.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Cluster hub disconnected"))
+            self.requests.clear()
+            self.writer = None
+
+    async def run_local(self, command: str, args: dict) -> dict:
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {'cluster': self.cluster_id, 'error': f"Unknown command {command}"}
+        try:
+            return {'cluster': self.cluster_id, 'result': await handler(**args)}
+        except Exception as e:
+            logger.exception(f"Cluster command {command} failed")
+            return {'cluster': self.cluster_id, 'error': str(e)}
+
+    async def answer(self, message):
+        reply = await self.run_local(message['command'], message.get('args', {}))
+        reply.update(op='reply', id=message['id'])
+        try:
+            await send_message(self.writer, reply)
+        except (ConnectionError, AttributeError):
+            pass
+
+    async def gather(self, command: str, timeout: float = GATHER_TIMEOUT, **args) -> list:
+        """Runs a command on every cluster. Returns [{'cluster', 'result' or 'error'}, ...].
+
+        A cluster that takes longer than timeout seconds is reported as an error.
+        """
+        if self.path and not self.connected:
+            try:
+                await self.connect()
+            except OSError as e:
+                logger.warning(f"Cluster hub unreachable, answering {command} for this cluster only: {e}")
+                return [await self.run_local(command, args), {'cluster': "hub", 'error': "hub unreachable"}]
+        if not self.connected:
+            return [await self.run_local(command, args)]
+
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.requests[request_id] = future
+        await send_message(self.writer, {'op': 'request', 'id': request_id, 'command': command, 'args': args, 'timeout': timeout})
+        try:
+            return await asyncio.wait_for(future, timeout=timeout + 5)
+        finally:
+            self.requests.pop(request_id, None)
+
+def get_cluster(bot) -> ClusterClient:
+    """Return the bot's cluster client, creating it on first use."""
+    cluster = getattr(bot, 'cluster', None)
+    if cluster is None:
+        cluster = bot.cluster = ClusterClient()
+    return cluster
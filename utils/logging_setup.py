@@ -0,0 +1,123 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+# --- Logging Settings ---
+LOG_FILE = os.getenv("LOG_FILE", "bot.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # Rotate after 10 MB
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))                          # Rotated files kept
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-module overrides, e.g. LOG_LEVELS=discord=WARNING,commands.music=DEBUG
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for the rotating log file."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread with only the cheap work done on the caller."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message now, since its args may change before the listener formats it
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+class PrintToLog:
+    """File-like stand-in for sys.stdout that turns stray prints into log records.
+
+    Text only: there is deliberately no ``buffer`` attribute, so libraries that
+    write bytes to ``sys.stdout.buffer`` when it exists fall back to text.
+    Prints also come from executor threads, so partial lines are kept under a lock.
+    """
+
+    encoding = "utf-8"
+    errors = "replace"
+
+    def __init__(self, logger: logging.Logger, level: int):
+        self.logger = logger
+        self.level = level
+        self._pending = ""
+        self._lock = threading.Lock()
+
+    def write(self, text: str):
+        with self._lock:
+            self._pending += text
+            while "\n" in self._pending:
+                line, self._pending = self._pending.split("\n", 1)
+                if line.strip():
+                    self.logger.log(self.level, line.rstrip())
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            if self._pending.strip():
+                self.logger.log(self.level, self._pending.rstrip())
+            self._pending = ""
+
+    def isatty(self):
+        return False
+
+def parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Routes all logging through a queue so the event loop never waits on disk or console I/O.
+
+    Records are handed to a background QueueListener thread that writes JSON
+    lines to a size-rotated file and plain text to the console. Stray print()
+    output from libraries is captured into the same pipeline. stderr is left
+    alone so interpreter tracebacks and crash dumps still reach the console
+    even if logging itself is broken.
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter())
+    # The real stdout, since sys.stdout itself is redirected into the logs below
+    console_handler = logging.StreamHandler(sys.__stdout__)
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(LogQueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+    for name, level in parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    sys.stdout = PrintToLog(logging.getLogger('stdout'), logging.INFO)
+    return listener
@@ -0,0 +1,75 @@
+import asyncio
+import discord
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "full" caches every member and presence like before; "lean" turns presences
+# off and fetches a guild's members the first time a feature asks for them.
+# Members fetched that way stay cached and are kept current by join/leave events.
+CACHE_MODE = os.getenv("MEMBER_CACHE_MODE", "full").lower()
+if CACHE_MODE not in ("full", "lean"):
+    logger.warning(f"Unknown MEMBER_CACHE_MODE '{CACHE_MODE}', using 'full'.")
+    CACHE_MODE = "full"
+
+# {guild_id: chunk task} for guilds whose members were requested on demand in lean mode
+_chunked_guilds = {}
+
+def build_cache_policy(intents: discord.Intents) -> dict:
+    """Returns the Bot keyword arguments for the configured cache mode. Lean mode also turns presences off."""
+    if CACHE_MODE == "lean":
+        # Presence updates are most of a large bot's gateway traffic
+        intents.presences = False
+        return {
+            'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+            'chunk_guilds_at_startup': False,
+        }
+    return {
+        'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+        'chunk_guilds_at_startup': True,
+    }
+
+async def ensure_members(guild: discord.Guild):
+    """Makes sure the guild's members are cached, chunking it once in lean mode.
+
+    Callers that arrive while the chunk is still running wait for the same one.
+    """
+    if CACHE_MODE == "full":
+        return
+    task = _chunked_guilds.get(guild.id)
+    if task is None:
+        task = _chunked_guilds[guild.id] = asyncio.ensure_future(guild.chunk(cache=True))
+        task.add_done_callback(lambda done: _forget_failed_chunk(guild.id, done))
+    await asyncio.shield(task)
+
+def _forget_failed_chunk(guild_id: int, task: asyncio.Future):
+    # A failed chunk is dropped so the next caller tries again
+    if (task.cancelled() or task.exception() is not None) and _chunked_guilds.get(guild_id) is task:
+        del _chunked_guilds[guild_id]
+
+def reset_chunked_guilds():
+    """Forgets on-demand chunks, for when the member cache is rebuilt after a reconnect."""
+    _chunked_guilds.clear()
+
+def memory_usage_mb() -> float:
+    """Current resident memory of the process, falling back to the peak where /proc is missing."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return 0.0
+
+def memory_report(bot) -> str:
+    cached_members = sum(len(guild.members) for guild in bot.guilds)
+    return (
+        f"cache mode {CACHE_MODE}: {memory_usage_mb():.1f} MB RSS, "
+        f"{len(bot.guilds)} guilds, {cached_members} cached members, {len(bot.users)} cached users"
+    )
@@ -0,0 +1,233 @@
+"""Prometheus-style metrics for the bot, served as text on a local /metrics endpoint.
+
+    METRICS_PORT=9100 python main.py
+    curl http://127.0.0.1:9100/metrics
+"""
+import asyncio
+import bisect
+import logging
+import math
+import os
+import time
+import discord
+from discord import app_commands
+from aiohttp import web
+from utils.profiler import active_profiler
+
+logger = logging.getLogger(__name__)
+
+# --- Metrics Settings ---
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 leaves the endpoint off
+LOOP_LAG_INTERVAL = 0.5  # Seconds between event loop lag probes
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+# --- Metric Types ---
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in sorted(self.values.items()):
+            yield self.name, format_labels(self.labels, label_values), value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), collect=None):
+        super().__init__(name, help, labels)
+        # Optional callable returning {label_values: value}, read at scrape time
+        self.collect = collect
+
+    def set(self, *label_values, value: float):
+        self.values[label_values] = value
+
+    def samples(self):
+        if self.collect:
+            self.values = dict(self.collect())
+        yield from super().samples()
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        # {label_values: [bucket counts..., sum, count]}
+        self.values = {}
+
+    def observe(self, *label_values, value: float):
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [0] * (len(self.buckets) + 2)
+        # Counts per bucket; values above the last bound only show up in +Inf (the total count)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self):
+        for label_values, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket", format_labels(self.labels, label_values, f'le="{format_value(bound)}"'), cumulative
+            yield f"{self.name}_bucket", format_labels(self.labels, label_values, 'le="+Inf"'), series[-1]
+            yield f"{self.name}_sum", format_labels(self.labels, label_values), series[-2]
+            yield f"{self.name}_count", format_labels(self.labels, label_values), series[-1]
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+command_latency = REGISTRY.register(Histogram(
+    "bot_command_duration_seconds", "Time from receiving a slash command to its handler returning.", ("command",)))
+command_errors = REGISTRY.register(Counter(
+    "bot_command_errors_total", "Slash commands that raised an error.", ("command", "error")))
+followup_latency = REGISTRY.register(Histogram(
+    "bot_command_followup_seconds", "Time from receiving a deferred slash command to its handler returning.", ("command",)))
+events = REGISTRY.register(Counter(
+    "bot_events_total", "Gateway events received, by event type.", ("event",)))
+loop_lag = REGISTRY.register(Histogram(
+    "bot_event_loop_lag_seconds", "How late the event loop ran a timer, i.e. time blocked by other callbacks.", (), LAG_BUCKETS))
+loop_lag_last = REGISTRY.register(Gauge(
+    "bot_event_loop_lag_last_seconds", "Most recent event loop lag probe."))
+
+# --- Instrumentation ---
+
+def command_name(interaction: discord.Interaction) -> str:
+    command = interaction.command
+    return command.qualified_name if command else "unknown"
+
+class InstrumentedTree(app_commands.CommandTree):
+    """CommandTree that times every app command and counts its errors. Pass as tree_cls to the Bot."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras['metrics_started'] = time.perf_counter()
+        profiler = active_profiler()
+        if profiler:
+            profiler.track_interaction(interaction)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        name = command_name(interaction)
+        original = getattr(error, 'original', error)
+        command_errors.inc(name, type(original).__name__)
+        finish_command(interaction)
+        await super().on_error(interaction, error)
+
+def finish_command(interaction: discord.Interaction):
+    started = interaction.extras.pop('metrics_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    command_latency.observe(command_name(interaction), value=elapsed)
+    # A deferred command shows "thinking..." until its handler sends the followup, usually its last step
+    if interaction.response.type is discord.InteractionResponseType.deferred_channel_message:
+        followup_latency.observe(command_name(interaction), value=elapsed)
+
+def install(bot):
+    """Counts gateway events and records command latency for an InstrumentedTree bot.
+
+    Event counts come from on_socket_event_type, so the bot needs enable_debug_events=True.
+    """
+    async def on_socket_event_type(event_type):
+        events.inc(event_type)
+
+    bot.add_listener(on_socket_event_type)
+
+    async def on_app_command_completion(interaction, command):
+        finish_command(interaction)
+
+    bot.add_listener(on_app_command_completion)
+
+    def gateway_latency():
+        if isinstance(bot, discord.AutoShardedClient):
+            latencies = bot.latencies
+        else:
+            latencies = [(0, bot.latency)]
+        # nan before the first heartbeat, inf while a shard is disconnected
+        return {(str(shard_id),): latency for shard_id, latency in latencies if math.isfinite(latency)}
+
+    REGISTRY.register(Gauge(
+        "bot_gateway_latency_seconds", "Heartbeat round trip per shard.", ("shard",), collect=gateway_latency))
+    REGISTRY.register(Gauge(
+        "bot_guilds", "Guilds in this process.", collect=lambda: {(): len(bot.guilds)}))
+
+async def monitor_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Measures how late a short timer fires, which is time spent in callbacks that blocked the loop."""
+    while True:
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - expected)
+        loop_lag.observe(value=lag)
+        loop_lag_last.set(value=lag)
+
+# --- HTTP Endpoint ---
+
+async def handle_metrics(request):
+    return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Content-Type-Options": "nosniff"})
+
+class MetricsServer:
+    def __init__(self, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.host, self.port = host, port
+        self.runner = None
+        self.lag_task = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        # Port 0 picks a free port; report the real one
+        self.port = self.runner.addresses[0][1]
+        self.lag_task = asyncio.create_task(monitor_loop_lag())
+        logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self.lag_task:
+            self.lag_task.cancel()
+        if self.runner:
+            await self.runner.cleanup()
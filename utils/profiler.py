@@ -0,0 +1,178 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# --- Profiler Settings ---
+SAMPLE_INTERVAL = 0.01  # Seconds between stack samples (100 Hz)
+MAX_STACK_DEPTH = 128
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The one profiler currently running, if any. Checked by InstrumentedTree on every command.
+_active = None
+
+def active_profiler():
+    return _active
+
+def frame_name(frame) -> str:
+    filename = frame.f_code.co_filename
+    if os.path.isabs(filename) and filename.startswith(PROJECT_ROOT):
+        module = os.path.splitext(os.path.relpath(filename, PROJECT_ROOT))[0].replace(os.sep, ".")
+    else:
+        module = os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}:{frame.f_code.co_name}"
+
+def thread_stack(frame, outermost) -> list:
+    """Frames of a running thread from `outermost` inwards, or None if `outermost` is not on it."""
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        frames.append(frame)
+        if frame is outermost:
+            return [frame_name(f) for f in reversed(frames)]
+        frame = frame.f_back
+    return None
+
+def task_stack(task: asyncio.Task, loop_frame) -> list:
+    """Current stack of a task, whether it is running on the loop or suspended in an await."""
+    coro = task.get_coro()
+    root = getattr(coro, 'cr_frame', None)
+    if root is None:
+        return None
+
+    running = thread_stack(loop_frame, root) if loop_frame is not None else None
+    if running:
+        return running
+
+    # Suspended: follow the chain of awaited coroutines down to the future it waits on
+    stack = []
+    while coro is not None and len(stack) < MAX_STACK_DEPTH:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        stack.append(frame_name(frame))
+        awaited = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+        if awaited is not None and not hasattr(awaited, 'cr_frame') and not hasattr(awaited, 'gi_frame'):
+            stack.append(f"[await {type(awaited).__name__}]")
+            break
+        coro = awaited
+    return stack
+
+class SamplingProfiler:
+    """Samples the stacks of one app command or listener while it runs.
+
+    Only tasks running the target are sampled: the command's task is picked
+    up by InstrumentedTree.interaction_check, and listeners are swapped for a
+    wrapper while profiling. A helper thread samples every SAMPLE_INTERVAL,
+    both while the target runs on the loop and while it waits in an await,
+    so the output shows wall-clock time. Nothing is installed when no
+    profiler is running.
+
+    Output is collapsed stacks ("frame;frame;frame count" per line), which
+    flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, bot, target: str):
+        self.bot = bot
+        self.target = target
+        self.kind, _, self.name = target.partition(":")
+        self.stacks = Counter()
+        self.invocations = 0
+        self.samples = 0
+        self.tasks = set()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.loop_thread_id = None
+        # [(event name, original listener, wrapper)]
+        self.wrapped_listeners = []
+        self.started = None
+        self.duration = 0.0
+
+    def start(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError(f"Already profiling {_active.target}")
+        if self.kind == "listener":
+            self.wrap_listeners()
+        _active = self
+        self.started = time.perf_counter()
+        self.loop_thread_id = threading.get_ident()
+        self.thread = threading.Thread(target=self.sample_loop, name="profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+        for event_name, listener, wrapper in self.wrapped_listeners:
+            self.bot.remove_listener(wrapper, event_name)
+            # A cog reloaded meanwhile has registered its new listener already
+            if self.still_loaded(listener):
+                self.bot.add_listener(listener, event_name)
+        self.wrapped_listeners.clear()
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.duration = time.perf_counter() - self.started
+
+    # --- Tracking ---
+
+    def track(self, task: asyncio.Task):
+        with self.lock:
+            self.tasks.add(task)
+            self.invocations += 1
+
+    def track_interaction(self, interaction):
+        if self.kind == "command" and interaction.command and interaction.command.qualified_name == self.name:
+            self.track(asyncio.current_task())
+
+    def still_loaded(self, listener) -> bool:
+        """Whether a listener's cog (if it is a cog method) is still loaded."""
+        owner = getattr(listener, '__self__', None)
+        return owner is None or any(cog is owner for cog in self.bot.cogs.values())
+
+    def wrap_listeners(self):
+        listeners = list(self.bot.extra_events.get(self.name, []))
+        if not listeners:
+            raise ValueError(f"No listeners registered for {self.name}")
+        for listener in listeners:
+            async def wrapper(*args, _listener=listener):
+                if not self.still_loaded(_listener):
+                    return  # Its cog was unloaded, which can't see this wrapper to remove it
+                self.track(asyncio.current_task())
+                return await _listener(*args)
+            self.bot.remove_listener(listener, self.name)
+            self.bot.add_listener(wrapper, self.name)
+            self.wrapped_listeners.append((self.name, listener, wrapper))
+
+    # --- Sampling ---
+
+    def sample_loop(self):
+        while not self.stopping.wait(SAMPLE_INTERVAL):
+            with self.lock:
+                self.tasks = {task for task in self.tasks if not task.done()}
+                tasks = list(self.tasks)
+            if not tasks:
+                continue
+            loop_frame = sys._current_frames().get(self.loop_thread_id)
+            for task in tasks:
+                try:
+                    stack = task_stack(task, loop_frame)
+                except (AttributeError, RuntimeError):
+                    continue  # The task moved on while we were reading it
+                if stack:
+                    self.stacks[";".join(stack)] += 1
+                    self.samples += 1
+            del loop_frame
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def profile_targets(bot) -> list:
+    """Everything that can be profiled: command:<name> and listener:<event>."""
+    targets = [f"command:{command.qualified_name}" for command in bot.tree.walk_commands()]
+    targets += [f"listener:{event}" for event, listeners in bot.extra_events.items() if listeners]
+    return sorted(targets)
@@ -0,0 +1,216 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import os
+import time
+from utils.metrics import REGISTRY, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# --- REST Settings ---
+CONCURRENCY = int(os.getenv("REST_CONCURRENCY", "8"))  # REST calls in flight at once, across all cogs
+ROUTE_CONCURRENCY = 2       # In flight at once on the same route (e.g. bans of one guild)
+MAX_QUEUED_EDITS = 50       # Background edits waiting beyond this are dropped
+
+# Priority lanes, most urgent first
+MODERATION = 0   # Bans, unbans, kicks, nickname changes
+INTERACTIVE = 1  # Someone is waiting on the result (commands, reminders, appeals)
+BACKGROUND = 2   # Live embed refreshes and other cosmetic updates
+LANE_NAMES = ("moderation", "interactive", "background")
+
+# Route keys, one per Discord rate limit bucket, so every cog's calls to a bucket share its cap
+def bans_route(guild_id) -> str:
+    """Ban endpoints of a guild: ban, unban and fetch_ban."""
+    return f"bans:{guild_id}"
+
+def members_route(guild_id) -> str:
+    """Member endpoints of a guild: kick and member edits."""
+    return f"members:{guild_id}"
+
+QUEUE_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+calls = REGISTRY.register(Counter(
+    "bot_rest_calls_total", "REST calls made through the scheduler, by lane.", ("lane",)))
+queue_wait = REGISTRY.register(Histogram(
+    "bot_rest_queue_seconds", "Time REST calls waited for a slot, by lane.", ("lane",), QUEUE_BUCKETS))
+coalesced = REGISTRY.register(Counter(
+    "bot_rest_coalesced_total", "Calls merged into an identical call that was still queued.", ("lane",)))
+shed = REGISTRY.register(Counter(
+    "bot_rest_shed_total", "Background edits dropped because too many were queued.", ("lane",)))
+rate_limits = REGISTRY.register(Counter(
+    "bot_rest_rate_limits_total", "429 responses from Discord: route, global, or too long to wait for.", ("scope",)))
+rate_limited_seconds = REGISTRY.register(Counter(
+    "bot_rest_rate_limited_seconds_total", "Time spent waiting out 429 responses."))
+
+class RateLimitCounter(logging.Filter):
+    """Counts the 429 warnings discord.http logs. Never filters anything out.
+
+    A global 429 logs the route warning first and the global one right after,
+    with no await in between, so the global warning moves that hit from route
+    to global before anything can read the counter.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.msg if isinstance(record.msg, str) else ""
+        if message.startswith("We are being rate limited"):
+            if "too long" in message:
+                rate_limits.inc("too_long")
+            else:
+                rate_limits.inc("route")
+                rate_limited_seconds.inc(amount=record.args[-1])
+        elif message.startswith("Global rate limit has been hit"):
+            rate_limits.inc("route", amount=-1)
+            rate_limits.inc("global")
+        return True
+
+def watch_rate_limits():
+    http_logger = logging.getLogger("discord.http")
+    if not any(isinstance(f, RateLimitCounter) for f in http_logger.filters):
+        http_logger.addFilter(RateLimitCounter())
+
+class Queued:
+    """A call waiting for a slot. Coalesced calls share one Queued and its result."""
+
+    def __init__(self, lane: int, seq: int, route: str, factory):
+        self.lane = lane
+        self.seq = seq
+        self.route = route
+        self.factory = factory
+        self.granted = asyncio.get_running_loop().create_future()
+        self.result = None  # Future shared with coalesced callers, if any
+
+    def __lt__(self, other):
+        return (self.lane, self.seq) < (other.lane, other.seq)
+
+class RestScheduler:
+    """Orders the bot's REST calls so urgent ones are never stuck behind cosmetic ones.
+
+    Every call names a lane and a route. At most CONCURRENCY calls are in
+    flight, and at most ROUTE_CONCURRENCY per route; when a slot frees up it
+    goes to the most urgent waiting call whose route has room, oldest first.
+    discord.py still handles the actual rate limit buckets underneath; this
+    keeps a burst of background work from filling them first.
+
+    Calls with a coalesce key (live embed edits) merge into an identical call
+    that has not started yet: it runs once with the newest arguments and all
+    callers get its result. When too many are queued, new ones are dropped
+    and return None, since a later edit will show the same state anyway.
+    """
+
+    def __init__(self, concurrency: int = CONCURRENCY, route_concurrency: int = ROUTE_CONCURRENCY):
+        self.concurrency = concurrency
+        self.route_concurrency = route_concurrency
+        self.active = 0
+        self.route_active = {}  # {route: calls in flight}
+        self.waiting = []       # [Queued], sorted by lane then arrival
+        self.coalescing = {}    # {coalesce key: Queued not started yet}
+        self.seq = itertools.count()
+
+    async def call(self, lane: int, route: str, factory, coalesce: str = None):
+        """Runs factory() (a function returning a coroutine) once a slot is free, and returns its result."""
+        lane_name = LANE_NAMES[lane]
+        if coalesce is not None:
+            queued = self.coalescing.get(coalesce)
+            if queued is not None:
+                queued.factory = factory  # Newest state wins
+                coalesced.inc(lane_name)
+                return await asyncio.shield(queued.result)
+            if sum(1 for q in self.waiting if q.result is not None) >= MAX_QUEUED_EDITS:
+                shed.inc(lane_name)
+                return None
+
+        queued = Queued(lane, next(self.seq), route, factory)
+        if coalesce is not None:
+            queued.result = asyncio.get_running_loop().create_future()
+            self.coalescing[coalesce] = queued
+
+        started = time.perf_counter()
+        try:
+            await self.acquire(queued)
+        except asyncio.CancelledError:
+            if queued.result is not None:
+                queued.result.cancel()  # Don't leave merged callers waiting forever
+            raise
+        finally:
+            # Calls from here on start a new merge group
+            if coalesce is not None and self.coalescing.get(coalesce) is queued:
+                del self.coalescing[coalesce]
+        queue_wait.observe(lane_name, value=time.perf_counter() - started)
+        calls.inc(lane_name)
+
+        try:
+            result = await queued.factory()
+        except BaseException as e:
+            if queued.result is not None and not queued.result.done():
+                if isinstance(e, asyncio.CancelledError):
+                    queued.result.cancel()
+                else:
+                    queued.result.set_exception(e)
+                    queued.result.exception()  # Retrieved here, so an unshared result doesn't warn
+            raise
+        else:
+            if queued.result is not None:
+                queued.result.set_result(result)
+            return result
+        finally:
+            self.release(queued.route)
+
+    # --- Slots ---
+
+    def has_room(self, route: str) -> bool:
+        return self.active < self.concurrency and self.route_active.get(route, 0) < self.route_concurrency
+
+    def take(self, route: str):
+        self.active += 1
+        self.route_active[route] = self.route_active.get(route, 0) + 1
+
+    async def acquire(self, queued: Queued):
+        if not self.waiting and self.has_room(queued.route):
+            self.take(queued.route)
+            return
+        bisect.insort(self.waiting, queued)
+        self.pump()
+        try:
+            await queued.granted
+        except asyncio.CancelledError:
+            if queued.granted.done() and not queued.granted.cancelled():
+                self.release(queued.route)  # Granted just as we were cancelled
+            elif queued in self.waiting:
+                self.waiting.remove(queued)
+            raise
+
+    def release(self, route: str):
+        self.active -= 1
+        self.route_active[route] -= 1
+        if not self.route_active[route]:
+            del self.route_active[route]
+        self.pump()
+
+    def pump(self):
+        """Hands free slots to the most urgent waiting calls whose route has room."""
+        i = 0
+        while i < len(self.waiting) and self.active < self.concurrency:
+            queued = self.waiting[i]
+            if self.has_room(queued.route):
+                del self.waiting[i]
+                self.take(queued.route)
+                queued.granted.set_result(None)
+            else:
+                i += 1
+
+    def queued(self) -> dict:
+        counts = {(name,): 0 for name in LANE_NAMES}
+        for queued in self.waiting:
+            counts[(LANE_NAMES[queued.lane],)] += 1
+        return counts
+
+def get_rest(bot) -> RestScheduler:
+    """Return the bot-wide RestScheduler, creating it on first use."""
+    rest = getattr(bot, 'rest', None)
+    if rest is None:
+        rest = bot.rest = RestScheduler()
+        watch_rate_limits()
+        REGISTRY.register(Gauge(
+            "bot_rest_queued", "REST calls waiting for a slot, by lane.", ("lane",), collect=rest.queued))
+    return rest
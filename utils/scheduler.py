@@ -0,0 +1,191 @@
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from utils.sharding import owns_guild
+from utils.storage import get_store
+
+logger = logging.getLogger(__name__)
+
+# --- Scheduler Settings ---
+CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "4"))  # Jobs running at the same time
+MAX_ATTEMPTS = 3     # Failed jobs are retried this many times in total
+RETRY_DELAY = 60     # Seconds before the first retry, doubled for each further one
+
+class Scheduler:
+    """Bot-wide deadline scheduler for timed jobs (reminders, poll ends, tempban expiries...).
+
+    Cogs register an async handler per job kind and schedule jobs by (kind, ref)
+    with a due time. Jobs are kept in a heap and persisted in the shared Store,
+    so they survive restarts; overdue ones run as soon as the bot is ready. A
+    single runner task sleeps until the earliest deadline (waking early only
+    when an earlier job is scheduled), and runs due jobs with bounded
+    concurrency. Jobs tied to a guild only run in the process that owns its
+    shard. Non-persistent jobs are for process-local work like periodic flushes.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = get_store(bot)
+        self.table = None
+        # {job_id: job}; a job is {'kind', 'ref', 'due', 'guild_id', 'data', 'attempts', 'persist'}
+        self.jobs = {}
+        self.heap = []  # [(due, job_id)], stale entries are skipped when popped
+        self.handlers = {}
+        self.waiting = {}  # {kind: [job_id]} due jobs whose cog has not registered yet
+        self.wakeup = asyncio.Event()
+        self.semaphore = asyncio.Semaphore(CONCURRENCY)
+        self.start_lock = asyncio.Lock()
+        self.runner = None
+        self.tasks = set()
+        self.stats = {'runs': 0, 'failures': 0, 'max_late': 0.0}
+
+    # --- Setup ---
+
+    async def start(self):
+        """Loads persisted jobs and starts the runner. Safe to call from every cog's cog_load."""
+        async with self.start_lock:
+            if self.runner is not None:
+                return
+            self.table = await self.store.open_table('scheduler')
+            for job_id, row in self.table.items():
+                self.jobs[job_id] = dict(row, persist=True)
+                heapq.heappush(self.heap, (row['due'], job_id))
+            self.runner = asyncio.create_task(self.run())
+            logger.info(f"Scheduler started with {len(self.jobs)} persisted job(s)")
+
+    def register(self, kind: str, handler):
+        """Sets the async handler(job) for a job kind."""
+        self.handlers[kind] = handler
+        for job_id in self.waiting.pop(kind, []):
+            job = self.jobs.get(job_id)
+            if job:
+                heapq.heappush(self.heap, (job['due'], job_id))
+        self.wakeup.set()
+
+    async def close(self):
+        if self.runner:
+            self.runner.cancel()
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    # --- Jobs ---
+
+    def schedule(self, kind: str, ref, due: datetime, data: dict = None, guild_id=None, persist: bool = True):
+        """Adds or replaces the job (kind, ref). data must be JSON-serializable if persisted."""
+        job_id = f"{kind}:{ref}"
+        due_timestamp = due.timestamp()
+        existing = self.jobs.get(job_id)
+        if existing and existing['due'] == due_timestamp and existing['data'] == data:
+            return  # Unchanged, e.g. re-registered at startup
+
+        job = {
+            'kind': kind, 'ref': str(ref), 'due': due_timestamp,
+            'guild_id': str(guild_id) if guild_id is not None else None,
+            'data': data, 'attempts': 0,
+        }
+        self.jobs[job_id] = dict(job, persist=persist)
+        if persist:
+            self.table.put(job_id, job)
+        heapq.heappush(self.heap, (due_timestamp, job_id))
+        if self.heap[0][1] == job_id:
+            self.wakeup.set()  # New earliest deadline
+
+    def cancel(self, kind: str, ref):
+        job_id = f"{kind}:{ref}"
+        job = self.jobs.pop(job_id, None)
+        if job and job['persist']:
+            self.table.delete(job_id)
+
+    def get(self, kind: str, ref):
+        return self.jobs.get(f"{kind}:{ref}")
+
+    def jobs_of(self, kind: str) -> list:
+        return [job for job in self.jobs.values() if job['kind'] == kind]
+
+    # --- Runner ---
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                due, job_id = heapq.heappop(self.heap)
+                job = self.jobs.get(job_id)
+                if job is None or job['due'] != due:
+                    continue  # Cancelled or rescheduled since it was pushed
+                if job['persist'] and not owns_guild(self.bot, job['guild_id']):
+                    continue  # Another shard process runs it
+                if job['kind'] not in self.handlers:
+                    self.waiting.setdefault(job['kind'], []).append(job_id)
+                    continue
+                await self.semaphore.acquire()
+                self.spawn(self.run_job(job_id, job))
+
+            self.wakeup.clear()
+            timeout = max(0.0, self.heap[0][0] - time.time()) if self.heap else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_job(self, job_id: str, job: dict):
+        late = max(0.0, time.time() - job['due'])
+        self.stats['max_late'] = max(self.stats['max_late'], late)
+        try:
+            await self.handlers[job['kind']](dict(job, late=late))
+            self.stats['runs'] += 1
+        except Exception:
+            self.stats['failures'] += 1
+            logger.exception(f"Scheduled job {job_id} failed (attempt {job['attempts'] + 1}/{MAX_ATTEMPTS})")
+            if self.jobs.get(job_id) is job:
+                self.retry(job_id, job)
+        else:
+            # The handler may have rescheduled the job; only remove the run we just did
+            if self.jobs.get(job_id) is job:
+                self.cancel(job['kind'], job['ref'])
+        finally:
+            self.semaphore.release()
+
+    def retry(self, job_id: str, job: dict):
+        if job['attempts'] + 1 >= MAX_ATTEMPTS:
+            logger.error(f"Giving up on scheduled job {job_id}")
+            self.cancel(job['kind'], job['ref'])
+            return
+        retry = dict(job, attempts=job['attempts'] + 1, due=time.time() + RETRY_DELAY * 2 ** job['attempts'])
+        self.jobs[job_id] = retry
+        if retry['persist']:
+            self.table.put(job_id, {key: value for key, value in retry.items() if key != 'persist'})
+        heapq.heappush(self.heap, (retry['due'], job_id))
+        self.wakeup.set()
+
+    # --- Introspection ---
+
+    def summary(self) -> dict:
+        kinds = {}
+        for job in self.jobs.values():
+            kinds[job['kind']] = kinds.get(job['kind'], 0) + 1
+        upcoming = sorted(self.jobs.values(), key=lambda job: job['due'])[:10]
+        return {
+            'kinds': kinds,
+            'upcoming': [dict(job, due=datetime.fromtimestamp(job['due'], timezone.utc)) for job in upcoming],
+            'running': CONCURRENCY - self.semaphore._value,
+            'waiting': sum(len(job_ids) for job_ids in self.waiting.values()),
+            **self.stats,
+        }
+
+def get_scheduler(bot) -> Scheduler:
+    """Return the bot-wide Scheduler, creating it on first use."""
+    scheduler = getattr(bot, 'scheduler', None)
+    if scheduler is None:
+        scheduler = bot.scheduler = Scheduler(bot)
+    return scheduler
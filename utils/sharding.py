@@ -0,0 +1,51 @@
+import os
+from discord.ext import commands
+
+def _env_int(name: str):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+def shard_config() -> dict:
+    """Reads SHARD_COUNT and SHARD_IDS (comma separated) from the environment.
+
+    Returns the keyword arguments for commands.AutoShardedBot, or None when
+    sharding is off. SHARDED=1 on its own lets Discord pick the shard count.
+    Raises ValueError when SHARD_IDS is set without a SHARD_COUNT to match.
+    """
+    shard_count = _env_int("SHARD_COUNT")
+    shard_ids = os.getenv("SHARD_IDS")
+    sharded = os.getenv("SHARDED", "").lower() in ("1", "true", "yes")
+    if not (sharded or shard_count or shard_ids):
+        return None
+
+    config = {'shard_count': shard_count}
+    if shard_ids:
+        # Which shards to run only means something against a fixed total
+        if not shard_count:
+            raise ValueError("SHARD_IDS is set but SHARD_COUNT is not; set SHARD_COUNT to the total number of shards.")
+        config['shard_ids'] = [int(shard_id) for shard_id in shard_ids.split(',') if shard_id.strip()]
+        out_of_range = [shard_id for shard_id in config['shard_ids'] if not 0 <= shard_id < shard_count]
+        if out_of_range:
+            raise ValueError(f"SHARD_IDS {out_of_range} are outside SHARD_COUNT={shard_count} (valid IDs are 0-{shard_count - 1}).")
+    return config
+
+def shard_for(bot: commands.Bot, guild_id: int) -> int:
+    """The shard Discord routes a guild to."""
+    return (guild_id >> 22) % (bot.shard_count or 1)
+
+def owned_shards(bot: commands.Bot) -> set:
+    """Shard IDs connected by this process."""
+    if isinstance(bot, commands.AutoShardedBot):
+        if bot.shard_ids is not None:
+            return set(bot.shard_ids)
+        return set(range(bot.shard_count or 1))
+    return {bot.shard_id or 0}
+
+def owns_guild(bot: commands.Bot, guild_id) -> bool:
+    """Whether scheduled work for a guild belongs to this process.
+
+    Work without a guild (DM reminders and the like) belongs to shard 0, so
+    it runs exactly once however the shards are spread across processes.
+    """
+    shard_id = 0 if guild_id is None else shard_for(bot, int(guild_id))
+    return shard_id in owned_shards(bot)
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from utils.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# --- Storage Settings ---
+STATE_DB = "data/bot_state.db"
+COMMIT_WINDOW = int(os.getenv("STORAGE_COMMIT_MS", "100")) / 1000  # Changes made within this window share one commit
+MAX_BATCH = 500                                                     # Commit early once this many rows are waiting
+MAX_RETRY_DELAY = 30                                                # Longest wait between retries of a failed commit
+# 0 syncs to disk on every commit; otherwise commits are synced at most this many seconds later
+FSYNC_INTERVAL = float(os.getenv("STORAGE_FSYNC_SECONDS", "0"))
+
+_DELETED = None  # Pending value for a row that should be removed
+
+def init_storage(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS storage_rows (
+            table_name TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (table_name, key)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS storage_meta (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+
+def load_rows(conn: sqlite3.Connection, name: str) -> dict:
+    cursor = conn.execute("SELECT key, value FROM storage_rows WHERE table_name = ?", (name,))
+    return {key: json.loads(value) for key, value in cursor}
+
+def migrate_table(conn: sqlite3.Connection, name: str, migrations: tuple) -> dict:
+    """Brings a table up to the latest schema version and returns its rows. Runs as one transaction."""
+    init_storage(conn)
+    row = conn.execute("SELECT version FROM storage_meta WHERE table_name = ?", (name,)).fetchone()
+    version = row[0] if row else 0
+    rows = load_rows(conn, name)
+    if version >= len(migrations):
+        return rows
+
+    for number, migration in enumerate(migrations[version:], version + 1):
+        rows = migration(rows)
+        logger.info(f"Migrated storage table {name} to version {number} ({len(rows)} rows)")
+
+    conn.execute("DELETE FROM storage_rows WHERE table_name = ?", (name,))
+    conn.executemany(
+        "INSERT INTO storage_rows (table_name, key, value) VALUES (?, ?, ?)",
+        [(name, key, json.dumps(value)) for key, value in rows.items()]
+    )
+    conn.execute(
+        "INSERT INTO storage_meta (table_name, version) VALUES (?, ?) "
+        "ON CONFLICT(table_name) DO UPDATE SET version = excluded.version",
+        (name, len(migrations))
+    )
+    return rows
+
+def write_rows(conn: sqlite3.Connection, changes: list):
+    """Applies [(table, key, json or None)] as one transaction."""
+    conn.executemany(
+        "INSERT INTO storage_rows (table_name, key, value) VALUES (?, ?, ?) "
+        "ON CONFLICT(table_name, key) DO UPDATE SET value = excluded.value",
+        [change for change in changes if change[2] is not _DELETED]
+    )
+    conn.executemany(
+        "DELETE FROM storage_rows WHERE table_name = ? AND key = ?",
+        [(name, key) for name, key, value in changes if value is _DELETED]
+    )
+
+def sync_to_disk(conn: sqlite3.Connection):
+    """Checkpoints the WAL, which syncs every commit so far to disk."""
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+def import_json_file(path: str, convert):
+    """Migration that imports a legacy JSON file. convert(data) returns the table's rows."""
+    def migration(rows: dict) -> dict:
+        if not os.path.exists(path):
+            return rows
+        with open(path, 'r') as f:
+            imported = convert(json.load(f))
+        logger.info(f"Imported {len(imported)} rows from {path}; the file is no longer used and can be deleted")
+        return {**rows, **imported}
+    return migration
+
+class Table:
+    """One named key/row table. Reads come from memory; writes are queued on the Store.
+
+    Values must be JSON-serializable. Each put() or delete() only writes that
+    row, so the cost of saving follows the size of the change.
+    """
+
+    def __init__(self, store, name: str, rows: dict):
+        self.store = store
+        self.name = name
+        self.rows = rows
+
+    def get(self, key: str, default=None):
+        return self.rows.get(key, default)
+
+    def items(self):
+        return self.rows.items()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def put(self, key: str, value):
+        self.rows[key] = value
+        self.store.queue(self.name, key, json.dumps(value))
+
+    def delete(self, key: str):
+        if key in self.rows:
+            del self.rows[key]
+            self.store.queue(self.name, key, _DELETED)
+
+class Store:
+    """Shared persistence for cog state, backed by a SQLite file through Database.
+
+    Writes are write-behind with group commit: put()/delete() only record the
+    change, and everything recorded within COMMIT_WINDOW (or MAX_BATCH rows)
+    is committed together as one transaction on the database writer thread,
+    with later changes to a row replacing earlier ones. Commits are atomic.
+    With FSYNC_INTERVAL at 0 each commit is synced to disk (synchronous=FULL);
+    otherwise commits are synced by a WAL checkpoint at most that many
+    seconds later. Cogs call flush() in cog_unload, and close() runs on
+    shutdown, so a clean stop never loses a change that was already made.
+    Tables are versioned; open_table() runs any pending migrations first.
+    """
+
+    def __init__(self, bot, path: str = STATE_DB):
+        self.db = get_database(bot, path, synchronous="FULL" if FSYNC_INTERVAL <= 0 else "NORMAL")
+        self.tables = {}
+        # {(table, key): json or _DELETED}, replaced on every commit
+        self.pending = {}
+        self.commit_task = None
+        self.write_task = None
+        self.retry_delay = 0  # Seconds before the next retry while commits are failing, else 0
+        self.sync_task = None
+        self.write_lock = asyncio.Lock()
+        self.tasks = set()
+        self.commits = 0
+        self.rows_written = 0
+
+    async def open_table(self, name: str, migrations: tuple = ()) -> Table:
+        """Opens a table, migrating it first. migrations[i] takes and returns the rows for version i + 1."""
+        table = self.tables.get(name)
+        if table is None:
+            rows = await self.db.transaction(migrate_table, name, tuple(migrations))
+            table = self.tables[name] = Table(self, name, rows)
+        return table
+
+    def queue(self, name: str, key: str, value):
+        self.pending[(name, key)] = value
+        if len(self.pending) >= MAX_BATCH and not self.retry_delay:
+            # One early commit at a time; it keeps committing until nothing is pending
+            if self.write_task is None or self.write_task.done():
+                self.write_task = self.spawn(self.write_pending())
+        elif self.commit_task is None or self.commit_task.done():
+            self.commit_task = self.spawn(self.commit_later())
+
+    def spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def commit_later(self, delay: float = COMMIT_WINDOW):
+        await asyncio.sleep(delay)
+        await self.write_pending()
+
+    async def write_pending(self):
+        # One commit at a time, so a flush() also waits for a commit already in progress
+        async with self.write_lock:
+            while self.pending:
+                changes, self.pending = self.pending, {}
+                try:
+                    await self.db.transaction(write_rows, [(name, key, value) for (name, key), value in changes.items()])
+                except sqlite3.Error as e:
+                    # Keep them for the retry, without overwriting anything newer
+                    self.pending = {**changes, **self.pending}
+                    self.retry_delay = min(max(self.retry_delay * 2, COMMIT_WINDOW, 0.1), MAX_RETRY_DELAY)
+                    logger.error(f"Error saving {len(self.pending)} storage change(s), retrying in {self.retry_delay:.1f}s: {e}")
+                    if self.commit_task is None or self.commit_task.done() or self.commit_task is asyncio.current_task():
+                        self.commit_task = self.spawn(self.commit_later(self.retry_delay))
+                    return
+                self.retry_delay = 0
+                self.commits += 1
+                self.rows_written += len(changes)
+                if FSYNC_INTERVAL > 0 and (self.sync_task is None or self.sync_task.done()):
+                    self.sync_task = self.spawn(self.sync_later())
+
+    async def sync_later(self):
+        await asyncio.sleep(FSYNC_INTERVAL)
+        await self.db.transaction(sync_to_disk)
+
+    async def flush(self):
+        """Commits everything queued so far, waiting for any commit already in progress."""
+        await self.write_pending()
+
+    async def close(self):
+        """Final flush and disk sync on shutdown. The Database itself is closed by main.py."""
+        await self.flush()
+        if self.commit_task:
+            self.commit_task.cancel()
+        if self.sync_task and not self.sync_task.done():
+            self.sync_task.cancel()
+            await self.db.transaction(sync_to_disk)
+        logger.info(f"Storage closed after {self.commits} commit(s) of {self.rows_written} row(s)")
+
+def get_store(bot) -> Store:
+    """Return the bot-wide Store, creating it on first use."""
+    store = getattr(bot, 'store', None)
+    if store is None:
+        store = bot.store = Store(bot)
+    return store
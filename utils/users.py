@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections import OrderedDict
+import discord
+from utils.metrics import REGISTRY, Counter, Gauge
+from utils.rest import INTERACTIVE, get_rest
+
+# --- Lookup Settings ---
+USER_TTL = 3600       # Seconds a fetched user is reused
+NOT_FOUND_TTL = 300   # Seconds a deleted/unknown user ID is remembered
+MAX_USERS = 5000      # Fetched users kept, least recently used dropped first
+
+lookups = REGISTRY.register(Counter(
+    "bot_user_lookups_total",
+    "User lookups by where they were answered: gateway, member, cache, not_found_cache, coalesced, fetch or not_found.",
+    ("source",)))
+
+class UserLookup:
+    """Finds users without a REST round trip whenever possible.
+
+    Lookups try the gateway cache (get_user, then the guild's members when a
+    guild is given), then users fetched earlier, then fetch_user through the
+    REST scheduler. Fetched users are kept for USER_TTL, and IDs Discord
+    doesn't know for NOT_FOUND_TTL, so a deleted account isn't fetched over
+    and over. Concurrent lookups of one ID share a single fetch, unless the
+    fetch is in a less urgent lane: a moderation lookup never waits behind a
+    background one, it starts its own fetch in its own lane.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.rest = get_rest(bot)
+        self.cache = OrderedDict()  # {user_id: (user or None, expires)}
+        self.in_flight = {}         # {user_id: {lane: Future}}
+
+    async def fetch(self, user_id: int, lane: int = INTERACTIVE, guild: discord.Guild = None):
+        """The user with this ID, or None if Discord doesn't know it. Other HTTP errors are raised."""
+        user_id = int(user_id)
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            lookups.inc("gateway")
+            return user
+        if guild is not None:
+            member = guild.get_member(user_id)
+            if member is not None:
+                lookups.inc("member")
+                return member
+
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            user, expires = cached
+            if time.monotonic() < expires:
+                self.cache.move_to_end(user_id)
+                lookups.inc("cache" if user is not None else "not_found_cache")
+                return user
+            del self.cache[user_id]
+
+        fetches = self.in_flight.setdefault(user_id, {})
+        # Join a fetch at least as urgent as this lookup
+        shared = [fetches[other] for other in sorted(fetches) if other <= lane]
+        if shared:
+            lookups.inc("coalesced")
+            return await asyncio.shield(shared[0])
+
+        future = fetches[lane] = asyncio.get_running_loop().create_future()
+        try:
+            user = await self.rest.call(lane, "users", lambda: self.bot.fetch_user(user_id))
+        except discord.NotFound:
+            user = None
+            lookups.inc("not_found")
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Retrieved here, so an unshared lookup doesn't warn
+            raise
+        else:
+            lookups.inc("fetch")
+        finally:
+            del fetches[lane]
+            if not fetches:
+                del self.in_flight[user_id]
+
+        self.remember(user_id, user)
+        future.set_result(user)
+        return user
+
+    def remember(self, user_id: int, user):
+        ttl = USER_TTL if user is not None else NOT_FOUND_TTL
+        self.cache[user_id] = (user, time.monotonic() + ttl)
+        self.cache.move_to_end(user_id)
+        while len(self.cache) > MAX_USERS:
+            self.cache.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        """Share of lookups answered without a REST call."""
+        total = sum(lookups.values.values())
+        fetched = lookups.values.get(("fetch",), 0) + lookups.values.get(("not_found",), 0)
+        return (total - fetched) / total if total else 0.0
+
+def get_users(bot) -> UserLookup:
+    """Return the bot-wide UserLookup, creating it on first use."""
+    users = getattr(bot, 'users_lookup', None)
+    if users is None:
+        users = bot.users_lookup = UserLookup(bot)
+        REGISTRY.register(Gauge(
+            "bot_user_lookup_hit_ratio", "Share of user lookups answered without a REST call.",
+            collect=lambda: {(): users.hit_rate()}))
+    return users
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from utils.metrics import REGISTRY, Counter
+
+logger = logging.getLogger(__name__)
+
+# --- Watchdog Settings ---
+LAG_THRESHOLD = int(os.getenv("LOOP_WATCHDOG_MS", "250")) / 1000  # Blocked this long counts as a stall; 0 disables
+TICK_INTERVAL = 0.1     # How often the loop reports it is alive
+SAMPLE_INTERVAL = 0.05  # How often the helper thread checks, and samples while stalled
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frames from these are never the culprit: the watchdog itself, and main.py, which sits at the bottom of every stack
+SKIPPED_FILES = (os.path.abspath(__file__), os.path.join(PROJECT_ROOT, "main.py"))
+# A virtualenv or installed packages inside the project directory are library code
+LIBRARY_DIRS = {"site-packages", "dist-packages", "venv", ".venv", "env", ".env"}
+
+loop_stalls = REGISTRY.register(Counter(
+    "bot_loop_stalls_total", "Times the event loop was blocked longer than the watchdog threshold."))
+blocked_seconds = REGISTRY.register(Counter(
+    "bot_loop_blocked_seconds_total", "Estimated time the event loop was blocked, by the cog and function on the stack.",
+    ("cog", "function")))
+
+def is_bot_file(filename: str) -> bool:
+    if not os.path.isabs(filename) or not filename.startswith(PROJECT_ROOT + os.sep) or filename in SKIPPED_FILES:
+        return False
+    return not LIBRARY_DIRS.intersection(os.path.relpath(filename, PROJECT_ROOT).split(os.sep))
+
+def attribute(frame) -> tuple:
+    """Finds the innermost bot frame on a stack: (cog, function, location, innermost call)."""
+    innermost = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if is_bot_file(filename):
+            module = os.path.splitext(os.path.relpath(filename, PROJECT_ROOT))[0].replace(os.sep, ".")
+            cog = module.split(".", 1)[1] if module.startswith("commands.") else module
+            return cog, frame.f_code.co_name, f"{module}:{frame.f_lineno}", innermost
+        frame = frame.f_back
+    return "(library)", innermost, "", innermost
+
+class LoopWatchdog:
+    """Watches the event loop from a helper thread and samples its stack whenever it stalls.
+
+    A task on the loop stamps a heartbeat every TICK_INTERVAL. If the helper
+    thread sees the stamp go stale by more than the threshold, the loop thread
+    is stuck in synchronous code, so its current stack is sampled every
+    SAMPLE_INTERVAL until it recovers. Samples are aggregated by the innermost
+    frame that belongs to this bot, which names the cog and function at fault.
+    """
+
+    def __init__(self, threshold: float = LAG_THRESHOLD):
+        self.threshold = threshold
+        self.last_tick = time.perf_counter()
+        self.loop_thread_id = None
+        self.tick_task = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # {(cog, function, location, innermost): samples}
+            self.samples = {}
+            self.stalls = 0
+            self.longest_stall = 0.0
+            self.since = time.time()
+
+    def start(self):
+        if self.threshold <= 0 or self.thread is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.last_tick = time.perf_counter()
+        self.tick_task = asyncio.get_running_loop().create_task(self.tick())
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.tick_task:
+            self.tick_task.cancel()
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    async def tick(self):
+        while True:
+            self.last_tick = time.perf_counter()
+            await asyncio.sleep(TICK_INTERVAL)
+
+    def watch(self):
+        stall_started = None
+        while not self.stopping.wait(SAMPLE_INTERVAL):
+            blocked = time.perf_counter() - self.last_tick - TICK_INTERVAL
+            if blocked < self.threshold:
+                if stall_started is not None:
+                    self.end_stall(time.perf_counter() - stall_started)
+                    stall_started = None
+                continue
+
+            if stall_started is None:
+                stall_started = self.last_tick + TICK_INTERVAL
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            key = attribute(frame)
+            del frame
+            with self.lock:
+                self.samples[key] = self.samples.get(key, 0) + 1
+            blocked_seconds.inc(key[0], key[1], amount=SAMPLE_INTERVAL)
+
+    def end_stall(self, duration: float):
+        loop_stalls.inc()
+        with self.lock:
+            self.stalls += 1
+            self.longest_stall = max(self.longest_stall, duration)
+        logger.warning(f"Event loop was blocked for {duration * 1000:.0f}ms")
+
+    def report(self, limit: int = 10) -> dict:
+        """Worst offenders by estimated blocked time: {'stalls', 'longest', 'since', 'offenders': [...]}"""
+        with self.lock:
+            samples = sorted(self.samples.items(), key=lambda item: -item[1])
+            return {
+                'stalls': self.stalls,
+                'longest': self.longest_stall,
+                'since': self.since,
+                'offenders': [
+                    {'cog': cog, 'function': function, 'location': location,
+                     'innermost': innermost, 'blocked': count * SAMPLE_INTERVAL}
+                    for (cog, function, location, innermost), count in samples[:limit]
+                ],
+            }
+
+def get_watchdog(bot) -> LoopWatchdog:
+    """Return the bot's loop watchdog, creating it on first use."""
+    watchdog = getattr(bot, 'loop_watchdog', None)
+    if watchdog is None:
+        watchdog = bot.loop_watchdog = LoopWatchdog()
+    return watchdog